@@ -8,23 +8,21 @@ This example demonstrates how to use the KRS API to retrieve data about Cyfrowy
 """
 
 import os
-import sys
 import json
 from pathlib import Path
 
-# Add the src directory to the path
+# Repository root, used for the output directory
 current_dir = Path(__file__).resolve().parent.parent
-sys.path.append(str(current_dir))
 
 # Import the KRS API client
-from src.krs_api import KrsAPI
+from src.krs_api import get_krs_api
 from src.krs_export import KrsExporter
 
 
 def main():
     """Main function to run the example."""
     # Create the KRS API client
-    api = KrsAPI()
+    api = get_krs_api()
     
     try:
         # Search for Cyfrowy Polsat by KRS number
@@ -8,43 +8,119 @@ This example demonstrates how to import Cyfrowy Polsat data into Neo4j.
 """
 
 import os
-import sys
+import re
 import json
 from pathlib import Path
 
-# Add the src directory to the path
+# Repository root, used for the output directory
 current_dir = Path(__file__).resolve().parent.parent
-sys.path.append(str(current_dir))
 
 # Import required modules
-from src.krs_api import KrsAPI
+from src.krs_api import get_krs_api
 from src.graph.neo4j_connection import Neo4jConnection
-from src.graph.data_model import DatabaseSchema, NodeLabels, RelationshipTypes, NodeProperties
+from src.graph.data_model import DatabaseSchema, GraphMeta, NodeLabels, RelationshipTypes, NodeProperties, RelationshipProperties
+
+# Cypher queries are built once at import so every call sends identical query text
+# and the server can reuse its cached execution plans
+_Q_MERGE_COMPANY = f"""
+MERGE (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+ON CREATE SET 
+    c.{NodeProperties.NAME} = $name,
+    c.{NodeProperties.NIP} = $nip,
+    c.{NodeProperties.REGON} = $regon,
+    c.{NodeProperties.ADDRESS} = $address,
+    c.{NodeProperties.STATUS} = $status,
+    c.created_at = datetime()
+ON MATCH SET
+    c.{NodeProperties.NAME} = $name,
+    c.{NodeProperties.NIP} = $nip,
+    c.{NodeProperties.REGON} = $regon,
+    c.{NodeProperties.ADDRESS} = $address,
+    c.{NodeProperties.STATUS} = $status,
+    c.updated_at = datetime()
+RETURN c
+"""
+
+_Q_MERGE_REPRESENTATIVES = f"""
+UNWIND $rows AS row
+MERGE (p:{NodeLabels.PERSON} {{{NodeProperties.ID}: row.id}})
+ON CREATE SET 
+    p.{NodeProperties.FIRST_NAME} = row.first_name,
+    p.{NodeProperties.LAST_NAME} = row.last_name,
+    p.created_at = datetime()
+ON MATCH SET
+    p.{NodeProperties.FIRST_NAME} = row.first_name,
+    p.{NodeProperties.LAST_NAME} = row.last_name,
+    p.updated_at = datetime()
+WITH p, row
+MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $company_krs}})
+MERGE (p)-[r:{RelationshipTypes.MANAGES}]->(c)
+ON CREATE SET 
+    r.{NodeProperties.ROLE} = row.role,
+    r.created_at = datetime()
+ON MATCH SET
+    r.{NodeProperties.ROLE} = row.role,
+    r.updated_at = datetime()
+RETURN count(r) AS relationships
+"""
+
+_Q_MERGE_SHAREHOLDERS = f"""
+UNWIND $rows AS row
+MERGE (s:{NodeLabels.SHAREHOLDER} {{id: row.id}})
+ON CREATE SET 
+    s.{NodeProperties.NAME} = row.name,
+    s.{NodeProperties.SHAREHOLDER_TYPE} = row.type,
+    s.created_at = datetime()
+ON MATCH SET
+    s.{NodeProperties.NAME} = row.name,
+    s.{NodeProperties.SHAREHOLDER_TYPE} = row.type,
+    s.updated_at = datetime()
+WITH s, row
+MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $company_krs}})
+MERGE (s)-[r:{RelationshipTypes.OWNS_SHARES_IN}]->(c)
+ON CREATE SET 
+    r.{RelationshipProperties.PERCENTAGE} = row.percentage,
+    r.created_at = datetime()
+ON MATCH SET
+    r.{RelationshipProperties.PERCENTAGE} = row.percentage,
+    r.updated_at = datetime()
+RETURN count(r) AS relationships
+"""
+
+# Example queries saved next to the imported data for exploring it in Neo4j Browser
+_CYPHER_HINTS_TEMPLATE = """// View company details
+MATCH (c:Company {krs: "0000010078"})
+RETURN c
+
+// View representatives
+MATCH (p:Person)-[r:MANAGES]->(c:Company {krs: "0000010078"})
+RETURN p.first_name, p.last_name, r.role
+
+// View shareholders
+MATCH (s:Shareholder)-[r:OWNS_SHARES_IN]->(c:Company {krs: "0000010078"})
+RETURN s.name, r.percentage
+ORDER BY r.percentage DESC
+
+// View ownership network up to 3 levels deep
+MATCH path = (n)-[r*1..3]-(c:Company {krs: "0000010078"})
+RETURN path
+"""
+
+
+def _person_id(first_name, last_name):
+    """Build the unique ID of a person node."""
+    return f"{first_name.lower()}_{last_name.lower()}"
+
+
+def _shareholder_id(name):
+    """Build the unique ID of a shareholder node."""
+    return "shareholder_" + re.sub(r"\s+", "_", name.lower())
 
 
 def create_company_node(tx, krs, name, nip=None, regon=None, address=None, status=None):
     """Create a company node in Neo4j."""
-    query = f"""
-    MERGE (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
-    ON CREATE SET 
-        c.{NodeProperties.NAME} = $name,
-        c.{NodeProperties.NIP} = $nip,
-        c.{NodeProperties.REGON} = $regon,
-        c.{NodeProperties.ADDRESS} = $address,
-        c.{NodeProperties.STATUS} = $status,
-        c.created_at = datetime()
-    ON MATCH SET
-        c.{NodeProperties.NAME} = $name,
-        c.{NodeProperties.NIP} = $nip,
-        c.{NodeProperties.REGON} = $regon,
-        c.{NodeProperties.ADDRESS} = $address,
-        c.{NodeProperties.STATUS} = $status,
-        c.updated_at = datetime()
-    RETURN c
-    """
-    
     result = tx.run(
-        query,
+        _Q_MERGE_COMPANY,
         krs=krs,
         name=name,
         nip=nip,
@@ -56,120 +132,36 @@ def create_company_node(tx, krs, name, nip=None, regon=None, address=None, statu
     return result.single()["c"]
 
 
-def create_person_node(tx, first_name, last_name):
-    """Create a person node in Neo4j."""
-    # Generate a unique ID for the person
-    person_id = f"{first_name.lower()}_{last_name.lower()}"
-    
-    query = f"""
-    MERGE (p:{NodeLabels.PERSON} {{{NodeProperties.ID}: $id}})
-    ON CREATE SET 
-        p.{NodeProperties.FIRST_NAME} = $first_name,
-        p.{NodeProperties.LAST_NAME} = $last_name,
-        p.created_at = datetime()
-    ON MATCH SET
-        p.{NodeProperties.FIRST_NAME} = $first_name,
-        p.{NodeProperties.LAST_NAME} = $last_name,
-        p.updated_at = datetime()
-    RETURN p
-    """
-    
-    result = tx.run(
-        query,
-        id=person_id,
-        first_name=first_name,
-        last_name=last_name
-    )
-    
-    return result.single()["p"]
-
-
-def create_management_relationship(tx, person_id, company_krs, role):
-    """Create a management relationship between a person and a company."""
-    query = f"""
-    MATCH (p:{NodeLabels.PERSON} {{{NodeProperties.ID}: $person_id}})
-    MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $company_krs}})
-    MERGE (p)-[r:{RelationshipTypes.MANAGES}]->(c)
-    ON CREATE SET 
-        r.{NodeProperties.ROLE} = $role,
-        r.created_at = datetime()
-    ON MATCH SET
-        r.{NodeProperties.ROLE} = $role,
-        r.updated_at = datetime()
-    RETURN r
-    """
-    
-    result = tx.run(
-        query,
-        person_id=person_id,
-        company_krs=company_krs,
-        role=role
-    )
-    
-    return result.single()["r"]
+def parse_percentages(values):
+    """Convert percentage strings to floats (e.g., "57.66%" -> 57.66), keeping other values as they are."""
+    percentages = []
+    for percentage in values:
+        if isinstance(percentage, str) and "%" in percentage:
+            percentage = float(percentage.replace("%", ""))
+        percentages.append(percentage)
+    return percentages
 
 
-def create_shareholder_node(tx, name, shareholder_type):
-    """Create a shareholder node in Neo4j."""
-    # Generate a unique ID for the shareholder
-    shareholder_id = f"shareholder_{name.lower().replace(' ', '_')}"
-    
-    query = f"""
-    MERGE (s:{NodeLabels.SHAREHOLDER} {{id: $id}})
-    ON CREATE SET 
-        s.{NodeProperties.NAME} = $name,
-        s.{NodeProperties.SHAREHOLDER_TYPE} = $type,
-        s.created_at = datetime()
-    ON MATCH SET
-        s.{NodeProperties.NAME} = $name,
-        s.{NodeProperties.SHAREHOLDER_TYPE} = $type,
-        s.updated_at = datetime()
-    RETURN s
-    """
+def create_representatives_batch(tx, batch, krs):
+    """Create person nodes and management relationships for a batch of representative rows."""
+    result = tx.run(_Q_MERGE_REPRESENTATIVES, rows=batch, company_krs=krs)
     
-    result = tx.run(
-        query,
-        id=shareholder_id,
-        name=name,
-        type=shareholder_type
-    )
-    
-    return result.single()["s"]
+    return result.single()["relationships"]
 
 
-def create_ownership_relationship(tx, shareholder_id, company_krs, percentage):
-    """Create an ownership relationship between a shareholder and a company."""
-    query = f"""
-    MATCH (s:{NodeLabels.SHAREHOLDER} {{id: $shareholder_id}})
-    MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $company_krs}})
-    MERGE (s)-[r:{RelationshipTypes.OWNS_SHARES_IN}]->(c)
-    ON CREATE SET 
-        r.{NodeProperties.PERCENTAGE} = $percentage,
-        r.created_at = datetime()
-    ON MATCH SET
-        r.{NodeProperties.PERCENTAGE} = $percentage,
-        r.updated_at = datetime()
-    RETURN r
-    """
-    
-    # Convert percentage string to float (e.g., "57.66%" -> 57.66)
-    if isinstance(percentage, str) and "%" in percentage:
-        percentage = float(percentage.replace("%", ""))
-    
-    result = tx.run(
-        query,
-        shareholder_id=shareholder_id,
-        company_krs=company_krs,
-        percentage=percentage
-    )
+def create_shareholders_batch(tx, batch, krs):
+    """Create shareholder nodes and ownership relationships for a batch of shareholder rows."""
+    result = tx.run(_Q_MERGE_SHAREHOLDERS, rows=batch, company_krs=krs)
+    relationships = result.single()["relationships"]
+    tx.run(GraphMeta.TOUCH).consume()
     
-    return result.single()["r"]
+    return relationships
 
 
 def create_cyfrowy_polsat_graph(neo4j_connection):
     """Create a graph representation of Cyfrowy Polsat data in Neo4j."""
     # Get Cyfrowy Polsat data from the KRS API
-    api = KrsAPI()
+    api = get_krs_api()
     
     # Get entity details
     entity_data = api.get_entity_details("0000010078")
@@ -182,92 +174,58 @@ def create_cyfrowy_polsat_graph(neo4j_connection):
     shareholders = api.get_entity_shareholders("0000010078")
     shareholders_list = shareholders.get("wspolnicy", [])
     
-    # Create the company node
-    def create_company(tx):
-        return create_company_node(
-            tx,
-            krs=entity_data.get("krs"),
-            name=entity_data.get("nazwa"),
-            nip=entity_data.get("nip"),
-            regon=entity_data.get("regon"),
-            address=entity_data.get("adres"),
-            status=entity_data.get("status")
-        )
+    krs = entity_data.get("krs")
     
-    company = neo4j_connection.execute_write_transaction(create_company)
-    print(f"Created company node: {company}")
+    # Build the UNWIND rows up front so the transaction functions only send them
+    rep_rows = [
+        {
+            "id": _person_id(rep.get("imie"), rep.get("nazwisko")),
+            "first_name": rep.get("imie"),
+            "last_name": rep.get("nazwisko"),
+            "role": rep.get("funkcja")
+        }
+        for rep in reps_list
+    ]
     
-    # Create representatives and relationships
-    for rep in reps_list:
-        def create_rep_and_relationship(tx):
-            person = create_person_node(
-                tx,
-                first_name=rep.get("imie"),
-                last_name=rep.get("nazwisko")
-            )
-            
-            person_id = f"{rep.get('imie').lower()}_{rep.get('nazwisko').lower()}"
-            
-            relationship = create_management_relationship(
-                tx,
-                person_id=person_id,
-                company_krs=entity_data.get("krs"),
-                role=rep.get("funkcja")
-            )
-            
-            return {"person": person, "relationship": relationship}
-        
-        result = neo4j_connection.execute_write_transaction(create_rep_and_relationship)
-        print(f"Created person node: {result['person']} with relationship: {result['relationship']}")
+    percentages = parse_percentages([shareholder.get("udzialy") for shareholder in shareholders_list])
+    shareholder_rows = [
+        {
+            "id": _shareholder_id(shareholder.get("nazwa")),
+            "name": shareholder.get("nazwa"),
+            "type": shareholder.get("typ", "unknown"),
+            "percentage": percentage
+        }
+        for shareholder, percentage in zip(shareholders_list, percentages)
+    ]
     
-    # Create shareholders and relationships
-    for shareholder in shareholders_list:
-        def create_shareholder_and_relationship(tx):
-            shareholder_node = create_shareholder_node(
-                tx,
-                name=shareholder.get("nazwa"),
-                shareholder_type=shareholder.get("typ", "unknown")
-            )
-            
-            shareholder_id = f"shareholder_{shareholder.get('nazwa').lower().replace(' ', '_')}"
-            
-            relationship = create_ownership_relationship(
-                tx,
-                shareholder_id=shareholder_id,
-                company_krs=entity_data.get("krs"),
-                percentage=shareholder.get("udzialy")
-            )
-            
-            return {"shareholder": shareholder_node, "relationship": relationship}
-        
-        result = neo4j_connection.execute_write_transaction(create_shareholder_and_relationship)
-        print(f"Created shareholder node: {result['shareholder']} with relationship: {result['relationship']}")
+    # Run all writes through one session
+    company, rep_count, shareholder_count = neo4j_connection.execute_batch([
+        (
+            create_company_node,
+            krs,
+            entity_data.get("nazwa"),
+            entity_data.get("nip"),
+            entity_data.get("regon"),
+            entity_data.get("adres"),
+            entity_data.get("status")
+        ),
+        (create_representatives_batch, rep_rows, krs),
+        (create_shareholders_batch, shareholder_rows, krs)
+    ])
+    print(f"Created company node: {company}")
+    print(f"Created {rep_count} person nodes with management relationships")
+    print(f"Created {shareholder_count} shareholder nodes with ownership relationships")
     
-    # Generate Neo4j Cypher queries for later use
+    # Save Neo4j Cypher queries for later use; the content is static, so keep an existing file
     output_dir = os.path.join(current_dir, "output")
     os.makedirs(output_dir, exist_ok=True)
     
-    with open(os.path.join(output_dir, "neo4j_queries_0000010078_depth3.cypher"), "w", encoding="utf-8") as f:
-        f.write("""
-// View company details
-MATCH (c:Company {krs: "0000010078"})
-RETURN c
-
-// View representatives
-MATCH (p:Person)-[r:MANAGES]->(c:Company {krs: "0000010078"})
-RETURN p.first_name, p.last_name, r.role
-
-// View shareholders
-MATCH (s:Shareholder)-[r:OWNS_SHARES_IN]->(c:Company {krs: "0000010078"})
-RETURN s.name, r.percentage
-ORDER BY r.percentage DESC
-
-// View ownership network up to 3 levels deep
-MATCH path = (n)-[r*1..3]-(c:Company {krs: "0000010078"})
-RETURN path
-        """)
+    queries_path = os.path.join(output_dir, "neo4j_queries_0000010078_depth3.cypher")
+    if not os.path.exists(queries_path):
+        with open(queries_path, "w", encoding="utf-8") as f:
+            f.write(_CYPHER_HINTS_TEMPLATE)
     
-    print(f"\nNeo4j Cypher queries saved to {os.path.join(output_dir, 'neo4j_queries_0000010078_depth3.cypher')}")
+    print(f"\nNeo4j Cypher queries saved to {queries_path}")
 
 
 def main():
@@ -286,6 +244,9 @@ def main():
         # Create the database schema (constraints and indexes)
         print("\nCreating database schema...")
         DatabaseSchema.create_constraints_and_indexes(neo4j)
+        missing_constraints = DatabaseSchema.get_missing_constraints(neo4j)
+        if missing_constraints:
+            print(f"Warning: missing constraints {', '.join(missing_constraints)}; MERGE will fall back to label scans")
         
         # Create the Cyfrowy Polsat graph
         print("\nCreating Cyfrowy Polsat graph...")
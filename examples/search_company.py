@@ -8,55 +8,67 @@ This example demonstrates how to search for companies using the KRS API.
 """
 
 import os
-import sys
 import json
-import argparse
-from pathlib import Path
-
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent.parent
-sys.path.append(str(current_dir))
+import sys
+import getopt
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the KRS API client
-from src.krs_api import KrsAPI
+from src.krs_api import get_krs_api
+
+
+_USAGE = """usage: search_company.py [-h] [--krs KRS] [--nip NIP] [--regon REGON] [--name NAME]
+
+Search for companies using the KRS API
+
+options:
+  -h, --help     show this help message and exit
+  --krs KRS      KRS number
+  --nip NIP      NIP number
+  --regon REGON  REGON number
+  --name NAME    Company name"""
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Command line arguments without the program name
+        
+    Returns:
+        The parsed options as attributes
+    """
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "krs=", "nip=", "regon=", "name="])
+    except getopt.GetoptError as e:
+        print(f"Error: {e}\n\n{_USAGE}")
+        sys.exit(2)
+    
+    args = SimpleNamespace(krs=None, nip=None, regon=None, name=None)
+    for opt, value in opts:
+        if opt in ("-h", "--help"):
+            print(_USAGE)
+            sys.exit(0)
+        setattr(args, opt[2:], value)
+    
+    return args
 
 
 def main():
     """Main function to run the example."""
     # Parse command line arguments
-    parser = argparse.ArgumentParser(
-        description="Search for companies using the KRS API"
-    )
-    parser.add_argument(
-        "--krs", 
-        type=str, 
-        help="KRS number"
-    )
-    parser.add_argument(
-        "--nip", 
-        type=str, 
-        help="NIP number"
-    )
-    parser.add_argument(
-        "--regon", 
-        type=str, 
-        help="REGON number"
-    )
-    parser.add_argument(
-        "--name", 
-        type=str, 
-        help="Company name"
-    )
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # Check if at least one search parameter was provided
     if not any([args.krs, args.nip, args.regon, args.name]):
         print("Error: At least one search parameter (--krs, --nip, --regon, --name) must be provided")
-        parser.print_help()
+        print(_USAGE)
         return
     
     # Create the KRS API client
-    api = KrsAPI()
+    api = get_krs_api()
     
     try:
         # Search for the company
@@ -89,24 +101,30 @@ def main():
                         print("\nGetting more details...")
                         krs = result.get("krs")
                         
-                        # Get entity details
-                        details = api.get_entity_details(krs)
+                        # Fetch all sections concurrently before prompting the user
+                        with ThreadPoolExecutor(max_workers=3) as executor:
+                            details_future = executor.submit(api.get_entity_details, krs)
+                            representatives_future = executor.submit(api.get_entity_representatives, krs)
+                            shareholders_future = executor.submit(api.get_entity_shareholders, krs)
+                            details = details_future.result()
+                            representatives = representatives_future.result()
+                            shareholders = shareholders_future.result()
+                        
+                        # Show entity details
                         print(f"\nDetails for {details.get('nazwa')}:")
                         print(json.dumps(details, indent=2, ensure_ascii=False))
                         
-                        # Get representatives
+                        # Show representatives
                         choice = input("\nDo you want to get representatives? (y/n): ")
                         if choice.lower() == "y":
-                            representatives = api.get_entity_representatives(krs)
                             reps_list = representatives.get("reprezentanci", [])
                             print(f"\nRepresentatives ({len(reps_list)}):")
                             for rep in reps_list:
                                 print(f"- {rep.get('imie')} {rep.get('nazwisko')}, {rep.get('funkcja')}")
                         
-                        # Get shareholders
+                        # Show shareholders
                         choice = input("\nDo you want to get shareholders? (y/n): ")
                         if choice.lower() == "y":
-                            shareholders = api.get_entity_shareholders(krs)
                             shareholders_list = shareholders.get("wspolnicy", [])
                             print(f"\nShareholders ({len(shareholders_list)}):")
                             for shareholder in shareholders_list:
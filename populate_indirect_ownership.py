@@ -8,18 +8,13 @@ This script populates indirect ownership relationships in the Neo4j database.
 """
 
 import os
-import sys
 import logging
-from pathlib import Path
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent
-sys.path.append(str(current_dir / "src"))
-
 # Import required modules
-from graph.neo4j_connection import Neo4jConnection
-from graph.indirect_ownership import IndirectOwnershipDiscovery
+from src.graph.neo4j_connection import Neo4jConnection
+from src.graph.data_model import DatabaseSchema
+from src.graph.indirect_ownership import IndirectOwnershipDiscovery
 
 # Set up logging
 logging.basicConfig(
@@ -41,6 +36,9 @@ def main():
     neo4j = Neo4jConnection()
     
     try:
+        # Make sure MERGE on identity properties is backed by unique constraints
+        DatabaseSchema.create_constraints_and_indexes(neo4j)
+        
         # Create the discovery service
         discovery_service = IndirectOwnershipDiscovery(neo4j)
         
@@ -64,23 +62,23 @@ def main():
         
         total_relationships = 0
         
+        # Discover indirect relationships for all companies in parallel
+        results = discovery_service.discover_many(companies_to_analyze, max_depth=3)
+        
         # Process each company
         for krs in companies_to_analyze:
             print(f"\nAnalyzing company with KRS: {krs}")
             
-            try:
-                # Discover indirect relationships for this company
-                stats = discovery_service.discover_indirect_relationships(krs, max_depth=3)
-                
-                # Print statistics
-                print(f"* Created {stats['upstream_relationships']} upstream indirect relationships")
-                print(f"* Created {stats['downstream_relationships']} downstream indirect relationships")
-                print(f"* Total: {stats['total_relationships']} indirect relationships")
-                
-                total_relationships += stats['total_relationships']
-                
-            except Exception as e:
-                logger.error(f"Error processing company {krs}: {e}")
+            stats = results.get(krs)
+            if stats is None:
+                continue
+            
+            # Print statistics
+            print(f"* Created {stats['upstream_relationships']} upstream indirect relationships")
+            print(f"* Created {stats['downstream_relationships']} downstream indirect relationships")
+            print(f"* Total: {stats['total_relationships']} indirect relationships")
+            
+            total_relationships += stats['total_relationships']
         
         print(f"\nProcess completed! Created a total of {total_relationships} indirect ownership relationships.")
         print("\nYou can now visualize the multi-level ownership network in Neo4j Browser.")
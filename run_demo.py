@@ -8,53 +8,72 @@ This script provides a demo of the KRS API client functionality.
 """
 
 import os
-import sys
 import json
-import argparse
-from pathlib import Path
+import sys
+import getopt
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent
-sys.path.append(str(current_dir))
-
 # Import required modules
-from src.krs_api import KrsAPI
+from src.krs_api import get_krs_api
 from src.mock.krs_mock_api import KrsMockAPI
 from src.krs_export import KrsExporter
 
 
+_USAGE = """usage: run_demo.py [-h] [--mock] [--krs KRS] [--output-dir OUTPUT_DIR]
+
+KRS API Demo
+
+options:
+  -h, --help            show this help message and exit
+  --mock                Use mock API instead of real API
+  --krs KRS             KRS number to query (default: 0000010078 - Cyfrowy Polsat)
+  --output-dir OUTPUT_DIR
+                        Directory for output files (default: 'output')"""
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Command line arguments without the program name
+        
+    Returns:
+        The parsed options as attributes
+    """
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "mock", "krs=", "output-dir="])
+    except getopt.GetoptError as e:
+        print(f"Error: {e}\n\n{_USAGE}")
+        sys.exit(2)
+    
+    args = SimpleNamespace(mock=False, krs="0000010078", output_dir="output")
+    for opt, value in opts:
+        if opt in ("-h", "--help"):
+            print(_USAGE)
+            sys.exit(0)
+        elif opt == "--mock":
+            args.mock = True
+        elif opt == "--krs":
+            args.krs = value
+        elif opt == "--output-dir":
+            args.output_dir = value
+    
+    return args
+
+
 def main():
     """Main function to run the demo."""
     # Load environment variables
     load_dotenv()
     
     # Parse command line arguments
-    parser = argparse.ArgumentParser(
-        description="KRS API Demo"
-    )
-    parser.add_argument(
-        "--mock", 
-        action="store_true",
-        help="Use mock API instead of real API"
-    )
-    parser.add_argument(
-        "--krs", 
-        type=str, 
-        default="0000010078",
-        help="KRS number to query (default: 0000010078 - Cyfrowy Polsat)"
-    )
-    parser.add_argument(
-        "--output-dir", 
-        type=str, 
-        default="output",
-        help="Directory for output files (default: 'output')"
-    )
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # Create the KRS API client
     print(f"\nInitializing {'Mock ' if args.mock else ''}KRS API client...")
-    api = KrsMockAPI() if args.mock else KrsAPI()
+    api = KrsMockAPI() if args.mock else get_krs_api()
     
     try:
         # Create output directory if it doesn't exist
@@ -12,17 +12,14 @@ import os
 import sys
 import time
 import logging
-import argparse
-from pathlib import Path
+import getopt
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent
-sys.path.append(str(current_dir / "src"))
-
 # Import required modules
-from graph.neo4j_connection import Neo4jConnection
-from graph.indirect_ownership import IndirectOwnershipDiscovery
+from src.graph.neo4j_connection import Neo4jConnection
+from src.graph.data_model import DatabaseSchema
+from src.graph.indirect_ownership import IndirectOwnershipDiscovery
 
 # Set up logging
 logging.basicConfig(
@@ -35,30 +32,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_USAGE = """usage: run_multi_level_analysis.py [-h] [--krs KRS] [--depth DEPTH] [--batch-size BATCH_SIZE] [--synthetic]
+
+Analyze multi-level ownership structures
+
+options:
+  -h, --help            show this help message and exit
+  --krs KRS             KRS number of the company to analyze (default: 0000010078 - Cyfrowy Polsat)
+  --depth DEPTH         Maximum depth for ownership analysis (default: 3)
+  --batch-size BATCH_SIZE
+                        Write indirect relationships in transactions of this many rows (default: KRS_BATCH_SIZE, else a single transaction)
+  --synthetic           Create synthetic test data before analysis"""
+
+
+def _int_option(opt, value):
+    """Convert an option value to an integer, exiting with usage on bad input."""
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Error: {opt} expects an integer, got {value!r}\n\n{_USAGE}")
+        sys.exit(2)
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Command line arguments without the program name
+        
+    Returns:
+        The parsed options as attributes
+    """
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "krs=", "depth=", "batch-size=", "synthetic"])
+    except getopt.GetoptError as e:
+        print(f"Error: {e}\n\n{_USAGE}")
+        sys.exit(2)
+    
+    args = SimpleNamespace(krs="0000010078", depth=3, batch_size=None, synthetic=False)
+    for opt, value in opts:
+        if opt in ("-h", "--help"):
+            print(_USAGE)
+            sys.exit(0)
+        elif opt == "--krs":
+            args.krs = value
+        elif opt == "--depth":
+            args.depth = _int_option(opt, value)
+        elif opt == "--batch-size":
+            args.batch_size = _int_option(opt, value)
+        elif opt == "--synthetic":
+            args.synthetic = True
+    
+    return args
+
+
 def main():
     """Main function to execute the multi-level ownership analysis."""
     # Parse command line arguments
-    parser = argparse.ArgumentParser(
-        description="Analyze multi-level ownership structures"
-    )
-    parser.add_argument(
-        "--krs", 
-        type=str, 
-        default="0000010078",
-        help="KRS number of the company to analyze (default: 0000010078 - Cyfrowy Polsat)"
-    )
-    parser.add_argument(
-        "--depth", 
-        type=int, 
-        default=3,
-        help="Maximum depth for ownership analysis (default: 3)"
-    )
-    parser.add_argument(
-        "--synthetic", 
-        action="store_true",
-        help="Create synthetic test data before analysis"
-    )
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
 
     # Load environment variables
     load_dotenv()
@@ -74,8 +106,11 @@ def main():
             
         print(f"\nConnected to Neo4j database at {neo4j.uri}")
         
+        # Make sure MERGE on identity properties is backed by unique constraints
+        DatabaseSchema.create_constraints_and_indexes(neo4j)
+        
         # Create the discovery service
-        discovery_service = IndirectOwnershipDiscovery(neo4j)
+        discovery_service = IndirectOwnershipDiscovery(neo4j, batch_size=args.batch_size)
         
         # Create synthetic test data if requested
         if args.synthetic:
@@ -9,44 +9,97 @@ This script runs the multi-level ownership visualization demo with sample data.
 
 import os
 import sys
+import getopt
 import logging
 import webbrowser
-from pathlib import Path
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-sys.path.append(str(Path(__file__).resolve().parent / "src"))
-
 # Import required modules
-from graph.neo4j_connection import Neo4jConnection
-from graph.indirect_ownership import IndirectOwnershipDiscovery
-from visualize_multi_level_ownership import discover_indirect_relationships, analyze_ownership_structure, generate_ownership_network_visualization
+from src.graph.neo4j_connection import get_neo4j_connection
+from src.graph.indirect_ownership import IndirectOwnershipDiscovery
+from visualize_multi_level_ownership import discover_and_analyze_ownership, generate_ownership_network_visualization
+
+# Separator line used around section titles
+BANNER = "=" * 80
+
+
+_USAGE = """usage: run_multi_level_visualization.py [-h] [--demo {1,2,3,4}] [--depth DEPTH]
+
+Run the multi-level ownership visualization demos
+
+options:
+  -h, --help         show this help message and exit
+  --demo {1,2,3,4}   Demo to run without prompting (default: prompt on a terminal,
+                     otherwise the KRS_DEMO environment variable or 1)
+  --depth DEPTH      Maximum depth for the analysis (default: 3)"""
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Command line arguments without the program name
+        
+    Returns:
+        The parsed options as attributes
+    """
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "demo=", "depth="])
+    except getopt.GetoptError as e:
+        print(f"Error: {e}\n\n{_USAGE}")
+        sys.exit(2)
+    
+    args = SimpleNamespace(demo=None, depth=3)
+    for opt, value in opts:
+        if opt in ("-h", "--help"):
+            print(_USAGE)
+            sys.exit(0)
+        elif opt == "--demo":
+            args.demo = value
+        elif opt == "--depth":
+            try:
+                args.depth = int(value)
+            except ValueError:
+                print(f"Error: option --depth: invalid int value: '{value}'\n\n{_USAGE}")
+                sys.exit(2)
+    
+    return args
 
 
 def setup_logging():
-    """Configure logging."""
+    """Configure logging (progress to the console, only warnings and errors to the log file)."""
+    file_handler = logging.FileHandler('multi_level_demo.log')
+    file_handler.setLevel(logging.WARNING)
+    
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(),
-            logging.FileHandler('multi_level_demo.log')
+            file_handler
         ]
     )
 
 
-def prepare_test_data():
+def _print_banner(title):
+    """Print a section title framed by banner lines."""
+    heading = f" {title} ".center(80, "=")
+    print(f"\n{BANNER}\n{heading}\n{BANNER}")
+
+
+def prepare_test_data(neo4j):
     """
     Prepare test data by ensuring synthetic test relationships exist.
     
+    Args:
+        neo4j: The Neo4j connection to use
+        
     Returns:
         bool: True if successful, False otherwise
     """
-    print("\n" + "=" * 80)
-    print(" Preparing Test Data ".center(80, "="))
-    print("=" * 80)
-    
-    neo4j = Neo4jConnection()
+    _print_banner("Preparing Test Data")
     
     try:
         # Check if we have synthetic test data
@@ -64,29 +117,25 @@ def prepare_test_data():
     except Exception as e:
         print(f"Error preparing test data: {e}")
         return False
-    finally:
-        neo4j.close()
 
 
-def run_cyfrowy_polsat_demo():
-    """
-    Run a demo using Cyfrowy Polsat data.
+def run_demo(neo4j, krs_number, title, max_depth=3):
     """
-    print("\n" + "=" * 80)
-    print(" Demo: Cyfrowy Polsat Multi-level Relationships ".center(80, "="))
-    print("=" * 80)
-    
-    krs_number = "0000010078"  # Cyfrowy Polsat KRS
-    max_depth = 3
+    Run the discovery, analysis and visualization demo for one company.
     
-    # Discover relationships
-    discover_indirect_relationships(krs_number, max_depth)
+    Args:
+        neo4j: The Neo4j connection to use
+        krs_number: The KRS number of the company
+        title: Title of the demo
+        max_depth: Maximum depth for the analysis (default: 3)
+    """
+    _print_banner(f"Demo: {title}")
     
-    # Analyze ownership
-    analyze_ownership_structure(krs_number, max_depth)
+    # Discover relationships and analyze ownership in one round-trip
+    discover_and_analyze_ownership(krs_number, max_depth, neo4j)
     
     # Generate visualization
-    html_file = generate_ownership_network_visualization(krs_number, max_depth)
+    html_file = generate_ownership_network_visualization(krs_number, max_depth, neo4j)
     
     # Show results
     if html_file:
@@ -101,55 +150,34 @@ def run_cyfrowy_polsat_demo():
             print(f"Could not open browser automatically: {e}")
 
 
-def run_test_data_demo():
-    """
-    Run a demo using synthetic test data.
-    """
-    print("\n" + "=" * 80)
-    print(" Demo: Synthetic Test Data Multi-level Relationships ".center(80, "="))
-    print("=" * 80)
-    
-    krs_number = "TEST001"  # Test company
-    max_depth = 3
-    
-    # Discover relationships
-    discover_indirect_relationships(krs_number, max_depth)
-    
-    # Analyze ownership
-    analyze_ownership_structure(krs_number, max_depth)
-    
-    # Generate visualization
-    html_file = generate_ownership_network_visualization(krs_number, max_depth)
-    
-    # Show results
-    if html_file:
-        print(f"\nVisualization generated: {html_file}")
-        print("Open this file in your browser to view the multi-level ownership network.")
-        
-        # Open the visualization in the default browser
-        try:
-            print("Opening visualization in default browser...")
-            webbrowser.open(f"file://{os.path.abspath(html_file)}")
-        except Exception as e:
-            print(f"Could not open browser automatically: {e}")
+def run_cyfrowy_polsat_demo(neo4j, max_depth=3):
+    """Run the demo using Cyfrowy Polsat data."""
+    run_demo(neo4j, "0000010078", "Cyfrowy Polsat Multi-level Relationships", max_depth)
 
 
-def compare_different_depths():
+def run_test_data_demo(neo4j, max_depth=3):
+    """Run the demo using synthetic test data."""
+    run_demo(neo4j, "TEST001", "Synthetic Test Data Multi-level Relationships", max_depth)
+
+
+def compare_different_depths(neo4j, max_depth=3):
     """
     Generate visualizations at different depths to compare.
+    
+    Args:
+        neo4j: The Neo4j connection to use
+        max_depth: The deepest level to visualize (default: 3)
     """
-    print("\n" + "=" * 80)
-    print(" Comparing Different Depth Levels ".center(80, "="))
-    print("=" * 80)
+    _print_banner("Comparing Different Depth Levels")
     
     krs_number = "0000010078"  # Cyfrowy Polsat KRS
     
     # Generate visualizations at different depths
     html_files = []
     
-    for depth in [1, 2, 3]:
+    for depth in range(1, max_depth + 1):
         print(f"\nGenerating visualization at depth {depth}...")
-        html_file = generate_ownership_network_visualization(krs_number, depth)
+        html_file = generate_ownership_network_visualization(krs_number, depth, neo4j)
         if html_file:
             html_files.append((depth, html_file))
     
@@ -163,45 +191,62 @@ def compare_different_depths():
         print("\nOpen these files in your browser to compare the different depth visualizations.")
 
 
+def run_all_demos(neo4j, max_depth=3):
+    """Run all demos one after another."""
+    run_cyfrowy_polsat_demo(neo4j, max_depth)
+    run_test_data_demo(neo4j, max_depth)
+    compare_different_depths(neo4j, max_depth)
+
+
+# Demo menu: choice -> (description, demo function)
+DEMOS = {
+    "1": ("Cyfrowy Polsat Demo (Real company data)", run_cyfrowy_polsat_demo),
+    "2": ("Synthetic Test Data Demo", run_test_data_demo),
+    "3": ("Compare Different Depth Levels", compare_different_depths),
+    "4": ("Run All Demos", run_all_demos)
+}
+
+
 def main():
     """Main function to run the demo."""
+    # Parse command line arguments
+    args = parse_args(sys.argv[1:])
+    
     # Set up logging
     setup_logging()
     
     # Load environment variables
     load_dotenv()
     
-    # Prepare test data
-    if not prepare_test_data():
-        print("Failed to prepare test data. Exiting.")
-        return
-    
-    # Run demos
-    print("\nChoose a demo to run:")
-    print("1. Cyfrowy Polsat Demo (Real company data)")
-    print("2. Synthetic Test Data Demo")
-    print("3. Compare Different Depth Levels")
-    print("4. Run All Demos")
-    
-    choice = input("\nEnter choice (1-4): ")
-    
-    if choice == "1":
-        run_cyfrowy_polsat_demo()
-    elif choice == "2":
-        run_test_data_demo()
-    elif choice == "3":
-        compare_different_depths()
-    elif choice == "4":
-        run_cyfrowy_polsat_demo()
-        run_test_data_demo()
-        compare_different_depths()
-    else:
-        print("Invalid choice. Exiting.")
-        return
-    
-    print("\n" + "=" * 80)
-    print(" Demo Completed ".center(80, "="))
-    print("=" * 80)
+    # Share one connection (and its connection pool) across all demo phases
+    with get_neo4j_connection() as neo4j:
+        # Warm up the connection pool and the discovery query plans
+        IndirectOwnershipDiscovery(neo4j).warmup(max_depths=(args.depth,))
+        
+        # Prepare test data
+        if not prepare_test_data(neo4j):
+            print("Failed to prepare test data. Exiting.")
+            return
+        
+        # Run demos, prompting only when attached to a terminal
+        choice = args.demo
+        if choice is None:
+            if sys.stdin.isatty():
+                print("\nChoose a demo to run:")
+                for key, (description, _) in DEMOS.items():
+                    print(f"{key}. {description}")
+                
+                choice = input("\nEnter choice (1-4): ")
+            else:
+                choice = os.getenv("KRS_DEMO", "1")
+        
+        if choice not in DEMOS:
+            print("Invalid choice. Exiting.")
+            return
+        
+        DEMOS[choice][1](neo4j, args.depth)
+    
+    _print_banner("Demo Completed")
     print("\nYou can view the generated HTML files in the 'output' directory.")
 
 
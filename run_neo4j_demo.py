@@ -8,17 +8,11 @@ This script demonstrates the Neo4j integration capabilities of the KRS API proje
 """
 
 import os
-import sys
 import logging
-from pathlib import Path
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent
-sys.path.append(str(current_dir / "src"))
-
 # Import required modules
-from src.graph.neo4j_connection import Neo4jConnection
+from src.graph.neo4j_connection import get_neo4j_connection
 from src.graph.data_model import DatabaseSchema
 
 # Set up logging
@@ -32,13 +26,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def read_graph_metadata(tx):
+    """
+    Read the node count, node labels and relationship types in one transaction.
+    
+    Args:
+        tx: The Neo4j transaction
+        
+    Returns:
+        A tuple of the node count, the labels and the relationship types
+    """
+    # An unfiltered count(n) is answered from the count store, not by scanning nodes
+    node_count = tx.run("MATCH (n) RETURN count(n) AS node_count").single()["node_count"]
+    labels = [record["label"] for record in tx.run("CALL db.labels() YIELD label RETURN label ORDER BY label")]
+    rel_types = [
+        record["relationshipType"]
+        for record in tx.run("CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType ORDER BY relationshipType")
+    ]
+    return node_count, labels, rel_types
+
 def main():
     """Main function to execute the Neo4j demo."""
     # Load environment variables
     load_dotenv()
     
     # Create Neo4j connection
-    neo4j = Neo4jConnection()
+    neo4j = get_neo4j_connection()
     
     try:
         # Test connection
@@ -55,25 +68,22 @@ def main():
         
         # Run a simple query to demonstrate functionality
         print("\nRunning a test query...")
-        result = neo4j.query("MATCH (n) RETURN count(n) AS node_count")
-        node_count = result[0]["node_count"] if result else 0
+        node_count, labels, rel_types = neo4j.execute_read_transaction(read_graph_metadata)
         print(f"Node count in database: {node_count}")
         
         # Show available node labels
         print("\nAvailable node labels:")
-        labels_result = neo4j.query("CALL db.labels() YIELD label RETURN label ORDER BY label")
-        if labels_result:
-            for item in labels_result:
-                print(f"- {item['label']}")
+        if labels:
+            for label in labels:
+                print(f"- {label}")
         else:
             print("No labels found")
             
         # Show available relationship types
         print("\nAvailable relationship types:")
-        rel_result = neo4j.query("CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType ORDER BY relationshipType")
-        if rel_result:
-            for item in rel_result:
-                print(f"- {item['relationshipType']}")
+        if rel_types:
+            for rel_type in rel_types:
+                print(f"- {rel_type}")
         else:
             print("No relationship types found")
         
@@ -0,0 +1 @@
+# KRS package initialization
@@ -7,21 +7,32 @@ Neo4j Data Model
 This module defines the data model for the KRS graph database.
 """
 
+from enum import Enum
+
+
+class _StrEnum(str, Enum):
+    """String enum whose members format as their plain value (like enum.StrEnum in Python 3.11+)."""
+    
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
 # Node labels
-class NodeLabels:
+class NodeLabels(_StrEnum):
     COMPANY = "Company"
     PERSON = "Person"
     SHAREHOLDER = "Shareholder"
+    GRAPH_META = "GraphMeta"
 
 # Relationship types
-class RelationshipTypes:
+class RelationshipTypes(_StrEnum):
     MANAGES = "MANAGES"
     OWNS_SHARES_IN = "OWNS_SHARES_IN"
     SUBSIDIARY_OF = "SUBSIDIARY_OF"
     AFFILIATED_WITH = "AFFILIATED_WITH"
 
 # Property keys for nodes
-class NodeProperties:
+class NodeProperties(_StrEnum):
     # Common properties
     ID = "id"
     NAME = "name"
@@ -45,7 +56,7 @@ class NodeProperties:
     SHAREHOLDER_TYPE = "shareholder_type"  # Individual, Company, Organization
 
 # Property keys for relationships
-class RelationshipProperties:
+class RelationshipProperties(_StrEnum):
     # MANAGES relationship properties
     ROLE = "role"
     START_DATE = "start_date"
@@ -63,13 +74,24 @@ class RelationshipProperties:
     SOURCE = "source"
 
 # Entity types
-class EntityTypes:
+class EntityTypes(_StrEnum):
     COMPANY = "company"
     INDIVIDUAL = "individual"
     ORGANIZATION = "organization"
 
+# Singleton node recording when the direct ownership relationships last changed
+class GraphMeta:
+    ID = "ownership"
+    CHANGED_AT = "ownership_changed_at"
+    
+    # Run in every transaction that creates, updates or deletes OWNS_SHARES_IN relationships
+    TOUCH = f"MERGE (m:{NodeLabels.GRAPH_META} {{{NodeProperties.ID}: '{ID}'}}) SET m.{CHANGED_AT} = datetime()"
+
 # Constraint and index queries
 class DatabaseSchema:
+    # Names of the uniqueness constraints backing MERGE on identity properties
+    CONSTRAINT_NAMES = ["company_krs", "person_id", "shareholder_id"]
+    
     # Node constraints
     CONSTRAINTS = [
         f"CREATE CONSTRAINT company_krs IF NOT EXISTS FOR (c:{NodeLabels.COMPANY}) REQUIRE c.{NodeProperties.KRS} IS UNIQUE",
@@ -83,7 +105,8 @@ class DatabaseSchema:
         f"CREATE INDEX company_regon IF NOT EXISTS FOR (c:{NodeLabels.COMPANY}) ON (c.{NodeProperties.REGON})",
         f"CREATE INDEX company_name IF NOT EXISTS FOR (c:{NodeLabels.COMPANY}) ON (c.{NodeProperties.NAME})",
         f"CREATE INDEX person_name IF NOT EXISTS FOR (p:{NodeLabels.PERSON}) ON (p.{NodeProperties.LAST_NAME}, p.{NodeProperties.FIRST_NAME})",
-        f"CREATE INDEX shareholder_name IF NOT EXISTS FOR (s:{NodeLabels.SHAREHOLDER}) ON (s.{NodeProperties.NAME})"
+        f"CREATE INDEX shareholder_name IF NOT EXISTS FOR (s:{NodeLabels.SHAREHOLDER}) ON (s.{NodeProperties.NAME})",
+        f"CREATE INDEX ownership_percentage IF NOT EXISTS FOR ()-[r:{RelationshipTypes.OWNS_SHARES_IN}]-() ON (r.{RelationshipProperties.PERCENTAGE})"
     ]
     
     @staticmethod
@@ -94,8 +117,21 @@ class DatabaseSchema:
         Args:
             neo4j_connection: A Neo4jConnection instance
         """
-        for constraint in DatabaseSchema.CONSTRAINTS:
-            neo4j_connection.query(constraint)
+        neo4j_connection.run_batch(DatabaseSchema.CONSTRAINTS + DatabaseSchema.INDEXES)
+    
+    @staticmethod
+    def get_missing_constraints(neo4j_connection):
+        """
+        Check which of the expected uniqueness constraints are missing.
         
-        for index in DatabaseSchema.INDEXES:
-            neo4j_connection.query(index)
\ No newline at end of file
+        Args:
+            neo4j_connection: A Neo4jConnection instance
+            
+        Returns:
+            A list of names of the constraints that do not exist
+        """
+        existing = {
+            record["name"]
+            for record in neo4j_connection.query_stream("SHOW CONSTRAINTS YIELD name RETURN name")
+        }
+        return [name for name in DatabaseSchema.CONSTRAINT_NAMES if name not in existing]
@@ -8,31 +8,717 @@ This module provides functionality for discovering and importing indirect owners
 relationships into Neo4j.
 """
 
+import time
 import logging
-from typing import Dict, List, Any, Optional, Union, Set
-from .neo4j_connection import Neo4jConnection
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Union, Set, Tuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .neo4j_connection import Neo4jConnection, AsyncNeo4jConnection
 from .data_model import (
     NodeLabels, RelationshipTypes, 
-    NodeProperties, RelationshipProperties
+    NodeProperties, RelationshipProperties, DatabaseSchema, GraphMeta
 )
 
 
+@lru_cache(maxsize=8)
+def _upstream_paths_query(max_depth: int) -> str:
+    """
+    Build the query matching upstream (owners of owners) ownership paths.
+    
+    The query ends with the indirect owner, the company and the effective
+    ownership percentage, summed over all paths between them, bound as variables.
+    The company is matched on its own before the paths are expanded, so the
+    planner starts from it (through the company_krs index when it exists).
+    
+    Args:
+        max_depth: Maximum depth for relationship discovery
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""
+    // Seek the company first, then expand the ownership paths leading to it up to depth {max_depth}
+    MATCH (target:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    WITH target
+    MATCH path = (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}*2..{max_depth}]->(target)
+    
+    // Extract nodes and relationships along the path
+    WITH path, nodes(path) AS nodes, relationships(path) AS rels
+    
+    // Calculate the effective ownership percentage
+    WITH 
+        nodes[0] AS indirect_owner, 
+        nodes[-1] AS company,
+        [rel IN rels | coalesce(rel.{RelationshipProperties.PERCENTAGE}, 100.0) / 100.0] AS fractions
+    WITH indirect_owner, company, reduce(s = 1.0, f IN fractions | s * f) * 100 AS effective_percentage
+    
+    // Sum the stakes held through different chains, so each pair is merged once
+    WITH indirect_owner, company, sum(effective_percentage) AS effective_percentage
+    """
+
+
+# Upstream paths via APOC: the expansion starts at the company and walks inbound
+# breadth-first, yielding every cycle-free path (NODE_PATH uniqueness) so each ownership
+# chain contributes to the owner's stake; the depth is a parameter so the plan is shared
+# between depths
+_UPSTREAM_PATHS_APOC = f"""
+    // Expand backwards from the company over ownership relationships
+    MATCH (company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    CALL apoc.path.expandConfig(company, {{
+        relationshipFilter: "<{RelationshipTypes.OWNS_SHARES_IN}",
+        minLevel: 2,
+        maxLevel: $max_depth,
+        bfs: true,
+        uniqueness: "NODE_PATH"
+    }}) YIELD path
+    
+    // Calculate the effective ownership percentage
+    WITH 
+        last(nodes(path)) AS indirect_owner, 
+        company,
+        [rel IN relationships(path) | coalesce(rel.{RelationshipProperties.PERCENTAGE}, 100.0) / 100.0] AS fractions
+    WITH indirect_owner, company, reduce(s = 1.0, f IN fractions | s * f) * 100 AS effective_percentage
+    
+    // Sum the stakes held through different chains, so each pair is merged once
+    WITH indirect_owner, company, sum(effective_percentage) AS effective_percentage
+    """
+
+# Checks whether the APOC path expander is installed
+_APOC_EXPAND_AVAILABLE = """
+SHOW PROCEDURES YIELD name
+WHERE name = 'apoc.path.expandConfig'
+RETURN count(*) > 0 AS available
+"""
+
+_UPSTREAM_MERGE = f"""
+    // Create indirect relationship (if it doesn't exist)
+    MERGE (indirect_owner)-[r:INDIRECT_OWNER_OF]->(company)
+    ON CREATE SET 
+        r.{RelationshipProperties.PERCENTAGE} = effective_percentage,
+        r.{RelationshipProperties.SOURCE} = 'derived',
+        r.created_at = datetime()
+    ON MATCH SET 
+        r.{RelationshipProperties.PERCENTAGE} = effective_percentage,
+        r.updated_at = datetime()
+    """
+
+# Counts the merged relationships from the list is_company, holding per relationship
+# whether the linked entity is a company (the others are shareholders)
+_LINKED_COUNTS = """
+    RETURN 
+        size(is_company) AS relationships_created,
+        size([linked IN is_company WHERE linked]) AS companies_linked,
+        size([linked IN is_company WHERE NOT linked]) AS shareholders_linked
+    """
+
+_UPSTREAM_STATS = f"""
+    // Return statistics (one label check per relationship)
+    WITH collect(indirect_owner:{NodeLabels.COMPANY}) AS is_company
+    """ + _LINKED_COUNTS
+
+@lru_cache(maxsize=8)
+def _upstream_percentages_query(max_depth: int) -> str:
+    """
+    Build the query returning the raw upstream ownership paths.
+    
+    Each row holds the element ids of the indirect owner and the company and the
+    list of ownership percentages along the path, for a client-side reduction.
+    
+    Args:
+        max_depth: Maximum depth for relationship discovery
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""
+    MATCH (target:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    WITH target
+    MATCH path = (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}*2..{max_depth}]->(target)
+    RETURN elementId(owner) AS owner_id,
+           elementId(target) AS company_id,
+           [rel IN r | rel.{RelationshipProperties.PERCENTAGE}] AS percentages
+    """
+
+
+# Writes client-side computed upstream relationships
+_UPSTREAM_MERGE_ROWS = """
+    UNWIND $rows AS row
+    MATCH (indirect_owner) WHERE elementId(indirect_owner) = row.owner_id
+    MATCH (company) WHERE elementId(company) = row.company_id
+    WITH indirect_owner, company, row.effective_percentage AS effective_percentage
+    """ + _UPSTREAM_MERGE + _UPSTREAM_STATS
+
+# Statistics of the stored indirect relationships of a company, for materialized results
+_UPSTREAM_EXISTING = f"""
+    MATCH (indirect_owner)-[r:INDIRECT_OWNER_OF]->(company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    """ + _UPSTREAM_STATS
+
+
+@lru_cache(maxsize=8)
+def _downstream_paths_query(max_depth: int) -> str:
+    """
+    Build the query matching downstream (subsidiaries of subsidiaries) ownership paths.
+    
+    The query ends with the company, the indirect subsidiary and the effective
+    ownership percentage, summed over all paths between them, bound as variables.
+    The company is matched on its own before the paths are expanded, so the
+    planner starts from it (through the company_krs index when it exists).
+    
+    Args:
+        max_depth: Maximum depth for relationship discovery
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""
+    // Seek the company first, then expand the ownership paths starting from it up to depth {max_depth}
+    MATCH (source:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    WITH source
+    MATCH path = (source)-[r:{RelationshipTypes.OWNS_SHARES_IN}*2..{max_depth}]->(target)
+    
+    // Skip subsidiaries held directly before computing any percentages
+    WHERE NOT EXISTS {{ (source)-[:{RelationshipTypes.OWNS_SHARES_IN}]->(target) }}
+    
+    // Extract the nodes and relationships
+    WITH path, nodes(path) AS nodes, relationships(path) AS rels
+    
+    // Calculate the effective ownership percentage
+    WITH 
+        nodes[0] AS company, 
+        nodes[-1] AS indirect_subsidiary,
+        [rel IN rels | coalesce(rel.{RelationshipProperties.PERCENTAGE}, 100.0) / 100.0] AS fractions
+    WITH company, indirect_subsidiary, reduce(s = 1.0, f IN fractions | s * f) * 100 AS effective_percentage
+    
+    // Sum the stakes held through different chains, so each pair is merged once
+    WITH company, indirect_subsidiary, sum(effective_percentage) AS effective_percentage
+    """
+
+
+# Downstream paths via APOC, parameterized on the depth like _UPSTREAM_PATHS_APOC
+_DOWNSTREAM_PATHS_APOC = f"""
+    // Expand forwards from the company over ownership relationships
+    MATCH (company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    CALL apoc.path.expandConfig(company, {{
+        relationshipFilter: "{RelationshipTypes.OWNS_SHARES_IN}>",
+        minLevel: 2,
+        maxLevel: $max_depth,
+        bfs: true,
+        uniqueness: "NODE_PATH"
+    }}) YIELD path
+    
+    // Skip subsidiaries held directly before computing any percentages
+    WITH company, path, last(nodes(path)) AS indirect_subsidiary
+    WHERE NOT EXISTS {{ (company)-[:{RelationshipTypes.OWNS_SHARES_IN}]->(indirect_subsidiary) }}
+    
+    // Calculate the effective ownership percentage
+    WITH 
+        company,
+        indirect_subsidiary, 
+        [rel IN relationships(path) | coalesce(rel.{RelationshipProperties.PERCENTAGE}, 100.0) / 100.0] AS fractions
+    WITH company, indirect_subsidiary, reduce(s = 1.0, f IN fractions | s * f) * 100 AS effective_percentage
+    
+    // Sum the stakes held through different chains, so each pair is merged once
+    WITH company, indirect_subsidiary, sum(effective_percentage) AS effective_percentage
+    """
+
+_DOWNSTREAM_MERGE = f"""
+    // Create indirect relationship (if it doesn't exist)
+    MERGE (company)-[r:CONTROLS_INDIRECTLY]->(indirect_subsidiary)
+    ON CREATE SET 
+        r.{RelationshipProperties.PERCENTAGE} = effective_percentage,
+        r.{RelationshipProperties.SOURCE} = 'derived',
+        r.created_at = datetime()
+    ON MATCH SET 
+        r.{RelationshipProperties.PERCENTAGE} = effective_percentage,
+        r.updated_at = datetime()
+    """
+
+_DOWNSTREAM_STATS = f"""
+    // Return statistics (one label check per relationship)
+    WITH collect(indirect_subsidiary:{NodeLabels.COMPANY}) AS is_company
+    """ + _LINKED_COUNTS
+
+_DOWNSTREAM_EXISTING = f"""
+    MATCH (company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})-[r:CONTROLS_INDIRECTLY]->(indirect_subsidiary)
+    """ + _DOWNSTREAM_STATS
+
+# Whether both directions were materialized for the company at this depth after the direct
+# ownership relationships last changed; the current time stamps a recomputation started now
+_MATERIALIZED_FRESH = f"""
+    MATCH (company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    OPTIONAL MATCH (meta:{NodeLabels.GRAPH_META} {{{NodeProperties.ID}: '{GraphMeta.ID}'}})
+    RETURN coalesce(
+               company.upstream_max_depth = $max_depth AND company.downstream_max_depth = $max_depth
+               AND company.upstream_computed_at > meta.{GraphMeta.CHANGED_AT}
+               AND company.downstream_computed_at > meta.{GraphMeta.CHANGED_AT},
+               false
+           ) AS fresh,
+           datetime() AS checked_at
+    """
+
+# Records when and to which depth one direction was materialized for the company
+_MATERIALIZED_STAMP = f"""
+    MATCH (company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    SET company[$direction + '_computed_at'] = $computed_at,
+        company[$direction + '_max_depth'] = $max_depth
+    """
+
+
+def _in_transactions(paths_query: str, merge_query: str, variables: str, linked: str) -> str:
+    """
+    Wrap a MERGE statement so it commits in batches of $batch_size rows.
+    
+    The resulting query has to run in an auto-commit transaction. It returns the
+    same statistics as the single-transaction query, counted over the merged rows.
+    
+    Args:
+        paths_query: Query binding the endpoints and the effective percentage
+        merge_query: Query creating the indirect relationship for one row
+        variables: The variables the MERGE statement imports from the paths query
+        linked: The variable holding the linked entity counted in the statistics
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""{paths_query}
+    CALL {{
+        WITH {variables}
+        {merge_query}
+        RETURN {linked}:{NodeLabels.COMPANY} AS linked_company
+    }} IN TRANSACTIONS OF $batch_size ROWS
+    WITH collect(linked_company) AS is_company
+    """ + _LINKED_COUNTS
+
+
+@lru_cache(maxsize=8)
+def _upstream_query(max_depth: int) -> str:
+    """
+    Build the query creating upstream (owners of owners) indirect relationships.
+    
+    Args:
+        max_depth: Maximum depth for relationship discovery
+        
+    Returns:
+        The Cypher query string
+    """
+    return _upstream_paths_query(max_depth) + _UPSTREAM_MERGE + _UPSTREAM_STATS
+
+
+@lru_cache(maxsize=8)
+def _downstream_query(max_depth: int) -> str:
+    """
+    Build the query creating downstream (subsidiaries of subsidiaries) indirect relationships.
+    
+    Args:
+        max_depth: Maximum depth for relationship discovery
+        
+    Returns:
+        The Cypher query string
+    """
+    return _downstream_paths_query(max_depth) + _DOWNSTREAM_MERGE + _DOWNSTREAM_STATS
+
+
+def _combine_stats(upstream_stats: Dict, downstream_stats: Dict) -> Dict:
+    """
+    Combine upstream and downstream statistics into discovery statistics.
+    
+    Args:
+        upstream_stats: Statistics about the upstream relationships
+        downstream_stats: Statistics about the downstream relationships
+        
+    Returns:
+        Statistics about the discovered relationships
+    """
+    return {
+        "upstream_relationships": upstream_stats["relationships_created"],
+        "downstream_relationships": downstream_stats["relationships_created"],
+        "total_relationships": upstream_stats["relationships_created"] + downstream_stats["relationships_created"],
+        "companies_linked": upstream_stats["companies_linked"] + downstream_stats["companies_linked"],
+        "shareholders_linked": upstream_stats["shareholders_linked"] + downstream_stats["shareholders_linked"]
+    }
+
+
+# Ownership analysis of a single company; the company name comes with the direct
+# owners, so a company without owners still returns one row.
+_DIRECT_OWNERS_QUERY = f"""
+    MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    OPTIONAL MATCH (shareholder)-[r:{RelationshipTypes.OWNS_SHARES_IN}]->(c)
+    WITH c, shareholder, r
+    ORDER BY r.{RelationshipProperties.PERCENTAGE} DESC
+    RETURN c.{NodeProperties.NAME} AS company_name,
+           collect(CASE WHEN shareholder IS NOT NULL THEN {{
+               name: shareholder.{NodeProperties.NAME},
+               percentage: r.{RelationshipProperties.PERCENTAGE}
+           }} END) AS direct_owners
+    """
+
+_INDIRECT_OWNERS_QUERY = f"""
+    MATCH (shareholder)-[r:INDIRECT_OWNER_OF]->(c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    RETURN shareholder.{NodeProperties.NAME} AS name, 
+           r.{RelationshipProperties.PERCENTAGE} AS effective_percentage
+    ORDER BY effective_percentage DESC
+    """
+
+
+@lru_cache(maxsize=8)
+def _ownership_chains_query(max_depth: int) -> str:
+    """
+    Build the query listing the strongest ownership chains from ultimate owners to a company.
+    
+    Args:
+        max_depth: Maximum length of the chains
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""
+    MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    WITH c
+    MATCH path = (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}*1..{max_depth}]->(c)
+    WHERE NOT (owner)<-[:{RelationshipTypes.OWNS_SHARES_IN}]-()
+    WITH owner, path, relationships(path) AS rels, [rel IN relationships(path) | coalesce(rel.{RelationshipProperties.PERCENTAGE}, 100.0) / 100.0] AS fractions
+    WITH owner, path, rels, reduce(s = 1.0, f IN fractions | s * f) * 100 AS effective_percentage
+    WHERE effective_percentage >= 0.1
+    RETURN owner.{NodeProperties.NAME} AS ultimate_owner,
+           [node IN nodes(path) | node.{NodeProperties.NAME}] AS ownership_chain,
+           [rel IN rels | rel.{RelationshipProperties.PERCENTAGE}] AS percentages,
+           effective_percentage
+    ORDER BY effective_percentage DESC
+    LIMIT $limit
+    """
+
+
+@lru_cache(maxsize=8)
+def _ownership_chain_paths_query(max_depth: int) -> str:
+    """
+    Build the query returning the raw ownership chains to a company.
+    
+    Each row holds the ultimate owner, the names along the chain and its list of
+    ownership percentages, for a client-side reduction.
+    
+    Args:
+        max_depth: Maximum length of the chains
+        
+    Returns:
+        The Cypher query string
+    """
+    return f"""
+    MATCH (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
+    WITH c
+    MATCH path = (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}*1..{max_depth}]->(c)
+    WHERE NOT (owner)<-[:{RelationshipTypes.OWNS_SHARES_IN}]-()
+    RETURN owner.{NodeProperties.NAME} AS ultimate_owner,
+           [node IN nodes(path) | node.{NodeProperties.NAME}] AS ownership_chain,
+           [rel IN r | rel.{RelationshipProperties.PERCENTAGE}] AS percentages
+    """
+
+
+def analyze_ownership(tx, krs_number: str, max_depth: int, chain_limit: int = 200,
+                      reduce_client_side: bool = False) -> Dict:
+    """
+    Collect the direct owners, indirect owners and ownership chains of a company.
+    
+    Args:
+        tx: The Neo4j transaction
+        krs_number: The KRS number of the company
+        max_depth: Maximum length of the ownership chains
+        chain_limit: Maximum number of ownership chains, strongest first (default: 200)
+        reduce_client_side: Fetch every chain and compute, filter and rank the effective
+            percentages with NumPy instead of in the database; ignored without NumPy
+            (default: False)
+        
+    Returns:
+        The company name and lists of direct owners, indirect owners and chains
+    """
+    parameters = {"krs": krs_number}
+    
+    company = tx.run(_DIRECT_OWNERS_QUERY, parameters).single()
+    
+    if reduce_client_side and np is not None:
+        chains = _strongest_chains(tx.run(_ownership_chain_paths_query(max_depth), parameters).data(), chain_limit)
+    else:
+        chains = [
+            record.data() for record in tx.run(_ownership_chains_query(max_depth), {**parameters, "limit": chain_limit})
+        ]
+    
+    return {
+        "company_name": company["company_name"] if company else krs_number,
+        "direct_owners": company["direct_owners"] if company else [],
+        "indirect_owners": [record.data() for record in tx.run(_INDIRECT_OWNERS_QUERY, parameters)],
+        "chains": chains
+    }
+
+
+def _strongest_chains(chains: List[Dict], chain_limit: int) -> List[Dict]:
+    """
+    Rank raw ownership chains by their effective percentage with NumPy.
+    
+    Chains below 0.1% are dropped, as in the database-side query.
+    
+    Args:
+        chains: The raw chains returned by the chain paths query
+        chain_limit: Maximum number of chains to keep
+        
+    Returns:
+        The strongest chains with their effective percentage, strongest first
+    """
+    effective = np.asarray(_effective_percentages([chain["percentages"] for chain in chains]))
+    kept = np.flatnonzero(effective >= 0.1)
+    order = kept[np.argsort(-effective[kept], kind="stable")][:chain_limit]
+    return [{**chains[i], "effective_percentage": float(effective[i])} for i in order]
+
+
+def _effective_percentages(percentage_lists: List[List[Optional[float]]]) -> List[float]:
+    """
+    Compute the effective ownership percentage of each path with NumPy.
+    
+    The jagged percentage lists are padded with NaN into one matrix; missing
+    percentages and padding count as full ownership.
+    
+    Args:
+        percentage_lists: The ownership percentages along each path
+        
+    Returns:
+        The effective ownership percentage of each path
+    """
+    width = max((len(percentages) for percentages in percentage_lists), default=0)
+    matrix = np.full((len(percentage_lists), width), np.nan)
+    for i, percentages in enumerate(percentage_lists):
+        matrix[i, :len(percentages)] = [np.nan if p is None else p for p in percentages]
+    
+    fractions = np.where(np.isnan(matrix), 1.0, matrix / 100.0)
+    return (np.prod(fractions, axis=1) * 100).tolist()
+
+
+# Keys of the per-direction discovery statistics, in the order the discovery queries return them
+_STAT_KEYS = ("relationships_created", "companies_linked", "shareholders_linked")
+_stat_values = itemgetter(*_STAT_KEYS)
+
+
+def _relationship_stats(record) -> Dict:
+    """
+    Extract relationship statistics from a discovery result record.
+    
+    Args:
+        record: The record returned by a discovery query, or None
+        
+    Returns:
+        Statistics about the discovered relationships
+    """
+    if not record:
+        return dict.fromkeys(_STAT_KEYS, 0)
+    return dict(zip(_STAT_KEYS, _stat_values(record)))
+
+
+# Synthetic multi-level ownership structure used to demonstrate the discovery
+def _synthetic_companies(count: int) -> List[Dict]:
+    """
+    Build the synthetic company rows TEST001, TEST002, ...
+    
+    Args:
+        count: Number of companies
+        
+    Returns:
+        Company rows with krs, name and status
+    """
+    return [
+        {"krs": f"TEST{i:03d}", "name": f"Test Company {i}", "status": "Active"}
+        for i in range(1, count + 1)
+    ]
+
+
+_SYNTHETIC_SHAREHOLDERS = [
+    {"id": "shareholder_test1", "name": "Test Shareholder 1", "type": "company"},
+    {"id": "shareholder_test2", "name": "Test Shareholder 2", "type": "company"},
+    {"id": "shareholder_test3", "name": "Test Shareholder 3", "type": "individual"}
+]
+
+# Owners and owned entities are referenced by company KRS number or shareholder ID;
+# the last row links the test chain to Cyfrowy Polsat and is skipped if it is not in the graph
+_SYNTHETIC_OWNERSHIP = [
+    {"src": "shareholder_test1", "dst": "TEST001", "pct": 75.0},
+    {"src": "shareholder_test2", "dst": "shareholder_test1", "pct": 60.0},
+    {"src": "shareholder_test3", "dst": "shareholder_test2", "pct": 80.0},
+    {"src": "TEST001", "dst": "TEST002", "pct": 51.0},
+    {"src": "TEST002", "dst": "TEST003", "pct": 70.0},
+    {"src": "TEST001", "dst": "TEST004", "pct": 30.0},
+    {"src": "TEST004", "dst": "TEST005", "pct": 25.0},
+    {"src": "TEST001", "dst": "0000010078", "pct": 15.0}
+]
+
+
+def _synthetic_ownership(company_count: int) -> List[Dict]:
+    """
+    Build the synthetic ownership rows for a number of test companies.
+    
+    Companies beyond the fifth extend the TEST004 -> TEST005 branch into a longer chain.
+    
+    Args:
+        company_count: Number of synthetic companies
+        
+    Returns:
+        Ownership rows with src, dst and pct
+    """
+    return _SYNTHETIC_OWNERSHIP + [
+        {"src": f"TEST{i - 1:03d}", "dst": f"TEST{i:03d}", "pct": 50.0}
+        for i in range(6, company_count + 1)
+    ]
+
+
+# Each node is looked up through its label's uniqueness constraint instead of scanning all nodes
+_SYNTHETIC_CLEANUP = f"""
+    CALL {{
+        MATCH (c:{NodeLabels.COMPANY}) WHERE c.{NodeProperties.KRS} IN $krs_numbers
+        DETACH DELETE c
+    }}
+    CALL {{
+        MATCH (s:{NodeLabels.SHAREHOLDER}) WHERE s.{NodeProperties.ID} IN $shareholder_ids
+        DETACH DELETE s
+    }}
+    """
+
+# Per-row writes of the synthetic data and the variable counted for their statistics
+_SYNTHETIC_COMPANY_CREATE = (f"""
+        CREATE (c:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: row.krs, {NodeProperties.NAME}: row.name, {NodeProperties.STATUS}: row.status}})
+    """, "c")
+
+_SYNTHETIC_SHAREHOLDER_CREATE = (f"""
+        CREATE (s:{NodeLabels.SHAREHOLDER} {{{NodeProperties.ID}: row.id, {NodeProperties.NAME}: row.name, {NodeProperties.SHAREHOLDER_TYPE}: row.type}})
+    """, "s")
+
+_SYNTHETIC_OWNERSHIP_MERGE = (f"""
+        OPTIONAL MATCH (src_company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: row.src}})
+        OPTIONAL MATCH (src_shareholder:{NodeLabels.SHAREHOLDER} {{{NodeProperties.ID}: row.src}})
+        OPTIONAL MATCH (dst_company:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: row.dst}})
+        OPTIONAL MATCH (dst_shareholder:{NodeLabels.SHAREHOLDER} {{{NodeProperties.ID}: row.dst}})
+        WITH row, coalesce(src_company, src_shareholder) AS owner, coalesce(dst_company, dst_shareholder) AS owned
+        WHERE owner IS NOT NULL AND owned IS NOT NULL
+        MERGE (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}]->(owned)
+        SET r.{RelationshipProperties.PERCENTAGE} = row.pct
+    """, "r")
+
+
+def _unwind_rows(write: Tuple[str, str], stat: str) -> str:
+    """
+    Build a query applying a per-row write to every row in $rows.
+    
+    Args:
+        write: The per-row Cypher and the variable counted for the statistics
+        stat: Name of the returned count
+        
+    Returns:
+        The Cypher query string
+    """
+    body, counted = write
+    return f"""
+    UNWIND $rows AS row
+    {body}
+    RETURN count({counted}) AS {stat}
+    """
+
+
+def _unwind_rows_in_transactions(write: Tuple[str, str], stat: str) -> str:
+    """
+    Build a query applying a per-row write to every row in $rows, committing every $batch_size rows.
+    
+    The resulting query has to run in an auto-commit transaction.
+    
+    Args:
+        write: The per-row Cypher and the variable counted for the statistics
+        stat: Name of the returned count
+        
+    Returns:
+        The Cypher query string
+    """
+    body, counted = write
+    return f"""
+    UNWIND $rows AS row
+    CALL {{
+        WITH row
+        {body}
+        RETURN count({counted}) AS written
+    }} IN TRANSACTIONS OF $batch_size ROWS
+    RETURN sum(written) AS {stat}
+    """
+
+
+_SYNTHETIC_COMPANIES_QUERY = _unwind_rows(_SYNTHETIC_COMPANY_CREATE, "companies_created")
+_SYNTHETIC_SHAREHOLDERS_QUERY = _unwind_rows(_SYNTHETIC_SHAREHOLDER_CREATE, "shareholders_created")
+_SYNTHETIC_OWNERSHIP_QUERY = _unwind_rows(_SYNTHETIC_OWNERSHIP_MERGE, "relationships_created")
+
+# Batched variants for large synthetic data sets, in the order they have to run
+_SYNTHETIC_BATCHED_QUERIES = [
+    ("companies_created", _unwind_rows_in_transactions(_SYNTHETIC_COMPANY_CREATE, "companies_created")),
+    ("shareholders_created", _unwind_rows_in_transactions(_SYNTHETIC_SHAREHOLDER_CREATE, "shareholders_created")),
+    ("relationships_created", _unwind_rows_in_transactions(_SYNTHETIC_OWNERSHIP_MERGE, "relationships_created"))
+]
+
+
+def _create_synthetic_data(tx, companies: List[Dict], shareholders: List[Dict], ownership: List[Dict]) -> Dict:
+    """
+    Replace the synthetic companies, shareholders and ownership relationships in one transaction.
+    
+    Nodes left over from an earlier run are deleted first, so a failure leaves the
+    previous test data untouched.
+    
+    Args:
+        tx: The Neo4j transaction
+        companies: Company rows with krs, name and status
+        shareholders: Shareholder rows with id, name and type
+        ownership: Ownership rows with src, dst and pct
+        
+    Returns:
+        Statistics about the created test data
+    """
+    tx.run(_SYNTHETIC_CLEANUP,
+           krs_numbers=[company["krs"] for company in companies],
+           shareholder_ids=[shareholder["id"] for shareholder in shareholders]).consume()
+    
+    stats = {
+        "companies_created": tx.run(_SYNTHETIC_COMPANIES_QUERY, rows=companies).single()["companies_created"],
+        "shareholders_created": tx.run(_SYNTHETIC_SHAREHOLDERS_QUERY, rows=shareholders).single()["shareholders_created"],
+        "relationships_created": tx.run(_SYNTHETIC_OWNERSHIP_QUERY, rows=ownership).single()["relationships_created"]
+    }
+    tx.run(GraphMeta.TOUCH).consume()
+    
+    return stats
+
+
 class IndirectOwnershipDiscovery:
     """
     Service for discovering and importing indirect ownership relationships.
     """
 
-    def __init__(self, neo4j_connection: Neo4jConnection):
+    # Discovery results shared by all instances, keyed by database, seed company and depth
+    _result_cache: Dict[tuple, tuple] = {}
+    
+    # Seconds a cached discovery result stays valid
+    CACHE_TTL = 300
+
+    def __init__(self, neo4j_connection: Neo4jConnection, batch_size: Optional[int] = None):
         """
         Initialize the Indirect Ownership Discovery service.
         
         Args:
             neo4j_connection: A Neo4jConnection instance
+            batch_size: If set, indirect relationships are written in batches of this size
+                with CALL {} IN TRANSACTIONS instead of one transaction
+                (default: the connection's batch size, env: KRS_BATCH_SIZE)
         """
         self.neo4j = neo4j_connection
+        self.batch_size = batch_size or neo4j_connection.batch_size
         self.logger = logging.getLogger(__name__)
+        self._apoc_expand_available = None
         
-    def discover_indirect_relationships(self, seed_krs: str, max_depth: int = 3) -> Dict:
+    def discover_indirect_relationships(self, seed_krs: str, max_depth: int = 3,
+                                        use_cache: bool = False, use_materialized: bool = False) -> Dict:
         """
         Discover indirect ownership relationships starting from a seed company.
         
@@ -43,189 +729,395 @@ class IndirectOwnershipDiscovery:
         Args:
             seed_krs: The KRS number of the seed company
             max_depth: Maximum depth for relationship discovery (default: 3)
+            use_cache: Return the result of an identical discovery run in the last
+                CACHE_TTL seconds instead of querying the database again (default: False)
+            use_materialized: Count the stored indirect relationships instead of recomputing
+                them when they were computed at this depth after the last change of the
+                direct ownership relationships (see GraphMeta) (default: False)
             
         Returns:
             Statistics about the discovered relationships
         """
-        stats = {
-            "upstream_relationships": 0,
-            "downstream_relationships": 0,
-            "total_relationships": 0,
-            "companies_linked": 0,
-            "shareholders_linked": 0
-        }
+        cache_key = (self.neo4j.uri, self.neo4j.database, seed_krs, max_depth)
+        
+        if use_cache:
+            cached = self._result_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < self.CACHE_TTL:
+                self.logger.info("Using cached indirect relationships for KRS: %s (depth: %s)", seed_krs, max_depth)
+                return dict(cached[1])
+        
+        computed_at = None
+        if use_materialized:
+            parameters = {"krs": seed_krs, "max_depth": max_depth}
+            row = self.neo4j.query_single(_MATERIALIZED_FRESH, parameters)
+            if row and row["fresh"]:
+                self.logger.info("Using materialized indirect relationships for KRS: %s (depth: %s)", seed_krs, max_depth)
+                stats = _combine_stats(
+                    _relationship_stats(self.neo4j.query_single(_UPSTREAM_EXISTING, parameters)),
+                    _relationship_stats(self.neo4j.query_single(_DOWNSTREAM_EXISTING, parameters))
+                )
+                self._result_cache[cache_key] = (time.monotonic(), stats)
+                return dict(stats)
+            computed_at = row["checked_at"] if row else None
         
         # Discover upstream relationships (owners of owners)
-        self.logger.info(f"Discovering upstream ownership relationships for KRS: {seed_krs}")
-        upstream_stats = self._discover_upstream_relationships(seed_krs, max_depth)
+        self.logger.info("Discovering upstream ownership relationships for KRS: %s", seed_krs)
+        upstream_stats = self._discover_upstream_relationships(seed_krs, max_depth, computed_at)
         
         # Discover downstream relationships (subsidiaries of subsidiaries)
-        self.logger.info(f"Discovering downstream ownership relationships for KRS: {seed_krs}")
-        downstream_stats = self._discover_downstream_relationships(seed_krs, max_depth)
+        self.logger.info("Discovering downstream ownership relationships for KRS: %s", seed_krs)
+        downstream_stats = self._discover_downstream_relationships(seed_krs, max_depth, computed_at)
         
         # Combine statistics
-        stats["upstream_relationships"] = upstream_stats["relationships_created"]
-        stats["downstream_relationships"] = downstream_stats["relationships_created"]
-        stats["total_relationships"] = upstream_stats["relationships_created"] + downstream_stats["relationships_created"]
-        stats["companies_linked"] = upstream_stats["companies_linked"] + downstream_stats["companies_linked"]
-        stats["shareholders_linked"] = upstream_stats["shareholders_linked"] + downstream_stats["shareholders_linked"]
+        stats = _combine_stats(upstream_stats, downstream_stats)
+        self._result_cache[cache_key] = (time.monotonic(), stats)
         
-        return stats
+        return dict(stats)
+    
+    def warmup(self, max_depths: Sequence[int] = (3,)) -> None:
+        """
+        Warm up the connection and the plans of the discovery queries.
+        
+        The queries are the ones discover_indirect_relationships sends in the active
+        mode (batched, NumPy or single statement). They run for a KRS number that
+        matches no company, so nothing is written.
+        
+        Args:
+            max_depths: The depths whose discovery queries should be prepared (default: (3,))
+        """
+        queries = [("RETURN 1", {})]
+        
+        for max_depth in max_depths:
+            parameters = {"krs": "__warmup__", "max_depth": max_depth}
+            if self.batch_size:
+                parameters["batch_size"] = self.batch_size
+                queries.append((self._upstream_batched_query(max_depth), parameters))
+                queries.append((self._downstream_batched_query(max_depth), parameters))
+                continue
+            
+            if self._reduces_upstream_with_numpy():
+                queries.append((_upstream_percentages_query(max_depth), parameters))
+                queries.append((_UPSTREAM_MERGE_ROWS, {"rows": []}))
+            else:
+                queries.append((self._upstream_discovery_query(max_depth), parameters))
+            queries.append((self._downstream_discovery_query(max_depth), parameters))
+        
+        self.neo4j.warmup(queries)
+    
+    def discover_many(self, seed_krs_list: List[str], max_depth: int = 3,
+                      max_workers: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Discover indirect ownership relationships for several seed companies in parallel.
+        
+        Each worker thread runs its queries in its own session, while all of them
+        share the connection pool of the underlying driver.
+        
+        Args:
+            seed_krs_list: The KRS numbers of the seed companies
+            max_depth: Maximum depth for relationship discovery (default: 3)
+            max_workers: Maximum number of worker threads
+                (default: the connection's concurrency, env: KRS_CONCURRENCY)
+            
+        Returns:
+            Statistics about the discovered relationships keyed by KRS number;
+            companies whose discovery failed are left out
+        """
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers or self.neo4j.concurrency) as executor:
+            futures = {
+                executor.submit(self.discover_indirect_relationships, krs, max_depth): krs
+                for krs in seed_krs_list
+            }
+            
+            for future in as_completed(futures):
+                krs = futures[future]
+                try:
+                    results[krs] = future.result()
+                except Exception as e:
+                    self.logger.error("Error processing company %s: %s", krs, e)
+        
+        return results
+    
+    def discover_and_analyze(self, seed_krs: str, max_depth: int = 3) -> Tuple[Dict, Dict]:
+        """
+        Discover indirect relationships and analyze the ownership structure in one transaction.
+        
+        Args:
+            seed_krs: The KRS number of the seed company
+            max_depth: Maximum depth for relationship discovery and ownership chains (default: 3)
+            
+        Returns:
+            A tuple of the discovery statistics and the ownership analysis
+            (see analyze_ownership)
+        """
+        parameters = {"krs": seed_krs, "max_depth": max_depth}
+        
+        upstream_query = self._upstream_discovery_query(max_depth)
+        downstream_query = self._downstream_discovery_query(max_depth)
+        
+        def discover_and_analyze_tx(tx):
+            upstream_stats = _relationship_stats(tx.run(upstream_query, parameters).single())
+            downstream_stats = _relationship_stats(tx.run(downstream_query, parameters).single())
+            return _combine_stats(upstream_stats, downstream_stats), analyze_ownership(tx, seed_krs, max_depth)
+        
+        self.logger.info("Discovering and analyzing ownership relationships for KRS: %s", seed_krs)
+        stats, analysis = self.neo4j.execute_write_transaction(discover_and_analyze_tx)
+        self._result_cache[(self.neo4j.uri, self.neo4j.database, seed_krs, max_depth)] = (time.monotonic(), stats)
+        
+        return dict(stats), analysis
+    
+    def _upstream_discovery_query(self, max_depth: int) -> str:
+        """
+        Get the single-transaction upstream discovery query, preferring APOC path expansion.
+        
+        Args:
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The Cypher query
+        """
+        if self._has_apoc_expand():
+            return _UPSTREAM_PATHS_APOC + _UPSTREAM_MERGE + _UPSTREAM_STATS
+        return _upstream_query(max_depth)
+    
+    def _upstream_batched_query(self, max_depth: int) -> str:
+        """
+        Get the upstream discovery query committing every $batch_size rows.
+        
+        Args:
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The Cypher query
+        """
+        paths_query = _UPSTREAM_PATHS_APOC if self._has_apoc_expand() else _upstream_paths_query(max_depth)
+        return _in_transactions(paths_query, _UPSTREAM_MERGE, "indirect_owner, company, effective_percentage",
+                                "indirect_owner")
+    
+    def _reduces_upstream_with_numpy(self) -> bool:
+        """
+        Check whether unbatched upstream discovery reduces the paths client-side with NumPy.
+        
+        Returns:
+            True without APOC when NumPy is installed, False otherwise
+        """
+        return np is not None and not self._has_apoc_expand()
+    
+    def _downstream_paths(self, max_depth: int) -> str:
+        """
+        Get the query matching downstream paths, preferring APOC path expansion.
+        
+        Args:
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The Cypher query
+        """
+        if self._has_apoc_expand():
+            return _DOWNSTREAM_PATHS_APOC
+        return _downstream_paths_query(max_depth)
+    
+    def _downstream_discovery_query(self, max_depth: int) -> str:
+        """
+        Get the single-transaction downstream discovery query, preferring APOC path expansion.
+        
+        Args:
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The Cypher query
+        """
+        return self._downstream_paths(max_depth) + _DOWNSTREAM_MERGE + _DOWNSTREAM_STATS
     
-    def _discover_upstream_relationships(self, krs_number: str, max_depth: int) -> Dict:
+    def _downstream_batched_query(self, max_depth: int) -> str:
+        """
+        Get the downstream discovery query committing every $batch_size rows.
+        
+        Args:
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The Cypher query
+        """
+        return _in_transactions(self._downstream_paths(max_depth), _DOWNSTREAM_MERGE,
+                                "company, indirect_subsidiary, effective_percentage", "indirect_subsidiary")
+    
+    def _discover_upstream_relationships(self, krs_number: str, max_depth: int, computed_at: Any = None) -> Dict:
         """
         Discover upstream ownership relationships (owners of owners).
         
         Args:
             krs_number: The KRS number of the company
             max_depth: Maximum depth for relationship discovery
+            computed_at: If set, the company is stamped as materialized at this time
             
         Returns:
             Statistics about the discovered relationships
         """
-        stats = {
-            "relationships_created": 0,
-            "companies_linked": 0,
-            "shareholders_linked": 0
-        }
+        stats = _relationship_stats(None)
         
-        # Query to find all ownership paths up to max_depth
-        query = f"""
-        // Find all ownership paths leading to the company up to depth {max_depth}
-        MATCH path = (owner)-[r:{RelationshipTypes.OWNS_SHARES_IN}*2..{max_depth}]->(target:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})
-        
-        // Extract nodes and relationships along the path
-        WITH path, nodes(path) AS nodes, relationships(path) AS rels
-        
-        // Calculate the effective ownership percentage
-        WITH 
-            nodes[0] AS indirect_owner, 
-            nodes[size(nodes)-1] AS company,
-            reduce(s = 1.0, rel IN rels | 
-                s * CASE WHEN rel.{NodeProperties.PERCENTAGE} IS NOT NULL 
-                        THEN rel.{NodeProperties.PERCENTAGE} / 100 
-                        ELSE 1 
-                   END
-            ) * 100 AS effective_percentage
-        
-        // Create indirect relationship (if it doesn't exist)
-        MERGE (indirect_owner)-[r:INDIRECT_OWNER_OF]->(company)
-        ON CREATE SET 
-            r.{NodeProperties.PERCENTAGE} = effective_percentage,
-            r.{NodeProperties.SOURCE} = 'derived',
-            r.created_at = datetime()
-        ON MATCH SET 
-            r.{NodeProperties.PERCENTAGE} = effective_percentage,
-            r.updated_at = datetime()
-        
-        // Return statistics
-        RETURN 
-            count(r) AS relationships_created,
-            sum(CASE WHEN indirect_owner:{NodeLabels.COMPANY} THEN 1 ELSE 0 END) AS companies_linked,
-            sum(CASE WHEN indirect_owner:{NodeLabels.SHAREHOLDER} THEN 1 ELSE 0 END) AS shareholders_linked
-        """
-        
-        parameters = {"krs": krs_number}
+        parameters = {"krs": krs_number, "max_depth": max_depth}
         
         try:
-            # Execute the query to create indirect relationships
-            results = self.neo4j.query(query, parameters)
+            # Prefer the pruning APOC expansion, fall back to a variable-length pattern
+            # (reduced client-side with NumPy when it is installed)
+            if self.batch_size:
+                row = self._run_in_batches(self._upstream_batched_query(max_depth), krs_number, max_depth)
+            elif self._reduces_upstream_with_numpy():
+                row = self.neo4j.execute_write_transaction(self._discover_upstream_with_numpy, parameters)
+            else:
+                row = self.neo4j.query_single(self._upstream_discovery_query(max_depth), parameters)
             
-            if results and len(results) > 0:
-                stats["relationships_created"] = results[0].get("relationships_created", 0)
-                stats["companies_linked"] = results[0].get("companies_linked", 0)
-                stats["shareholders_linked"] = results[0].get("shareholders_linked", 0)
+            if row:
+                stats = _relationship_stats(row)
                 
-                self.logger.info(f"Created {stats['relationships_created']} indirect upstream ownership relationships")
+                self.logger.info("Created %s indirect upstream ownership relationships", stats['relationships_created'])
+            
+            if computed_at is not None:
+                self._stamp_materialized(krs_number, max_depth, computed_at, "upstream")
             
             return stats
             
         except Exception as e:
-            self.logger.error(f"Error discovering upstream relationships: {e}")
+            self.logger.error("Error discovering upstream relationships: %s", e)
             return stats
     
-    def _discover_downstream_relationships(self, krs_number: str, max_depth: int) -> Dict:
+    @staticmethod
+    def _discover_upstream_with_numpy(tx, parameters: Dict):
+        """
+        Fetch the raw upstream paths, reduce their percentages client-side and write the results.
+        
+        Args:
+            tx: The Neo4j transaction
+            parameters: The query parameters (krs and max_depth)
+            
+        Returns:
+            The statistics record of the write
+        """
+        paths = tx.run(_upstream_percentages_query(parameters["max_depth"]), parameters).data()
+        if not paths:
+            return None
+        
+        effective = _effective_percentages([path["percentages"] for path in paths])
+        
+        # Sum the stakes held through different chains, so each pair is merged once
+        totals = {}
+        for path, percentage in zip(paths, effective):
+            key = (path["owner_id"], path["company_id"])
+            totals[key] = totals.get(key, 0.0) + percentage
+        
+        rows = [
+            {"owner_id": owner_id, "company_id": company_id, "effective_percentage": percentage}
+            for (owner_id, company_id), percentage in totals.items()
+        ]
+        return tx.run(_UPSTREAM_MERGE_ROWS, {"rows": rows}).single()
+    
+    def _discover_downstream_relationships(self, krs_number: str, max_depth: int, computed_at: Any = None) -> Dict:
         """
         Discover downstream ownership relationships (subsidiaries of subsidiaries).
         
         Args:
             krs_number: The KRS number of the company
             max_depth: Maximum depth for relationship discovery
+            computed_at: If set, the company is stamped as materialized at this time
             
         Returns:
             Statistics about the discovered relationships
         """
-        stats = {
-            "relationships_created": 0,
-            "companies_linked": 0,
-            "shareholders_linked": 0
-        }
+        stats = _relationship_stats(None)
         
-        # Query to find all ownership paths up to max_depth in the downstream direction
-        query = f"""
-        // Find all ownership paths starting from the company up to depth {max_depth}
-        MATCH path = (source:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: $krs}})-[r:{RelationshipTypes.OWNS_SHARES_IN}*2..{max_depth}]->(target)
-        
-        // Extract the nodes and relationships
-        WITH path, nodes(path) AS nodes, relationships(path) AS rels
-        
-        // Calculate the effective ownership percentage
-        WITH 
-            nodes[0] AS company, 
-            nodes[size(nodes)-1] AS indirect_subsidiary,
-            reduce(s = 1.0, rel IN rels | 
-                s * CASE WHEN rel.{NodeProperties.PERCENTAGE} IS NOT NULL 
-                        THEN rel.{NodeProperties.PERCENTAGE} / 100 
-                        ELSE 1 
-                   END
-            ) * 100 AS effective_percentage
-        
-        // Skip if there's already a direct relationship
-        WHERE NOT (company)-[:{RelationshipTypes.OWNS_SHARES_IN}]->(indirect_subsidiary)
-        
-        // Create indirect relationship (if it doesn't exist)
-        MERGE (company)-[r:CONTROLS_INDIRECTLY]->(indirect_subsidiary)
-        ON CREATE SET 
-            r.{NodeProperties.PERCENTAGE} = effective_percentage,
-            r.{NodeProperties.SOURCE} = 'derived',
-            r.created_at = datetime()
-        ON MATCH SET 
-            r.{NodeProperties.PERCENTAGE} = effective_percentage,
-            r.updated_at = datetime()
-        
-        // Return statistics
-        RETURN 
-            count(r) AS relationships_created,
-            sum(CASE WHEN indirect_subsidiary:{NodeLabels.COMPANY} THEN 1 ELSE 0 END) AS companies_linked,
-            sum(CASE WHEN indirect_subsidiary:{NodeLabels.SHAREHOLDER} THEN 1 ELSE 0 END) AS shareholders_linked
-        """
-        
-        parameters = {"krs": krs_number}
+        parameters = {"krs": krs_number, "max_depth": max_depth}
         
         try:
             # Execute the query to create indirect relationships
-            results = self.neo4j.query(query, parameters)
+            if self.batch_size:
+                row = self._run_in_batches(self._downstream_batched_query(max_depth), krs_number, max_depth)
+            else:
+                row = self.neo4j.query_single(self._downstream_discovery_query(max_depth), parameters)
             
-            if results and len(results) > 0:
-                stats["relationships_created"] = results[0].get("relationships_created", 0)
-                stats["companies_linked"] = results[0].get("companies_linked", 0)
-                stats["shareholders_linked"] = results[0].get("shareholders_linked", 0)
+            if row:
+                stats = _relationship_stats(row)
                 
-                self.logger.info(f"Created {stats['relationships_created']} indirect downstream ownership relationships")
+                self.logger.info("Created %s indirect downstream ownership relationships", stats['relationships_created'])
+            
+            if computed_at is not None:
+                self._stamp_materialized(krs_number, max_depth, computed_at, "downstream")
             
             return stats
             
         except Exception as e:
-            self.logger.error(f"Error discovering downstream relationships: {e}")
+            self.logger.error("Error discovering downstream relationships: %s", e)
             return stats
 
-    def create_synthetic_test_data(self) -> Dict:
+    def _stamp_materialized(self, krs_number: str, max_depth: int, computed_at: Any, direction: str) -> None:
+        """
+        Record that the indirect relationships of a company were materialized in one direction.
+        
+        Args:
+            krs_number: The KRS number of the company
+            max_depth: Maximum depth the relationships were discovered to
+            computed_at: Database time read before the discovery started
+            direction: Direction of the discovery ("upstream" or "downstream")
+        """
+        self.neo4j.query(_MATERIALIZED_STAMP, {
+            "krs": krs_number,
+            "max_depth": max_depth,
+            "computed_at": computed_at,
+            "direction": direction
+        })
+
+    def _has_apoc_expand(self) -> bool:
+        """
+        Check (once per service) whether apoc.path.expandConfig is available.
+        
+        Returns:
+            True if the APOC path expander can be used, False otherwise
+        """
+        if self._apoc_expand_available is None:
+            try:
+                self._apoc_expand_available = bool(self.neo4j.query_scalar(_APOC_EXPAND_AVAILABLE))
+            except Exception as e:
+                self.logger.warning("Could not check for APOC procedures: %s", e)
+                self._apoc_expand_available = False
+            
+            if not self._apoc_expand_available:
+                self.logger.info("APOC path expander not available, using variable-length patterns")
+        
+        return self._apoc_expand_available
+
+    def _run_in_batches(self, batched_query: str, krs_number: str, max_depth: int) -> Optional[Dict]:
+        """
+        Write indirect relationships with a CALL {} IN TRANSACTIONS query.
+        
+        The query runs in an auto-commit transaction, so each batch of rows is
+        committed (and its locks released) on its own.
+        
+        Args:
+            batched_query: The query built by _in_transactions
+            krs_number: The KRS number of the company
+            max_depth: Maximum depth for relationship discovery
+            
+        Returns:
+            The statistics of the merged rows, as counted by the batched query
+        """
+        return self.neo4j.query_single(batched_query, {
+            "batch_size": self.batch_size,
+            "krs": krs_number,
+            "max_depth": max_depth
+        })
+
+    def create_synthetic_test_data(self, company_count: int = 5) -> Dict:
         """
         Create synthetic test data to demonstrate multi-level ownership relationships.
         
         This function creates a chain of companies and shareholders with ownership relationships
-        to demonstrate the indirect ownership discovery functionality.
+        to demonstrate the indirect ownership discovery functionality. When a batch size is set
+        and the data exceeds it, the rows are committed in batches instead of one transaction.
         
+        Args:
+            company_count: Number of test companies; more than five extend the chain (default: 5)
+            
         Returns:
             Statistics about the created test data
         """
@@ -235,96 +1127,130 @@ class IndirectOwnershipDiscovery:
             "relationships_created": 0
         }
         
-        # First cleanup any existing test data
-        cleanup_query = """
-        MATCH (n) 
-        WHERE n.krs IN ["TEST001", "TEST002", "TEST003", "TEST004", "TEST005"] 
-            OR n.id IN ["shareholder_test1", "shareholder_test2", "shareholder_test3"]
-        DETACH DELETE n
-        """
+        # The graph is about to change, so earlier discovery results are stale
+        self._result_cache.clear()
+        
+        companies = _synthetic_companies(company_count)
+        ownership = _synthetic_ownership(company_count)
         
         try:
-            self.neo4j.query(cleanup_query)
-            self.logger.info("Cleaned up existing test data (if any)")
+            # The discovery queries and the synthetic data lookups below seek nodes through the
+            # company_krs and shareholder_id constraint indexes
+            DatabaseSchema.create_constraints_and_indexes(self.neo4j)
+            
+            if self.batch_size and len(ownership) > self.batch_size:
+                stats = self._create_synthetic_data_in_batches(companies, _SYNTHETIC_SHAREHOLDERS, ownership)
+            else:
+                # Clean up existing test data and create all nodes and relationships in a single write transaction
+                stats = self.neo4j.execute_write_transaction(
+                    _create_synthetic_data,
+                    companies,
+                    _SYNTHETIC_SHAREHOLDERS,
+                    ownership
+                )
+            
+            self.logger.info("Created synthetic test data: %s companies, %s shareholders, %s relationships",
+                             stats['companies_created'], stats['shareholders_created'],
+                             stats['relationships_created'])
+            
+            return stats
+            
         except Exception as e:
-            self.logger.warning(f"Cleanup step had an issue: {e}")
-        
-        # Create companies query
-        companies_query = f"""
-        CREATE (c1:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST001", {NodeProperties.NAME}: "Test Company 1", {NodeProperties.STATUS}: "Active"}})
-        CREATE (c2:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST002", {NodeProperties.NAME}: "Test Company 2", {NodeProperties.STATUS}: "Active"}})
-        CREATE (c3:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST003", {NodeProperties.NAME}: "Test Company 3", {NodeProperties.STATUS}: "Active"}})
-        CREATE (c4:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST004", {NodeProperties.NAME}: "Test Company 4", {NodeProperties.STATUS}: "Active"}})
-        CREATE (c5:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST005", {NodeProperties.NAME}: "Test Company 5", {NodeProperties.STATUS}: "Active"}})
-        RETURN count(*) as companies_created
-        """
-        
-        # Create shareholders query
-        shareholders_query = f"""
-        CREATE (s1:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test1", {NodeProperties.NAME}: "Test Shareholder 1", {NodeProperties.SHAREHOLDER_TYPE}: "company"}})
-        CREATE (s2:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test2", {NodeProperties.NAME}: "Test Shareholder 2", {NodeProperties.SHAREHOLDER_TYPE}: "company"}})
-        CREATE (s3:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test3", {NodeProperties.NAME}: "Test Shareholder 3", {NodeProperties.SHAREHOLDER_TYPE}: "individual"}})
-        RETURN count(*) as shareholders_created
-        """
-        
-        # Create relationships query
-        relationships_query = f"""
-        MATCH (s1:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test1"}})
-        MATCH (s2:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test2"}})
-        MATCH (s3:{NodeLabels.SHAREHOLDER} {{id: "shareholder_test3"}})
-        MATCH (c1:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST001"}})
-        MATCH (c2:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST002"}})
-        MATCH (c3:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST003"}})
-        MATCH (c4:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST004"}})
-        MATCH (c5:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST005"}})
-        
-        CREATE (s1)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 75.0}}]->(c1)
-        CREATE (s2)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 60.0}}]->(s1)
-        CREATE (s3)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 80.0}}]->(s2)
-        CREATE (c1)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 51.0}}]->(c2)
-        CREATE (c2)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 70.0}}]->(c3)
-        CREATE (c1)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 30.0}}]->(c4)
-        CREATE (c4)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 25.0}}]->(c5)
-        
-        RETURN 7 as relationships_created
-        """
-        
-        # Connect to Cyfrowy Polsat if it exists
-        connect_query = f"""
-        MATCH (c1:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "TEST001"}})
-        MATCH (cp:{NodeLabels.COMPANY} {{{NodeProperties.KRS}: "0000010078"}})
-        CREATE (c1)-[:{RelationshipTypes.OWNS_SHARES_IN} {{{NodeProperties.PERCENTAGE}: 15.0}}]->(cp)
-        RETURN count(*) as additional_relationships
+            self.logger.error("Error creating synthetic test data: %s", e)
+            return stats
+    
+    def _create_synthetic_data_in_batches(self, companies: List[Dict], shareholders: List[Dict],
+                                          ownership: List[Dict]) -> Dict:
         """
+        Replace the synthetic data, committing every batch_size rows.
         
-        try:
-            # Execute the queries
-            companies_result = self.neo4j.query(companies_query)
-            if companies_result and len(companies_result) > 0:
-                stats["companies_created"] = companies_result[0].get("companies_created", 0)
+        Args:
+            companies: Company rows with krs, name and status
+            shareholders: Shareholder rows with id, name and type
+            ownership: Ownership rows with src, dst and pct
             
-            shareholders_result = self.neo4j.query(shareholders_query)
-            if shareholders_result and len(shareholders_result) > 0:
-                stats["shareholders_created"] = shareholders_result[0].get("shareholders_created", 0)
+        Returns:
+            Statistics about the created test data
+        """
+        self.neo4j.query(_SYNTHETIC_CLEANUP, {
+            "krs_numbers": [company["krs"] for company in companies],
+            "shareholder_ids": [shareholder["id"] for shareholder in shareholders]
+        })
+        
+        stats = {}
+        for (stat, query), rows in zip(_SYNTHETIC_BATCHED_QUERIES, (companies, shareholders, ownership)):
+            stats[stat] = self.neo4j.query_scalar(query, {"rows": rows, "batch_size": self.batch_size})
+        
+        self.neo4j.query(GraphMeta.TOUCH)
+        return stats
+
+
+class AsyncIndirectOwnershipDiscovery:
+    """
+    Asynchronous variant of IndirectOwnershipDiscovery.
+    
+    Discovery for several seed companies can be awaited concurrently so the
+    server-side traversals overlap instead of running one after another.
+    """
+
+    def __init__(self, neo4j_connection: AsyncNeo4jConnection):
+        """
+        Initialize the asynchronous Indirect Ownership Discovery service.
+        
+        Args:
+            neo4j_connection: An AsyncNeo4jConnection instance
+        """
+        self.neo4j = neo4j_connection
+        self.logger = logging.getLogger(__name__)
+
+    async def discover_indirect_relationships(self, seed_krs: str, max_depth: int = 3) -> Dict:
+        """
+        Discover indirect ownership relationships starting from a seed company.
+        
+        Args:
+            seed_krs: The KRS number of the seed company
+            max_depth: Maximum depth for relationship discovery (default: 3)
             
-            relationships_result = self.neo4j.query(relationships_query)
-            if relationships_result and len(relationships_result) > 0:
-                stats["relationships_created"] = relationships_result[0].get("relationships_created", 0)
+        Returns:
+            Statistics about the discovered relationships
+        """
+        self.logger.info("Discovering upstream ownership relationships for KRS: %s", seed_krs)
+        upstream_stats = await self._discover_relationships(
+            _upstream_query(max_depth), seed_krs, max_depth, "upstream"
+        )
+        
+        self.logger.info("Discovering downstream ownership relationships for KRS: %s", seed_krs)
+        downstream_stats = await self._discover_relationships(
+            _downstream_query(max_depth), seed_krs, max_depth, "downstream"
+        )
+        
+        return _combine_stats(upstream_stats, downstream_stats)
+
+    async def _discover_relationships(self, query: str, krs_number: str, max_depth: int, direction: str) -> Dict:
+        """
+        Run a discovery query and collect its statistics.
+        
+        Args:
+            query: The discovery query to execute
+            krs_number: The KRS number of the company
+            max_depth: Maximum depth for relationship discovery
+            direction: Direction of the discovery ("upstream" or "downstream")
             
-            # Try to connect to Cyfrowy Polsat (ignore errors if it doesn't exist)
-            try:
-                connect_result = self.neo4j.query(connect_query)
-                if connect_result and len(connect_result) > 0:
-                    stats["relationships_created"] += connect_result[0].get("additional_relationships", 0)
-            except Exception:
-                pass
+        Returns:
+            Statistics about the discovered relationships
+        """
+        stats = _relationship_stats(None)
+        
+        try:
+            results = await self.neo4j.query(query, {"krs": krs_number, "max_depth": max_depth})
             
-            self.logger.info(f"Created synthetic test data: {stats['companies_created']} companies, "
-                             f"{stats['shareholders_created']} shareholders, "
-                             f"{stats['relationships_created']} relationships")
+            if results:
+                stats = _relationship_stats(results[0])
+                
+                self.logger.info("Created %s indirect %s ownership relationships", stats['relationships_created'], direction)
             
             return stats
             
         except Exception as e:
-            self.logger.error(f"Error creating synthetic test data: {e}")
+            self.logger.error("Error discovering %s relationships: %s", direction, e)
             return stats
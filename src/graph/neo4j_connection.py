@@ -8,10 +8,46 @@ This module provides connection functionality to the Neo4j graph database.
 """
 
 import os
+import atexit
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Union
-from neo4j import GraphDatabase
+import threading
+import weakref
+from typing import List, Dict, Any, Optional, Union, Callable, Sequence, Tuple, Iterator
+from neo4j import GraphDatabase, AsyncGraphDatabase
 from dotenv import load_dotenv
+from .data_model import DatabaseSchema
+
+# Load environment variables once per process instead of searching for .env per connection
+load_dotenv()
+
+
+def _apply_driver_settings(connection, max_connection_pool_size: Optional[int],
+                           connection_acquisition_timeout: Optional[float],
+                           debug_notifications: Optional[bool]) -> None:
+    """
+    Set the driver settings of a connection from its arguments or the environment.
+    
+    Shared by the synchronous and asynchronous connections, so one .env configures
+    both the same way.
+    
+    Args:
+        connection: The Neo4jConnection or AsyncNeo4jConnection being initialized
+        max_connection_pool_size: Maximum number of pooled connections (env: NEO4J_POOL_SIZE)
+        connection_acquisition_timeout: Seconds to wait for a pooled connection (env: NEO4J_ACQ_TIMEOUT)
+        debug_notifications: Have the server send query notifications (env: NEO4J_DEBUG_NOTIFICATIONS)
+    """
+    connection.max_connection_lifetime = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", 1200))
+    connection.max_connection_pool_size = max_connection_pool_size or int(
+        os.getenv("NEO4J_POOL_SIZE", os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", 32))
+    )
+    connection.connection_acquisition_timeout = connection_acquisition_timeout or float(
+        os.getenv("NEO4J_ACQ_TIMEOUT", 30)
+    )
+    connection.connection_timeout = int(os.getenv("NEO4J_CONNECTION_TIMEOUT", 30))
+    if debug_notifications is None:
+        debug_notifications = os.getenv("NEO4J_DEBUG_NOTIFICATIONS") == "1"
+    connection.debug_notifications = debug_notifications
 
 
 class Neo4jConnection:
@@ -23,7 +59,10 @@ class Neo4jConnection:
     """
 
     def __init__(self, uri: Optional[str] = None, user: Optional[str] = None, 
-                 password: Optional[str] = None, database: Optional[str] = None):
+                 password: Optional[str] = None, database: Optional[str] = None,
+                 max_connection_pool_size: Optional[int] = None,
+                 connection_acquisition_timeout: Optional[float] = None,
+                 debug_notifications: Optional[bool] = None):
         """
         Initialize the Neo4j connection.
         
@@ -34,10 +73,11 @@ class Neo4jConnection:
             user: The Neo4j username
             password: The Neo4j password
             database: The Neo4j database name
+            max_connection_pool_size: Maximum number of pooled connections (env: NEO4J_POOL_SIZE)
+            connection_acquisition_timeout: Seconds to wait for a pooled connection (env: NEO4J_ACQ_TIMEOUT)
+            debug_notifications: Have the server send query notifications (performance hints,
+                deprecations), which are turned off otherwise (env: NEO4J_DEBUG_NOTIFICATIONS)
         """
-        # Load environment variables if not already loaded
-        load_dotenv()
-        
         # Use provided parameters or load from environment
         self.uri = uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
         self.user = user or os.getenv("NEO4J_USER", "neo4j")
@@ -45,43 +85,105 @@ class Neo4jConnection:
         self.database = database or os.getenv("NEO4J_DATABASE", "krsgraph")
         
         # Additional connection settings
-        self.max_connection_lifetime = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", 3600))
-        self.max_connection_pool_size = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", 50))
-        self.connection_timeout = int(os.getenv("NEO4J_CONNECTION_TIMEOUT", 30))
+        _apply_driver_settings(self, max_connection_pool_size, connection_acquisition_timeout, debug_notifications)
+        
+        # Bulk write settings for the graph services: rows per batched transaction
+        # (unset writes in one transaction) and parallel workers
+        batch_size = os.getenv("KRS_BATCH_SIZE")
+        self.batch_size = int(batch_size) if batch_size else None
+        self.concurrency = int(os.getenv("KRS_CONCURRENCY", 8))
         
         # Set up logger
         self.logger = logging.getLogger(__name__)
         
         # Initialize connection
         self.driver = None
+        self._local = threading.local()
+        # Sessions of all threads, so close() can close those of worker threads too
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
         self.connect()
 
     def connect(self) -> None:
         """
         Establish a connection to the Neo4j database.
+        
+        Connections with the same server, credentials and driver settings share one
+        process-wide driver (and its connection pool), which is shut down at
+        interpreter exit.
+        With KRS_AUTO_INDEX=1 the constraints and indexes of the data model are
+        created once per database on the first connection.
         """
         try:
-            self.driver = GraphDatabase.driver(
-                self.uri,
-                auth=(self.user, self.password),
-                max_connection_lifetime=self.max_connection_lifetime,
-                max_connection_pool_size=self.max_connection_pool_size,
-                connection_timeout=self.connection_timeout
-            )
-            self.logger.info(f"Connected to Neo4j database: {self.database} at {self.uri}")
+            self.driver = _get_shared_driver(self)
+            self.logger.info(f"Connected to Neo4j database: {self.database} at {self.uri} "
+                             f"(pool size: {self.max_connection_pool_size}, "
+                             f"acquisition timeout: {self.connection_acquisition_timeout}s, "
+                             f"connection lifetime: {self.max_connection_lifetime}s)")
         except Exception as e:
             self.logger.error(f"Failed to connect to Neo4j: {e}")
             raise
+        
+        if os.getenv("KRS_AUTO_INDEX") == "1":
+            _ensure_schema(self)
 
     def close(self) -> None:
         """
         Close the Neo4j database connection.
+        
+        The sessions opened by every thread are closed. The shared driver stays
+        open for other connections; use shutdown_driver() to close it explicitly.
         """
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                self.logger.warning(f"Failed to close Neo4j session: {e}")
+        self._local.session = None
+        
         if self.driver:
-            self.driver.close()
             self.driver = None
             self.logger.info("Neo4j connection closed")
 
+    def __enter__(self) -> "Neo4jConnection":
+        """
+        Enter the runtime context, returning this connection.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """
+        Exit the runtime context, closing the connection.
+        """
+        self.close()
+
+    def _session(self):
+        """
+        Get the session of the calling thread, creating it on first use.
+        
+        Sessions are not thread-safe, so each thread reuses its own one for the
+        auto-commit queries instead of opening a session per statement.
+        
+        Returns:
+            The Neo4j session
+        """
+        if not self.driver:
+            self.connect()
+        
+        session = getattr(self._local, "session", None)
+        if (session is None or session.closed()
+                or getattr(self._local, "driver", None) is not self.driver):
+            # Always use the specified database for queries
+            session = self.driver.session(database=self.database)
+            self._local.session = session
+            self._local.driver = self.driver
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
+
     def verify_connectivity(self) -> bool:
         """
         Verify the connection to the Neo4j database.
@@ -90,10 +192,10 @@ class Neo4jConnection:
             True if the connection is established, False otherwise.
         """
         try:
-            # Always use the specified database for this check
+            # Always use the specified database for this check; the managed
+            # transaction is retried on transient failures
             with self.driver.session(database=self.database) as session:
-                result = session.run("RETURN 1 AS test")
-                return result.single()["test"] == 1
+                return session.execute_read(lambda tx: tx.run("RETURN 1 AS test").single()["test"]) == 1
         except Exception as e:
             self.logger.error(f"Connection verification failed: {e}")
             return False
@@ -109,14 +211,113 @@ class Neo4jConnection:
         Returns:
             A list of records as dictionaries
         """
+        try:
+            result = self._session().run(query, parameters)
+            return [record.data() for record in result]
+        except Exception as e:
+            self.logger.error(f"Query execution failed: {query}, error: {e}")
+            raise
+
+    def warmup(self, queries: Sequence[Tuple[str, Dict]]) -> None:
+        """
+        Run queries once on a single session and discard their results.
+        
+        This establishes the pooled connection and lets the server compile and cache
+        the query plans before user-visible calls. Failures are logged and ignored.
+        
+        Args:
+            queries: Tuples of a Cypher query and its parameters
+        """
+        if not self.driver:
+            self.connect()
+        
+        with self.driver.session(database=self.database) as session:
+            for query, parameters in queries:
+                try:
+                    session.run(query, parameters).consume()
+                except Exception as e:
+                    self.logger.warning(f"Warm-up query failed: {e}")
+
+    def query_single(self, query: str, parameters: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Execute a Cypher query that returns at most one record.
+        
+        Args:
+            query: The Cypher query to execute
+            parameters: Query parameters
+            
+        Returns:
+            The record as a dictionary, or None if the query returned no records
+        """
+        try:
+            record = self._session().run(query, parameters).single()
+            return record.data() if record else None
+        except Exception as e:
+            self.logger.error(f"Query execution failed: {query}, error: {e}")
+            raise
+
+    def query_scalar(self, query: str, parameters: Optional[Dict] = None, key: Optional[str] = None) -> Any:
+        """
+        Execute a Cypher query and return a single value of its first record.
+        
+        Args:
+            query: The Cypher query to execute
+            parameters: Query parameters
+            key: The column to return (default: the first one)
+            
+        Returns:
+            The value, or None if the query returned no records
+        """
+        try:
+            record = self._session().run(query, parameters).single()
+            if record is None:
+                return None
+            return record[key] if key is not None else record[0]
+        except Exception as e:
+            self.logger.error(f"Query execution failed: {query}, error: {e}")
+            raise
+
+    def query_many(self, query: str, param_list: Sequence[Dict]) -> List[List[Dict]]:
+        """
+        Execute one Cypher query with several parameter sets in a single write transaction.
+        
+        Args:
+            query: The Cypher query to execute
+            param_list: The parameters of each execution
+            
+        Returns:
+            The records of each execution as lists of dictionaries, in order
+        """
+        def run_all(tx):
+            return [[record.data() for record in tx.run(query, parameters)] for parameters in param_list]
+        
+        try:
+            return self._session().execute_write(run_all)
+        except Exception as e:
+            self.logger.error(f"Query execution failed: {query}, error: {e}")
+            raise
+
+    def query_stream(self, query: str, parameters: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Execute a Cypher query and yield its records as they arrive.
+        
+        The session stays open until the generator is exhausted or closed.
+        
+        Args:
+            query: The Cypher query to execute
+            parameters: Query parameters
+            
+        Yields:
+            Records as dictionaries
+        """
         if not self.driver:
             self.connect()
             
         try:
             # Always use the specified database for queries
             with self.driver.session(database=self.database) as session:
-                result = session.run(query, parameters)
-                return [record.data() for record in result]
+                for record in session.run(query, parameters):
+                    yield record.data()
         except Exception as e:
             self.logger.error(f"Query execution failed: {query}, error: {e}")
             raise
@@ -138,7 +339,7 @@ class Neo4jConnection:
             
         # Always use the specified database for transactions
         with self.driver.session(database=self.database) as session:
-            return session.write_transaction(tx_function, *args, **kwargs)
+            return session.execute_write(tx_function, *args, **kwargs)
 
     def execute_read_transaction(self, tx_function, *args, **kwargs):
         """
@@ -157,8 +358,238 @@ class Neo4jConnection:
             
         # Always use the specified database for transactions
         with self.driver.session(database=self.database) as session:
-            return session.read_transaction(tx_function, *args, **kwargs)
+            return session.execute_read(tx_function, *args, **kwargs)
+
+    def run_batch(self, statements: Sequence[str]) -> None:
+        """
+        Run several parameterless statements in a single write transaction.
+        
+        Args:
+            statements: The Cypher statements to run, in order
+        """
+        if not self.driver:
+            self.connect()
+        
+        def run_statements(tx):
+            for statement in statements:
+                tx.run(statement).consume()
+        
+        # Always use the specified database for transactions
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(run_statements)
+
+    def execute_batch(self, tx_calls: Sequence[Tuple[Callable, ...]]) -> List[Any]:
+        """
+        Execute several write transactions on a single session.
+        
+        Args:
+            tx_calls: Tuples of a transaction function followed by its additional arguments
+            
+        Returns:
+            The results of the transaction functions, in order
+        """
+        if not self.driver:
+            self.connect()
+            
+        # Keep one session (and its pooled connection) for the whole batch
+        with self.driver.session(database=self.database) as session:
+            return [session.execute_write(tx_function, *args) for tx_function, *args in tx_calls]
+
+
+class AsyncNeo4jConnection:
+    """
+    Asynchronous connection handler for Neo4j database.
+    
+    This class mirrors Neo4jConnection on top of the asynchronous driver so that
+    independent queries can be awaited concurrently.
+    """
+
+    def __init__(self, uri: Optional[str] = None, user: Optional[str] = None, 
+                 password: Optional[str] = None, database: Optional[str] = None,
+                 max_connection_pool_size: Optional[int] = None,
+                 connection_acquisition_timeout: Optional[float] = None,
+                 debug_notifications: Optional[bool] = None):
+        """
+        Initialize the asynchronous Neo4j connection.
+        
+        If connection parameters are not provided, they will be loaded from environment
+        variables, with the same names and defaults as for Neo4jConnection.
+        
+        Args:
+            uri: The Neo4j server URI (e.g., bolt://localhost:7687)
+            user: The Neo4j username
+            password: The Neo4j password
+            database: The Neo4j database name
+            max_connection_pool_size: Maximum number of pooled connections (env: NEO4J_POOL_SIZE)
+            connection_acquisition_timeout: Seconds to wait for a pooled connection (env: NEO4J_ACQ_TIMEOUT)
+            debug_notifications: Have the server send query notifications (env: NEO4J_DEBUG_NOTIFICATIONS)
+        """
+        # Use provided parameters or load from environment
+        self.uri = uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
+        self.user = user or os.getenv("NEO4J_USER", "neo4j")
+        self.password = password or os.getenv("NEO4J_PASSWORD", "")
+        self.database = database or os.getenv("NEO4J_DATABASE", "krsgraph")
+        
+        # Additional connection settings
+        _apply_driver_settings(self, max_connection_pool_size, connection_acquisition_timeout, debug_notifications)
+        
+        # Set up logger
+        self.logger = logging.getLogger(__name__)
+        
+        # Initialize connection
+        self.driver = None
+        self.connect()
+
+    def connect(self) -> None:
+        """
+        Create the asynchronous driver for the Neo4j database.
+        """
+        try:
+            self.driver = AsyncGraphDatabase.driver(
+                self.uri,
+                auth=(self.user, self.password),
+                max_connection_lifetime=self.max_connection_lifetime,
+                max_connection_pool_size=self.max_connection_pool_size,
+                connection_acquisition_timeout=self.connection_acquisition_timeout,
+                connection_timeout=self.connection_timeout,
+                keep_alive=True,
+                notifications_min_severity=None if self.debug_notifications else "OFF"
+            )
+            self.logger.info(f"Connected to Neo4j database: {self.database} at {self.uri} (async)")
+        except Exception as e:
+            self.logger.error(f"Failed to connect to Neo4j: {e}")
+            raise
 
+    async def close(self) -> None:
+        """
+        Close the Neo4j database connection.
+        """
+        if self.driver:
+            await self.driver.close()
+            self.driver = None
+            self.logger.info("Neo4j async connection closed")
+
+    async def verify_connectivity(self) -> bool:
+        """
+        Verify the connection to the Neo4j database.
+        
+        Returns:
+            True if the connection is established, False otherwise.
+        """
+        if not self.driver:
+            self.connect()
+        
+        async def check(tx):
+            record = await (await tx.run("RETURN 1 AS test")).single()
+            return record["test"]
+        
+        try:
+            async with self.driver.session(database=self.database) as session:
+                return await session.execute_read(check) == 1
+        except Exception as e:
+            self.logger.error(f"Connection verification failed: {e}")
+            return False
+
+    async def query(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Execute a Cypher query and return the results.
+        
+        Args:
+            query: The Cypher query to execute
+            parameters: Query parameters
+            
+        Returns:
+            A list of records as dictionaries
+        """
+        if not self.driver:
+            self.connect()
+            
+        try:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(query, parameters)
+                return [record.data() async for record in result]
+        except Exception as e:
+            self.logger.error(f"Query execution failed: {query}, error: {e}")
+            raise
+
+
+# Drivers shared by all connections, keyed by every setting that configures the driver
+_drivers: Dict[tuple, Any] = {}
+_drivers_lock = threading.Lock()
+
+def _get_shared_driver(connection: Neo4jConnection):
+    """
+    Get the process-wide driver for a connection, creating it on first use.
+    
+    Connections share a driver only when their credentials and driver settings are
+    equal, so a connection with another password or pool configuration gets its own
+    driver instead of silently reusing the first one. The password is part of the key
+    as a digest only.
+    
+    Args:
+        connection: The Neo4jConnection whose settings configure a new driver
+        
+    Returns:
+        The shared Neo4j driver
+    """
+    key = (
+        connection.uri,
+        connection.user,
+        hashlib.sha256(connection.password.encode("utf-8")).hexdigest(),
+        connection.max_connection_lifetime,
+        connection.max_connection_pool_size,
+        connection.connection_acquisition_timeout,
+        connection.connection_timeout,
+        connection.debug_notifications
+    )
+    with _drivers_lock:
+        if key not in _drivers:
+            _drivers[key] = GraphDatabase.driver(
+                connection.uri,
+                auth=(connection.user, connection.password),
+                max_connection_lifetime=connection.max_connection_lifetime,
+                max_connection_pool_size=connection.max_connection_pool_size,
+                connection_acquisition_timeout=connection.connection_acquisition_timeout,
+                connection_timeout=connection.connection_timeout,
+                keep_alive=True,
+                # Without notifications the server skips them and the driver parses none per result
+                notifications_min_severity=None if connection.debug_notifications else "OFF"
+            )
+        return _drivers[key]
+
+_schema_ready: set = set()
+_schema_lock = threading.Lock()
+
+def _ensure_schema(connection: Neo4jConnection) -> None:
+    """
+    Create the data model's constraints and indexes once per server and database.
+    
+    Failures are logged and retried on the next connection.
+    
+    Args:
+        connection: The connected Neo4jConnection
+    """
+    key = (connection.uri, connection.database)
+    with _schema_lock:
+        if key in _schema_ready:
+            return
+        try:
+            DatabaseSchema.create_constraints_and_indexes(connection)
+            _schema_ready.add(key)
+            connection.logger.info("Ensured Neo4j constraints and indexes")
+        except Exception as e:
+            connection.logger.warning(f"Could not create Neo4j constraints and indexes: {e}")
+
+def shutdown_driver() -> None:
+    """
+    Close all shared Neo4j drivers.
+    """
+    with _drivers_lock:
+        for driver in _drivers.values():
+            driver.close()
+        _drivers.clear()
+
+atexit.register(shutdown_driver)
 
 # Create a singleton instance for global use
 _neo4j_instance = None
@@ -167,6 +598,9 @@ def get_neo4j_connection() -> Neo4jConnection:
     """
     Get a singleton instance of the Neo4j connection.
     
+    Scripts run one after another in the same interpreter share this connection
+    and its driver pool; the driver is closed at interpreter exit.
+    
     Returns:
         A Neo4jConnection instance
     """
@@ -5,27 +5,86 @@
 KRS API Client
 
 This module provides a client for the Polish National Court Register (KRS) API.
+
+Use get_krs_api() rather than instantiating KrsAPI directly, so the whole process
+shares one HTTP session and its pooled keep-alive connections.
 """
 
+import copy
 import json
+import time
+import asyncio
+import threading
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Any, Optional, Union
 
+try:
+    import requests_cache
+except ImportError:  # pragma: no cover - optional dependency
+    requests_cache = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover - optional dependency
+    h2 = None
+
 
 class KrsAPI:
     """
     Client for the Polish National Court Register (KRS) API.
     """
 
-    def __init__(self, base_url: str = "https://prs.ms.gov.pl/krs/openApi"):
+    def __init__(self, base_url: str = "https://prs.ms.gov.pl/krs/openApi",
+                 use_cache: bool = True, cache_name: str = "krs_cache",
+                 cache_expire_after: int = 86400, response_cache_size: int = 256):
         """
         Initialize the KRS API client.
 
         Args:
             base_url: The base URL for the KRS API.
+            use_cache: Whether to cache responses on disk (requires requests-cache).
+                Expired responses are still served if the API request fails.
+            cache_name: Name of the SQLite cache database.
+            cache_expire_after: Number of seconds after which cached responses expire.
+            response_cache_size: Number of entity responses kept in memory, least
+                recently used first out; they expire after cache_expire_after as well.
         """
         self.base_url = base_url
-        self.session = requests.Session()
+        if use_cache and requests_cache is not None:
+            self.session = requests_cache.CachedSession(
+                cache_name,
+                backend="sqlite",
+                expire_after=cache_expire_after,
+                stale_if_error=True
+            )
+        else:
+            self.session = requests.Session()
+        # Keep enough pooled connections for concurrent callers sharing this client and
+        # retry throttled or temporarily unavailable requests with exponential backoff; the
+        # last response is returned rather than raised, so raise_for_status() reports it
+        retry = Retry(total=5, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # In-process LRU cache of entity responses keyed by endpoint, holding the time each was fetched
+        self._response_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._response_cache_size = response_cache_size
+        self._response_cache_ttl = cache_expire_after
+        self._response_cache_lock = threading.Lock()
         # Add appropriate headers for API requests
         self.session.headers.update({
             "Accept": "application/json",
@@ -61,11 +120,59 @@ class KrsAPI:
             
             response.raise_for_status()  # Raise an exception for 4XX/5XX responses
             
+            # The API always answers in UTF-8, so the body can be parsed without charset detection
+            if orjson is not None:
+                return orjson.loads(response.content)
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
             raise
 
+    def _make_cached_request(self, endpoint: str) -> Dict:
+        """
+        Make a GET request to the KRS API, reusing a recent response for the same endpoint.
+
+        Every caller gets its own copy of the response, so mutating it does not
+        change the cached one.
+
+        Args:
+            endpoint: The API endpoint to request.
+
+        Returns:
+            The response data as a dictionary.
+        """
+        with self._response_cache_lock:
+            cached = self._response_cache.get(endpoint)
+            if cached is not None and time.monotonic() - cached[0] < self._response_cache_ttl:
+                self._response_cache.move_to_end(endpoint)
+                return copy.deepcopy(cached[1])
+        
+        response = self._make_request(endpoint)
+        
+        with self._response_cache_lock:
+            self._response_cache[endpoint] = (time.monotonic(), response)
+            self._response_cache.move_to_end(endpoint)
+            while len(self._response_cache) > self._response_cache_size:
+                self._response_cache.popitem(last=False)
+        return copy.deepcopy(response)
+
+    def get_many(self, endpoints: List[str], concurrency: int = 16) -> List[Dict]:
+        """
+        Make GET requests to several KRS API endpoints concurrently.
+
+        Args:
+            endpoints: The API endpoints to request.
+            concurrency: Maximum number of requests in flight.
+
+        Returns:
+            The response data of each endpoint, in order.
+
+        Raises:
+            requests.exceptions.RequestException: If any request fails.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(self._make_request, endpoints))
+
     def search_entity(self, 
                      krs_number: Optional[str] = None,
                      nip: Optional[str] = None,
@@ -105,7 +212,7 @@ class KrsAPI:
         Returns:
             Entity details as a dictionary.
         """
-        return self._make_request(f"podmiot/{krs_number}")
+        return self._make_cached_request(f"podmiot/{krs_number}")
 
     def get_entity_section(self, krs_number: str, section_number: int) -> Dict:
         """
@@ -133,7 +240,7 @@ class KrsAPI:
         Returns:
             Representatives data as a dictionary.
         """
-        return self._make_request(f"podmiot/{krs_number}/reprezentanci")
+        return self._make_cached_request(f"podmiot/{krs_number}/reprezentanci")
 
     def get_entity_shareholders(self, krs_number: str) -> Dict:
         """
@@ -145,7 +252,7 @@ class KrsAPI:
         Returns:
             Shareholders data as a dictionary.
         """
-        return self._make_request(f"podmiot/{krs_number}/wspolnicy")
+        return self._make_cached_request(f"podmiot/{krs_number}/wspolnicy")
 
     def get_beneficial_owners(self, krs_number: str) -> Dict:
         """
@@ -160,9 +267,152 @@ class KrsAPI:
         return self._make_request(f"podmiot/{krs_number}/beneficjenci")
 
 
+class AsyncKrsAPI:
+    """
+    Asynchronous client for the Polish National Court Register (KRS) API.
+
+    Requests share one httpx connection pool and are multiplexed over HTTP/2
+    when the h2 package is installed.
+    """
+
+    def __init__(self, base_url: str = "https://prs.ms.gov.pl/krs/openApi",
+                 max_connections: int = 32, timeout: float = 30.0):
+        """
+        Initialize the asynchronous KRS API client.
+
+        Args:
+            base_url: The base URL for the KRS API.
+            max_connections: Maximum number of pooled connections.
+            timeout: Request timeout in seconds.
+
+        Raises:
+            ImportError: If httpx is not installed.
+        """
+        if httpx is None:
+            raise ImportError("AsyncKrsAPI requires httpx (pip install 'httpx[http2]')")
+        
+        self.base_url = base_url
+        self._client = httpx.AsyncClient(
+            http2=h2 is not None,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=timeout,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json"
+            }
+        )
+
+    async def __aenter__(self) -> "AsyncKrsAPI":
+        """
+        Enter the async runtime context, returning this client.
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        """
+        Exit the async runtime context, closing the client.
+        """
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Close the underlying HTTP connections.
+        """
+        await self._client.aclose()
+
+    async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Make a GET request to the KRS API.
+
+        Args:
+            endpoint: The API endpoint to request.
+            params: Query parameters to include in the request.
+
+        Returns:
+            The response data as a dictionary.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        try:
+            response = await self._client.get(f"{self.base_url}/{endpoint}", params=params)
+            response.raise_for_status()  # Raise an exception for 4XX/5XX responses
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"Request failed: {e}")
+            raise
+
+    async def get_entity_details(self, krs_number: str) -> Dict:
+        """
+        Get detailed information about an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Entity details as a dictionary.
+        """
+        return await self._make_request(f"podmiot/{krs_number}")
+
+    async def get_entity_representatives(self, krs_number: str) -> Dict:
+        """
+        Get information about representatives of an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Representatives data as a dictionary.
+        """
+        return await self._make_request(f"podmiot/{krs_number}/reprezentanci")
+
+    async def get_entity_shareholders(self, krs_number: str) -> Dict:
+        """
+        Get information about shareholders of an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Shareholders data as a dictionary.
+        """
+        return await self._make_request(f"podmiot/{krs_number}/wspolnicy")
+
+    async def get_entities_bulk(self, krs_numbers: List[str]) -> List[Dict]:
+        """
+        Get the details of several entities concurrently.
+
+        Args:
+            krs_numbers: KRS numbers of the entities.
+
+        Returns:
+            Entity details as dictionaries, in the order of the KRS numbers.
+        """
+        return list(await asyncio.gather(*(self.get_entity_details(krs) for krs in krs_numbers)))
+
+
+# Create a singleton instance for global use
+_krs_api_instance: Optional[KrsAPI] = None
+
+def get_krs_api() -> KrsAPI:
+    """
+    Get a singleton instance of the KRS API client.
+    
+    Sharing one client lets all callers reuse the same HTTP connection pool.
+    
+    Returns:
+        A KrsAPI instance
+    """
+    global _krs_api_instance
+    if _krs_api_instance is None:
+        _krs_api_instance = KrsAPI()
+    return _krs_api_instance
+
+
 if __name__ == "__main__":
     # Example usage
-    api = KrsAPI()
+    api = get_krs_api()
     
     try:
         # Search for an entity
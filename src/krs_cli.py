@@ -11,16 +11,19 @@ import argparse
 import json
 import os
 import sys
-from typing import Dict, List, Any, Optional
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 from dotenv import load_dotenv
 
-# Add the current directory to the path
-current_dir = Path(__file__).resolve().parent.parent
-sys.path.append(str(current_dir))
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-# Import other modules
-from src.krs_api import KrsAPI
+# The API client (and the HTTP stack behind it) is imported when a command runs,
+# so --help and argument errors return without loading it
+if TYPE_CHECKING:
+    from src.krs_api import KrsAPI
 
 
 def main():
@@ -34,31 +37,15 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
-    # Create subparsers for different commands
+    # Create subparsers for different commands; only the requested command's parser is
+    # built, all of them for the overall help and unknown commands
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
-    
-    # Search command
-    search_parser = subparsers.add_parser("search", help="Search for an entity")
-    search_parser.add_argument("--krs", type=str, help="KRS number")
-    search_parser.add_argument("--nip", type=str, help="NIP number")
-    search_parser.add_argument("--regon", type=str, help="REGON number")
-    search_parser.add_argument("--name", type=str, help="Entity name")
-    search_parser.add_argument("--output", type=str, help="Output file path (JSON)")
-    
-    # Details command
-    details_parser = subparsers.add_parser("details", help="Get entity details")
-    details_parser.add_argument("--krs", type=str, required=True, help="KRS number")
-    details_parser.add_argument("--output", type=str, help="Output file path (JSON)")
-    
-    # Representatives command
-    reps_parser = subparsers.add_parser("representatives", help="Get entity representatives")
-    reps_parser.add_argument("--krs", type=str, required=True, help="KRS number")
-    reps_parser.add_argument("--output", type=str, help="Output file path (JSON)")
-    
-    # Shareholders command
-    shareholders_parser = subparsers.add_parser("shareholders", help="Get entity shareholders")
-    shareholders_parser.add_argument("--krs", type=str, required=True, help="KRS number")
-    shareholders_parser.add_argument("--output", type=str, help="Output file path (JSON)")
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in _SUBPARSER_BUILDERS:
+        _SUBPARSER_BUILDERS[command](subparsers)
+    else:
+        for build_subparser in _SUBPARSER_BUILDERS.values():
+            build_subparser(subparsers)
     
     # Parse arguments
     args = parser.parse_args()
@@ -69,24 +56,36 @@ def main():
         return
     
     # Initialize the KRS API client
-    api = KrsAPI()
+    from src.krs_api import get_krs_api
+    api = get_krs_api()
     
     try:
         # Execute the appropriate command
-        if args.command == "search":
-            handle_search_command(api, args)
-        elif args.command == "details":
-            handle_details_command(api, args)
-        elif args.command == "representatives":
-            handle_representatives_command(api, args)
-        elif args.command == "shareholders":
-            handle_shareholders_command(api, args)
+        _COMMAND_HANDLERS[args.command](api, args)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
-def handle_search_command(api: KrsAPI, args) -> None:
+def build_search_parser(subparsers) -> None:
+    """Add the search command parser."""
+    search_parser = subparsers.add_parser("search", help="Search for an entity")
+    search_parser.add_argument("--krs", type=str, help="KRS number")
+    search_parser.add_argument("--nip", type=str, help="NIP number")
+    search_parser.add_argument("--regon", type=str, help="REGON number")
+    search_parser.add_argument("--name", type=str, help="Entity name")
+    search_parser.add_argument("--output", type=str, help="Output file path (JSON)")
+
+
+def build_krs_list_parser(subparsers, command: str, help_text: str) -> None:
+    """Add the parser of a command taking one or more KRS numbers."""
+    command_parser = subparsers.add_parser(command, help=help_text)
+    command_parser.add_argument("--krs", type=str, help="KRS number (or a comma-separated list)")
+    command_parser.add_argument("--batch-file", type=str, help="File with one KRS number per line")
+    command_parser.add_argument("--output", type=str, help="Output file path (JSON)")
+
+
+def handle_search_command(api: "KrsAPI", args) -> None:
     """Handle the search command."""
     # Validate that at least one search parameter was provided
     if not any([args.krs, args.nip, args.regon, args.name]):
@@ -105,35 +104,86 @@ def handle_search_command(api: KrsAPI, args) -> None:
     handle_output(results, args.output)
 
 
-def handle_details_command(api: KrsAPI, args) -> None:
+def handle_details_command(api: "KrsAPI", args) -> None:
     """Handle the details command."""
     # Get entity details
-    details = api.get_entity_details(args.krs)
+    details = fetch_for_krs_numbers(api, "get_entity_details", krs_numbers_from_args(args))
     
     # Output the results
     handle_output(details, args.output)
 
 
-def handle_representatives_command(api: KrsAPI, args) -> None:
+def handle_representatives_command(api: "KrsAPI", args) -> None:
     """Handle the representatives command."""
     # Get entity representatives
-    representatives = api.get_entity_representatives(args.krs)
+    representatives = fetch_for_krs_numbers(api, "get_entity_representatives", krs_numbers_from_args(args))
     
     # Output the results
     handle_output(representatives, args.output)
 
 
-def handle_shareholders_command(api: KrsAPI, args) -> None:
+def handle_shareholders_command(api: "KrsAPI", args) -> None:
     """Handle the shareholders command."""
     # Get entity shareholders
-    shareholders = api.get_entity_shareholders(args.krs)
+    shareholders = fetch_for_krs_numbers(api, "get_entity_shareholders", krs_numbers_from_args(args))
     
     # Output the results
     handle_output(shareholders, args.output)
 
 
-def handle_output(data: Dict, output_path: Optional[str] = None) -> None:
+def krs_numbers_from_args(args) -> List[str]:
+    """Collect the KRS numbers given with --krs and --batch-file."""
+    krs_numbers = [krs.strip() for krs in (args.krs or "").split(",") if krs.strip()]
+    
+    if args.batch_file:
+        with open(args.batch_file, "r", encoding="utf-8") as f:
+            krs_numbers.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    
+    if not krs_numbers:
+        print("Error: At least one KRS number (--krs or --batch-file) must be provided")
+        sys.exit(1)
+    
+    return krs_numbers
+
+
+def fetch_for_krs_numbers(api: "KrsAPI", method_name: str, krs_numbers: List[str]) -> Any:
+    """
+    Call a KRS API method for each KRS number.
+    
+    A single KRS number returns the response itself. Several are fetched concurrently,
+    at most KRS_API_RATE_LIMIT at a time, by a thread pool sharing the client's session
+    (and so its retries and caches), and return a list of responses in the order of
+    the KRS numbers.
+    """
+    if len(krs_numbers) == 1:
+        return getattr(api, method_name)(krs_numbers[0])
+    
+    concurrency = int(os.getenv("KRS_API_RATE_LIMIT", 5))
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(getattr(api, method_name), krs_numbers))
+
+
+def handle_output(data: Any, output_path: Optional[str] = None) -> None:
     """Handle the output of data."""
+    # Serialize straight to UTF-8 bytes when orjson is available
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        if output_path:
+            with open(output_path, "wb") as f:
+                f.write(payload)
+            print(f"Output written to {output_path}")
+        else:
+            buffer = getattr(sys.stdout, "buffer", None)
+            if buffer is None:
+                # Text-only stdout replacement (e.g. io.StringIO or a capture)
+                sys.stdout.write(payload.decode() + "\n")
+            else:
+                sys.stdout.flush()
+                buffer.write(payload + b"\n")
+                buffer.flush()
+        return
+    
     # Format the data as JSON
     formatted_data = json.dumps(data, indent=2, ensure_ascii=False)
     
@@ -146,5 +196,24 @@ def handle_output(data: Dict, output_path: Optional[str] = None) -> None:
         print(formatted_data)
 
 
+
+# Subcommand parser builders and handlers, keyed by command name
+_SUBPARSER_BUILDERS = {
+    "search": build_search_parser,
+    "details": lambda subparsers: build_krs_list_parser(subparsers, "details", "Get entity details"),
+    "representatives": lambda subparsers: build_krs_list_parser(
+        subparsers, "representatives", "Get entity representatives"),
+    "shareholders": lambda subparsers: build_krs_list_parser(
+        subparsers, "shareholders", "Get entity shareholders"),
+}
+
+_COMMAND_HANDLERS = {
+    "search": handle_search_command,
+    "details": handle_details_command,
+    "representatives": handle_representatives_command,
+    "shareholders": handle_shareholders_command,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -10,83 +10,143 @@ This module provides utilities for exporting KRS data to various formats.
 import os
 import json
 import csv
-import xml.dom.minidom
 import xmltodict
-from typing import Dict, List, Any, Optional, Union
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - optional dependency
+    pd = None
+
+# Write buffer of the export files, so large exports reach the disk in few write() calls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Row count from which CSV exports are written by pandas' C writer when it is installed
+PANDAS_CSV_MIN_ROWS = 1000
+
+
+def _check_csv_fields(row: Dict, field_set: set) -> None:
+    """Raise ValueError like csv.DictWriter when a row has keys that are not CSV fields."""
+    wrong_fields = row.keys() - field_set
+    if wrong_fields:
+        raise ValueError("dict contains fields not in fieldnames: "
+                         + ", ".join([repr(x) for x in wrong_fields]))
+
 
 class KrsExporter:
     """Utilities for exporting KRS data to various formats."""
     
     @staticmethod
-    def export_json(data: Dict, output_path: str) -> None:
+    def export_json(data: Dict, output_path: str, make_dirs: bool = True) -> None:
         """Export data to a JSON file.
         
         Args:
             data: Data to export
             output_path: Path to the output file
+            make_dirs: Create the directory of the output file if needed (default: True)
             
         Raises:
             IOError: If there is an error writing to the file
         """
         # Ensure the directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        if make_dirs:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        
+        # Write the data to the file, serializing straight to UTF-8 bytes when orjson is available
+        if orjson is not None:
+            Path(output_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            return
         
-        # Write the data to the file
-        with open(output_path, "w", encoding="utf-8") as f:
+        with open(output_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
     
     @staticmethod
-    def export_csv(data: List[Dict], output_path: str, fieldnames: Optional[List[str]] = None) -> None:
+    def export_csv(data: List[Dict], output_path: str, fieldnames: Optional[List[str]] = None,
+                   make_dirs: bool = True) -> None:
         """Export data to a CSV file.
         
         Args:
             data: List of dictionaries to export
             output_path: Path to the output file
             fieldnames: List of field names to include (default: all fields)
+            make_dirs: Create the directory of the output file if needed (default: True)
             
         Raises:
             IOError: If there is an error writing to the file
+            ValueError: If a row has fields that are not in fieldnames
         """
         # Ensure the directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        if make_dirs:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
         
         # If fieldnames are not provided, use all keys from the first item
         if fieldnames is None and data and len(data) > 0:
             fieldnames = list(data[0].keys())
         
-        # Write the data to the file
-        with open(output_path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        # Write large exports column-wise with pandas; object columns keep the values as they are
+        # (no float coercion of integer columns with gaps) and missing fields become empty values
+        if pd is not None and fieldnames and len(data) >= PANDAS_CSV_MIN_ROWS:
+            field_set = set(fieldnames)
+            for row in data:
+                _check_csv_fields(row, field_set)
+            pd.DataFrame(data, columns=fieldnames, dtype=object).to_csv(
+                output_path, index=False, encoding="utf-8", lineterminator="\r\n"
+            )
+            return
+        
+        # Write the data to the file, projecting each row to a tuple in field order in C;
+        # rows missing a field fall back to empty values like csv.DictWriter
+        with open(output_path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+            if not fieldnames:
+                return
+            
+            getter = itemgetter(*fieldnames)
+            field_set = set(fieldnames)
+            field_count = len(field_set)
+            
+            def row_values(row: Dict) -> tuple:
+                try:
+                    values = getter(row)
+                except KeyError:
+                    _check_csv_fields(row, field_set)
+                    return tuple(row.get(field, "") for field in fieldnames)
+                # A row holding every field has extra keys only if it is longer
+                if len(row) != field_count:
+                    _check_csv_fields(row, field_set)
+                return values if len(fieldnames) > 1 else (values,)
+            
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(map(row_values, data))
     
     @staticmethod
-    def export_xml(data: Dict, output_path: str, root_element: str = "root") -> None:
+    def export_xml(data: Dict, output_path: str, root_element: str = "root", make_dirs: bool = True) -> None:
         """Export data to an XML file.
         
         Args:
             data: Data to export
             output_path: Path to the output file
             root_element: Name of the root XML element (default: "root")
+            make_dirs: Create the directory of the output file if needed (default: True)
             
         Raises:
             IOError: If there is an error writing to the file
         """
         # Ensure the directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
-        
-        # Convert the data to XML
-        xml_data = xmltodict.unparse({root_element: data}, pretty=True)
-        
-        # Format the XML with proper indentation
-        dom = xml.dom.minidom.parseString(xml_data)
-        formatted_xml = dom.toprettyxml(indent="  ")
+        if make_dirs:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
         
-        # Write the formatted XML to the file
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(formatted_xml)
+        # Convert the data to indented XML, streaming the UTF-8 encoded output straight to the file
+        with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            xmltodict.unparse({root_element: data}, output=f, encoding="utf-8", pretty=True, indent="  ")
     
     @staticmethod
     def export_representatives(representatives: Dict, output_dir: str, entity_krs: str) -> Dict[str, str]:
@@ -107,19 +167,17 @@ class KrsExporter:
         os.makedirs(output_dir, exist_ok=True)
         
         # Define output file paths
-        output_files = {
-            "json": os.path.join(output_dir, f"{entity_krs}_representatives.json"),
-            "csv": os.path.join(output_dir, f"{entity_krs}_representatives.csv"),
-            "xml": os.path.join(output_dir, f"{entity_krs}_representatives.xml")
-        }
+        output_files = KrsExporter._output_files(output_dir, entity_krs, "representatives", ("json", "csv", "xml"))
         
         # Extract the list of representatives
         reps_list = representatives.get("reprezentanci", [])
         
         # Export to different formats
-        KrsExporter.export_json(representatives, output_files["json"])
-        KrsExporter.export_csv(reps_list, output_files["csv"])
-        KrsExporter.export_xml(representatives, output_files["xml"], "representatives")
+        KrsExporter._export_concurrently([
+            (KrsExporter.export_json, representatives, output_files["json"]),
+            (KrsExporter.export_csv, reps_list, output_files["csv"]),
+            (KrsExporter.export_xml, representatives, output_files["xml"], "representatives")
+        ])
         
         return output_files
     
@@ -142,19 +200,17 @@ class KrsExporter:
         os.makedirs(output_dir, exist_ok=True)
         
         # Define output file paths
-        output_files = {
-            "json": os.path.join(output_dir, f"{entity_krs}_shareholders.json"),
-            "csv": os.path.join(output_dir, f"{entity_krs}_shareholders.csv"),
-            "xml": os.path.join(output_dir, f"{entity_krs}_shareholders.xml")
-        }
+        output_files = KrsExporter._output_files(output_dir, entity_krs, "shareholders", ("json", "csv", "xml"))
         
         # Extract the list of shareholders
         shareholder_list = shareholders.get("wspolnicy", [])
         
         # Export to different formats
-        KrsExporter.export_json(shareholders, output_files["json"])
-        KrsExporter.export_csv(shareholder_list, output_files["csv"])
-        KrsExporter.export_xml(shareholders, output_files["xml"], "shareholders")
+        KrsExporter._export_concurrently([
+            (KrsExporter.export_json, shareholders, output_files["json"]),
+            (KrsExporter.export_csv, shareholder_list, output_files["csv"]),
+            (KrsExporter.export_xml, shareholders, output_files["xml"], "shareholders")
+        ])
         
         return output_files
     
@@ -177,10 +233,7 @@ class KrsExporter:
         os.makedirs(output_dir, exist_ok=True)
         
         # Define output file paths
-        output_files = {
-            "json": os.path.join(output_dir, f"{entity_krs}_summary.json"),
-            "xml": os.path.join(output_dir, f"{entity_krs}_summary.xml")
-        }
+        output_files = KrsExporter._output_files(output_dir, entity_krs, "summary", ("json", "xml"))
         
         # Create a summary from the entity data
         summary = {
@@ -195,7 +248,43 @@ class KrsExporter:
         }
         
         # Export to different formats
-        KrsExporter.export_json(summary, output_files["json"])
-        KrsExporter.export_xml(summary, output_files["xml"], "entity_summary")
+        KrsExporter._export_concurrently([
+            (KrsExporter.export_json, summary, output_files["json"]),
+            (KrsExporter.export_xml, summary, output_files["xml"], "entity_summary")
+        ])
         
         return output_files
+    
+    @staticmethod
+    def _output_files(output_dir: str, entity_krs: str, kind: str, formats: Tuple[str, ...]) -> Dict[str, str]:
+        """Build the output file paths of an entity export, joining the directory once.
+        
+        Args:
+            output_dir: Directory for output files
+            entity_krs: KRS number of the entity
+            kind: Kind of the exported data, used in the file names
+            formats: File formats, used as keys and extensions
+            
+        Returns:
+            Dictionary of output file paths keyed by format
+        """
+        prefix = os.path.join(output_dir, f"{entity_krs}_{kind}.")
+        return {fmt: prefix + fmt for fmt in formats}
+    
+    @staticmethod
+    def _export_concurrently(exports: List[tuple]) -> None:
+        """Run independent exports to different files in parallel threads.
+        
+        The files are written into an existing directory, so the exports skip
+        creating it.
+        
+        Args:
+            exports: Tuples of an export function followed by its arguments
+            
+        Raises:
+            IOError: If there is an error writing to any of the files
+        """
+        with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+            futures = [executor.submit(export, *args, make_dirs=False) for export, *args in exports]
+            for future in futures:
+                future.result()
@@ -8,30 +8,76 @@ This module provides HTTP client functionality for the KRS API.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
 import logging
+import random
+import threading
 import time
+from email.utils import parsedate_to_datetime
 from typing import Dict, Any, Optional, Union
 from urllib.parse import urljoin
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import requests_cache
+except ImportError:  # pragma: no cover - optional dependency
+    requests_cache = None
+
 
 class KrsHttpClient:
     """HTTP client for the KRS API with rate limiting and error handling."""
     
-    def __init__(self, base_url: str, rate_limit: int = 5):
+    def __init__(self, base_url: str, rate_limit: int = 5, max_retries: int = 5,
+                 use_cache: bool = True, cache_name: str = "krs_http_cache",
+                 cache_expire_after: int = 3600):
         """Initialize the HTTP client.
         
         Args:
             base_url: Base URL for the KRS API
             rate_limit: Maximum number of requests per second (default: 5)
+            max_retries: Maximum number of retries of a throttled (429) request (default: 5)
+            use_cache: Whether to cache GET responses on disk (requires requests-cache)
+                (default: True)
+            cache_name: Name of the SQLite cache database (default: "krs_http_cache")
+            cache_expire_after: Seconds after which cached responses expire (default: 3600)
         """
         self.base_url = base_url
         self.rate_limit = rate_limit
-        self.session = requests.Session()
+        self.max_retries = max_retries
+        if use_cache and requests_cache is not None:
+            # Expired responses are revalidated with their ETag / Last-Modified headers
+            self.session = requests_cache.CachedSession(
+                cache_name,
+                backend="sqlite",
+                expire_after=cache_expire_after,
+                stale_if_error=True
+            )
+        else:
+            self.session = requests.Session()
+        # Keep a connection per request the rate limit lets through concurrently; throttled
+        # requests are retried by _request, so the adapter itself does not retry
+        pool_size = max(10, rate_limit * 2)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             "Accept": "application/json",
+            # Compressed JSON responses (brotli only when a decoder is installed)
+            "Accept-Encoding": DEFAULT_ACCEPT_ENCODING,
             "Content-Type": "application/json"
         })
-        self.last_request_time = 0
+        
+        # Token bucket holding up to one second of request credit, in nanoseconds
+        self._interval_ns = 1_000_000_000 // rate_limit if rate_limit > 0 else 0
+        self._burst_ns = self._interval_ns * rate_limit
+        self._credit_ns = self._burst_ns
+        self._last_ns = time.monotonic_ns()
+        self._rate_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
     
     def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
@@ -81,68 +127,114 @@ class KrsHttpClient:
         Raises:
             requests.exceptions.RequestException: If the request fails
         """
-        # Apply rate limiting
-        self._apply_rate_limit()
-        
         # Build the full URL
         url = urljoin(self.base_url, endpoint)
         
-        # Log the request
-        self.logger.debug(f"Making {method} request to {url}")
-        if params:
-            self.logger.debug(f"Parameters: {params}")
-        if data:
-            self.logger.debug(f"Data: {data}")
+        # Log the request (formatted only when debug logging is enabled)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Making %s request to %s", method, url)
+            if params:
+                self.logger.debug("Parameters: %s", params)
+            if data:
+                self.logger.debug("Data: %s", data)
         
-        try:
-            # Make the request
-            if method == "GET":
-                response = self.session.get(url, params=params)
-            elif method == "POST":
-                response = self.session.post(url, params=params, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Update the last request time
-            self.last_request_time = time.time()
+        for attempt in range(self.max_retries + 1):
+            # Apply rate limiting
+            self._apply_rate_limit()
             
-            # Check for HTTP errors
-            response.raise_for_status()
-            
-            # Parse the response as JSON
-            return response.json()
+            try:
+                # Make the request
+                if method == "GET":
+                    response = self.session.get(url, params=params)
+                elif method == "POST":
+                    response = self.session.post(url, params=params, json=data)
+                else:
+                    raise ValueError(f"Unsupported HTTP method: {method}")
+                
+                # Responses served by requests-cache did not reach the API
+                if getattr(response, "from_cache", False):
+                    self._refund_rate_limit()
+                
+                # Check for HTTP errors
+                response.raise_for_status()
+                
+                # Parse the response as JSON (the API always answers in UTF-8)
+                if orjson is not None:
+                    return orjson.loads(response.content)
+                return response.json()
+                
+            except requests.exceptions.HTTPError as e:
+                self.logger.error("HTTP error: %s", e)
+                # Handle specific API errors
+                if e.response.status_code == 429 and attempt < self.max_retries:
+                    delay = self._retry_delay(e.response, attempt)
+                    self.logger.warning("Rate limit exceeded. Retrying in %.2f seconds.", delay)
+                    time.sleep(delay)
+                    continue
+                raise
+            except requests.exceptions.ConnectionError as e:
+                self.logger.error("Connection error: %s", e)
+                raise
+            except requests.exceptions.Timeout as e:
+                self.logger.error("Timeout error: %s", e)
+                raise
+            except requests.exceptions.RequestException as e:
+                self.logger.error("Request error: %s", e)
+                raise
+            except Exception as e:
+                self.logger.error("Unexpected error: %s", e)
+                raise
+    
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Compute how long to wait before retrying a throttled request.
+        
+        Args:
+            response: The 429 response
+            attempt: Number of the failed attempt, starting at 0
             
-        except requests.exceptions.HTTPError as e:
-            self.logger.error(f"HTTP error: {e}")
-            # Handle specific API errors
-            if e.response.status_code == 429:
-                self.logger.warning("Rate limit exceeded. Retrying after delay.")
-                time.sleep(5)  # Wait 5 seconds before retrying
-                return self._request(method, endpoint, params, data)
-            raise
-        except requests.exceptions.ConnectionError as e:
-            self.logger.error(f"Connection error: {e}")
-            raise
-        except requests.exceptions.Timeout as e:
-            self.logger.error(f"Timeout error: {e}")
-            raise
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request error: {e}")
-            raise
-        except Exception as e:
-            self.logger.error(f"Unexpected error: {e}")
-            raise
+        Returns:
+            The Retry-After delay when the server sent one, otherwise a jittered
+            exponential backoff capped at 60 seconds
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        
+        return min(60.0, 0.5 * 2 ** attempt) + random.uniform(0, 0.25)
     
     def _apply_rate_limit(self) -> None:
-        """Apply rate limiting to respect the API's limits."""
+        """Apply rate limiting to respect the API's limits.
+        
+        Requests take one interval of credit from a token bucket refilled on the
+        monotonic clock, so bursts up to the rate limit pass without sleeping. When
+        the bucket is empty the credit goes negative, reserving the next free slot
+        for this caller, and concurrent callers queue up behind it.
+        """
+        if self.rate_limit <= 0:
+            return
+        
+        with self._rate_lock:
+            now_ns = time.monotonic_ns()
+            self._credit_ns = min(self._burst_ns, self._credit_ns + now_ns - self._last_ns) - self._interval_ns
+            self._last_ns = now_ns
+            wait_ns = -self._credit_ns
+        
+        if wait_ns > 0:
+            self.logger.debug("Rate limiting: sleeping for %.2f seconds", wait_ns / 1e9)
+            time.sleep(wait_ns / 1e9)
+    
+    def _refund_rate_limit(self) -> None:
+        """Return the credit taken by _apply_rate_limit for a request that did not reach the API."""
         if self.rate_limit <= 0:
             return
-            
-        current_time = time.time()
-        elapsed_time = current_time - self.last_request_time
-        min_interval = 1.0 / self.rate_limit
         
-        if elapsed_time < min_interval:
-            sleep_time = min_interval - elapsed_time
-            self.logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+        with self._rate_lock:
+            self._credit_ns = min(self._burst_ns, self._credit_ns + self._interval_ns)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KRS Mock API Client
+
+This module provides a drop-in replacement for the KRS API client that serves
+canned responses, for demos and tests without network access.
+"""
+
+from collections import ChainMap
+from typing import Dict, Optional
+
+from src.mock.responses import get_mock_responses
+
+
+class KrsMockAPI:
+    """
+    Mock client for the Polish National Court Register (KRS) API.
+    """
+
+    def __init__(self, mock_responses: Optional[Dict[str, Dict]] = None, include_defaults: bool = True):
+        """
+        Initialize the mock KRS API client.
+
+        Args:
+            mock_responses: Additional responses keyed by endpoint; they take
+                precedence over the bundled mock responses.
+            include_defaults: Whether to serve the bundled mock responses; without
+                them only the given and added responses are served (default: True)
+        """
+        # Custom responses are layered over the shared, read-only bundled ones
+        self.mock_responses = ChainMap(dict(mock_responses or {}))
+        if include_defaults:
+            self.mock_responses.maps.append(get_mock_responses())
+
+    def add_mock_response(self, endpoint: str, response: Dict) -> None:
+        """
+        Add or replace the response of an endpoint for this client.
+
+        Args:
+            endpoint: The mock endpoint key, e.g. "details:0000010078".
+            response: The response data.
+        """
+        self.mock_responses[endpoint] = response
+
+    def _make_request(self, endpoint: str, method: str = "GET", params: Optional[Dict] = None,
+                      data: Optional[Dict] = None) -> Dict:
+        """
+        Look up the mock response of an endpoint.
+
+        The response is returned without a copy, so it is shared by every client
+        and must be treated as read-only.
+
+        Args:
+            endpoint: The mock endpoint key.
+            method: The HTTP method (ignored).
+            params: Query parameters (ignored).
+            data: JSON data for the request body (ignored).
+
+        Returns:
+            The response data as a dictionary, empty for unknown endpoints.
+        """
+        return self.mock_responses.get(endpoint, {})
+
+    def search_entity(self,
+                      krs_number: Optional[str] = None,
+                      nip: Optional[str] = None,
+                      regon: Optional[str] = None,
+                      name: Optional[str] = None) -> Dict:
+        """
+        Search for entities in the mock data.
+
+        Args:
+            krs_number: KRS number of the entity.
+            nip: NIP (tax identification number) of the entity.
+            regon: REGON (statistical number) of the entity.
+            name: Name of the entity.
+
+        Returns:
+            Search results as a dictionary; no match returns empty results.
+        """
+        for kind, value in (("krs", krs_number), ("nip", nip), ("regon", regon), ("name", name)):
+            if value and f"search:{kind}:{value}" in self.mock_responses:
+                return self._make_request(f"search:{kind}:{value}")
+        return self._make_request("search:default")
+
+    def get_entity_details(self, krs_number: str) -> Dict:
+        """
+        Get detailed information about an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Entity details as a dictionary.
+        """
+        return self._make_request(f"details:{krs_number}")
+
+    def get_entity_section(self, krs_number: str, section_number: int) -> Dict:
+        """
+        Get information from a specific section of an entity's extract.
+
+        Args:
+            krs_number: KRS number of the entity.
+            section_number: Section number (1-6).
+
+        Returns:
+            Section data as a dictionary.
+        """
+        if section_number not in range(1, 7):
+            raise ValueError("Section number must be between 1 and 6")
+
+        return self._make_request(f"dzial{section_number}:{krs_number}")
+
+    def get_entity_representatives(self, krs_number: str) -> Dict:
+        """
+        Get information about representatives of an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Representatives data as a dictionary.
+        """
+        return self._make_request(f"reprezentanci:{krs_number}")
+
+    def get_entity_shareholders(self, krs_number: str) -> Dict:
+        """
+        Get information about shareholders of an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Shareholders data as a dictionary.
+        """
+        return self._make_request(f"wspolnicy:{krs_number}")
+
+    def get_beneficial_owners(self, krs_number: str) -> Dict:
+        """
+        Get information about beneficial owners of an entity.
+
+        Args:
+            krs_number: KRS number of the entity.
+
+        Returns:
+            Beneficial owners data as a dictionary.
+        """
+        return self._make_request(f"beneficjenci:{krs_number}")
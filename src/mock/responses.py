@@ -4,127 +4,88 @@
 """
 Mock Responses for KRS API
 
-This module provides mock responses for the KRS API client.
+This module provides mock responses for the KRS API client. The responses are
+stored in responses.json next to this module and loaded on first use.
 """
 
-# Mock responses for the KRS API
-mock_responses = {
-    # Cyfrowy Polsat (example data)
-    "details:0000010078": {
-        "krs": "0000010078",
-        "nazwa": "CYFROWY POLSAT SPĂ“ĹKA AKCYJNA",
-        "nip": "7961810732",
-        "regon": "670925160",
-        "status": "Aktywny",
-        "adres": "ul. ĹUBINOWA 4A, 03-878 WARSZAWA",
-        "formaFrawna": "SPĂ“ĹKA AKCYJNA",
-        "dataRejestracji": "2001-04-03",
-    },
-    
-    # Cyfrowy Polsat representatives
-    "reprezentanci:0000010078": {
-        "reprezentanci": [
-            {
-                "imie": "Jan",
-                "nazwisko": "Kowalski",
-                "funkcja": "PREZES ZARZÄ„DU"
-            },
-            {
-                "imie": "Anna",
-                "nazwisko": "Nowak",
-                "funkcja": "CZĹONEK ZARZÄ„DU"
-            },
-            {
-                "imie": "Piotr",
-                "nazwisko": "WiĹ›niewski",
-                "funkcja": "CZĹONEK ZARZÄ„DU"
-            }
-        ]
-    },
-    
-    # Cyfrowy Polsat shareholders
-    "wspolnicy:0000010078": {
-        "wspolnicy": [
-            {
-                "nazwa": "TIVI FOUNDATION",
-                "typ": "corporate",
-                "udzialy": "57.66%"
-            },
-            {
-                "nazwa": "REDDEV INVESTMENTS LIMITED",
-                "typ": "corporate",
-                "udzialy": "0.27%"
-            },
-            {
-                "nazwa": "AKCJE WĹASNE",
-                "typ": "corporate",
-                "udzialy": "7.86%"
-            },
-            {
-                "nazwa": "POZOSTALI AKCJONARIUSZE",
-                "typ": "corporate",
-                "udzialy": "34.21%"
-            }
-        ]
-    },
-    
-    # Search by KRS
-    "search:krs:0000010078": {
-        "wyniki": [
-            {
-                "krs": "0000010078",
-                "nazwa": "CYFROWY POLSAT SPĂ“ĹKA AKCYJNA",
-                "nip": "7961810732",
-                "regon": "670925160",
-                "status": "Aktywny",
-                "adres": "ul. ĹUBINOWA 4A, 03-878 WARSZAWA"
-            }
-        ],
-        "liczbaWynikow": 1
-    },
-    
-    # Search by name
-    "search:name:Cyfrowy Polsat": {
-        "wyniki": [
-            {
-                "krs": "0000010078",
-                "nazwa": "CYFROWY POLSAT SPĂ“ĹKA AKCYJNA",
-                "nip": "7961810732",
-                "regon": "670925160",
-                "status": "Aktywny",
-                "adres": "ul. ĹUBINOWA 4A, 03-878 WARSZAWA"
-            }
-        ],
-        "liczbaWynikow": 1
-    },
-    
-    # Empty search results
-    "search:default": {
-        "wyniki": [],
-        "liczbaWynikow": 0
-    },
-    
-    # Polkomtel (example data for relationship testing)
-    "details:0000419430": {
-        "krs": "0000419430",
-        "nazwa": "POLKOMTEL SPĂ“ĹKA Z OGRANICZONÄ„ ODPOWIEDZIALNOĹšCIÄ„",
-        "nip": "5271037727",
-        "regon": "011307968",
-        "status": "Aktywny",
-        "adres": "ul. KONSTRUKTORSKA 4, 02-673 WARSZAWA",
-        "formaFrawna": "SPĂ“ĹKA Z OGRANICZONÄ„ ODPOWIEDZIALNOĹšCIÄ„",
-        "dataRejestracji": "2012-01-03",
-    },
-    
-    # Telewizja Polsat (example data for relationship testing)
-    "details:0000388216": {
-        "krs": "0000388216",
-        "nazwa": "TELEWIZJA POLSAT SPĂ“ĹKA Z OGRANICZONÄ„ ODPOWIEDZIALNOĹšCIÄ„",
-        "nip": "1130054762",
-        "regon": "930171612",
-        "status": "Aktywny",
-        "adres": "ul. OSTROBRAMSKA 77, 04-175 WARSZAWA",
-        "formaFrawna": "SPĂ“ĹKA Z OGRANICZONÄ„ ODPOWIEDZIALNOĹšCIÄ„",
-        "dataRejestracji": "2011-07-19",
-    }
-}
+import sys
+import json
+import types
+import functools
+from pathlib import Path
+from typing import Any, Dict, Mapping
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Mock responses keyed by "<kind>:<lookup>", e.g. "details:0000010078"
+_RESPONSES_PATH = Path(__file__).with_suffix(".json")
+
+# Fields holding identifiers that repeat across the responses
+_INTERNED_FIELDS = frozenset({"krs", "nip", "regon", "typ"})
+
+
+def _intern_identifiers(value: Any) -> Any:
+    """
+    Intern the field names and the identifier values of a decoded response.
+
+    Args:
+        value: The decoded JSON value
+
+    Returns:
+        The value, with equal identifiers sharing one string object
+    """
+    if isinstance(value, dict):
+        return {
+            sys.intern(key): sys.intern(item) if key in _INTERNED_FIELDS and isinstance(item, str)
+            else _intern_identifiers(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_intern_identifiers(item) for item in value]
+    return value
+
+
+@functools.lru_cache(maxsize=1)
+def get_mock_responses() -> Mapping[str, Dict]:
+    """
+    Load the mock responses once.
+
+    The keys, field names and identifiers (KRS, NIP, REGON, type) are interned,
+    so comparing them mostly compares pointers, and the mapping is read-only, so
+    no caller can change the shared responses. Every KrsMockAPI in the process
+    shares this one parse; the file is a few kilobytes, so a pickled copy on
+    disk would not load measurably faster.
+
+    Returns:
+        The mock responses keyed by endpoint
+    """
+    raw = _RESPONSES_PATH.read_bytes()
+    responses = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return types.MappingProxyType({sys.intern(key): _intern_identifiers(value) for key, value in responses.items()})
+
+
+@functools.lru_cache(maxsize=1)
+def get_mock_responses_json() -> Mapping[str, bytes]:
+    """
+    Encode the mock responses once as UTF-8 JSON, for callers that return raw bytes.
+
+    Returns:
+        The encoded mock responses keyed by endpoint
+    """
+    if orjson is not None:
+        return types.MappingProxyType({key: orjson.dumps(value) for key, value in get_mock_responses().items()})
+    return types.MappingProxyType({
+        key: json.dumps(value, ensure_ascii=False).encode("utf-8") for key, value in get_mock_responses().items()
+    })
+
+
+def __getattr__(name: str):
+    """Keep the module-level mock_responses and mock_responses_json names, loaded lazily."""
+    if name == "mock_responses":
+        return get_mock_responses()
+    if name == "mock_responses_json":
+        return get_mock_responses_json()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
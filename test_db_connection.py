@@ -9,6 +9,7 @@ This script tests the connection to the Neo4j database.
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -17,10 +18,36 @@ current_dir = Path(__file__).resolve().parent
 sys.path.append(str(current_dir))
 
 # Import Neo4j connection
-from src.graph.neo4j_connection import Neo4jConnection
+from src.graph.neo4j_connection import AsyncNeo4jConnection
 
 
-def main():
+async def check_connection(neo4j: AsyncNeo4jConnection) -> None:
+    """Probe the connection and run the test queries concurrently."""
+    connected, result, db_info = await asyncio.gather(
+        neo4j.verify_connectivity(),
+        neo4j.query("RETURN 1 + 1 AS sum"),
+        neo4j.query("CALL dbms.components() YIELD name, versions RETURN name, versions"),
+        return_exceptions=True
+    )
+    
+    if connected is not True:
+        print("\nConnection failed! Please check your Neo4j connection settings.")
+        return
+    
+    print("\nConnection successful! The Neo4j database is accessible.")
+    
+    for outcome in (result, db_info):
+        if isinstance(outcome, Exception):
+            raise outcome
+    
+    # Simple query
+    print(f"\nTest query result: {result[0]['sum']}")
+    
+    # Database info
+    print(f"\nDatabase Info: {db_info[0]['name']} {db_info[0]['versions']}")
+
+
+async def main_async():
     """Test the Neo4j database connection."""
     # Load environment variables
     load_dotenv()
@@ -36,29 +63,23 @@ def main():
     
     try:
         # Create connection
-        neo4j = Neo4jConnection()
+        neo4j = AsyncNeo4jConnection()
         
         # Test connection
-        if neo4j.verify_connectivity():
-            print("\nConnection successful! The Neo4j database is accessible.")
-            
-            # Run a simple query
-            result = neo4j.query("RETURN 1 + 1 AS sum")
-            print(f"\nTest query result: {result[0]['sum']}")
-            
-            # Get database info
-            db_info = neo4j.query("CALL dbms.components() YIELD name, versions RETURN name, versions")
-            print(f"\nDatabase Info: {db_info[0]['name']} {db_info[0]['versions']}")
-        else:
-            print("\nConnection failed! Please check your Neo4j connection settings.")
+        await check_connection(neo4j)
     except Exception as e:
         print(f"\nError: {e}")
     finally:
         # Close connection
         if 'neo4j' in locals():
-            neo4j.close()
+            await neo4j.close()
             print("\nNeo4j connection closed.")
 
 
+def main():
+    """Run the connection test."""
+    asyncio.run(main_async())
+
+
 if __name__ == "__main__":
     main()
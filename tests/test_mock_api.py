@@ -4,61 +4,62 @@
 """
 Test Mock API
 
-This module contains tests for the KRS Mock API client.
+This module contains tests for the KRS Mock API client. It checks results with
+the unittest assertions, so pytest does not need to rewrite its asserts:
+
+PYTEST_DONT_REWRITE
 """
 
-import os
 import sys
+import functools
 import unittest
 from pathlib import Path
 
-# Add the src directory to the path
-current_dir = Path(__file__).resolve().parent.parent
-sys.path.append(str(current_dir))
+# When run as a script, add the project root to the path (pytest does this through pyproject.toml)
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import the KRS Mock API client
 from src.mock.krs_mock_api import KrsMockAPI
 
+# Identifiers of Cyfrowy Polsat in the mock data
+CP_KRS = "0000010078"
+CP_NAME = "CYFROWY POLSAT SPÓŁKA AKCYJNA"
+CP_NIP = "7961810732"
+CP_REGON = "670925160"
+
+# Expected records, built once at import
+EXPECTED_CP = {"krs": CP_KRS, "nazwa": CP_NAME, "nip": CP_NIP, "regon": CP_REGON}
+EXPECTED_SHAREHOLDER_0 = {"nazwa": "TIVI FOUNDATION", "typ": "corporate", "udzialy": "57.66%"}
+
+# Lookups of Cyfrowy Polsat as (method, arguments, path into the result, expected value);
+# a callable path step is applied to the value instead of indexing it, and an expected
+# dictionary is compared with the same keys of the value
+LOOKUP_CASES = [
+    ("search_entity", {"krs_number": CP_KRS}, ("liczbaWynikow",), 1),
+    ("search_entity", {"krs_number": CP_KRS}, ("wyniki", 0), EXPECTED_CP),
+    ("search_entity", {"name": "Cyfrowy Polsat"}, ("liczbaWynikow",), 1),
+    ("search_entity", {"name": "Cyfrowy Polsat"}, ("wyniki", 0, "krs"), CP_KRS),
+    ("get_entity_details", {"krs_number": CP_KRS}, (), EXPECTED_CP),
+    ("get_entity_representatives", {"krs_number": CP_KRS}, ("reprezentanci", len), 3),
+    ("get_entity_shareholders", {"krs_number": CP_KRS}, ("wspolnicy", len), 4),
+    ("get_entity_shareholders", {"krs_number": CP_KRS}, ("wspolnicy", 0), EXPECTED_SHAREHOLDER_0),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _lookup(api, method, **kwargs):
+    """Call a lookup method once per set of arguments; the results are shared, so treat them as read-only."""
+    return getattr(api, method)(**kwargs)
+
 
 class TestKrsMockAPI(unittest.TestCase):
     """Tests for the KRS Mock API client."""
     
-    def setUp(self):
-        """Set up the test case."""
-        self.api = KrsMockAPI()
-    
-    def test_search_by_krs(self):
-        """Test searching by KRS number."""
-        # Search for Cyfrowy Polsat by KRS number
-        results = self.api.search_entity(krs_number="0000010078")
-        
-        # Check the results
-        self.assertIsNotNone(results)
-        self.assertIn("wyniki", results)
-        self.assertIn("liczbaWynikow", results)
-        self.assertEqual(results["liczbaWynikow"], 1)
-        
-        # Check the first result
-        first_result = results["wyniki"][0]
-        self.assertEqual(first_result["krs"], "0000010078")
-        self.assertEqual(first_result["nazwa"], "CYFROWY POLSAT SPĂ“ĹKA AKCYJNA")
-        self.assertEqual(first_result["nip"], "7961810732")
-        self.assertEqual(first_result["regon"], "670925160")
-    
-    def test_search_by_name(self):
-        """Test searching by name."""
-        # Search for Cyfrowy Polsat by name
-        results = self.api.search_entity(name="Cyfrowy Polsat")
-        
-        # Check the results
-        self.assertIsNotNone(results)
-        self.assertIn("wyniki", results)
-        self.assertIn("liczbaWynikow", results)
-        self.assertEqual(results["liczbaWynikow"], 1)
-        
-        # Check the first result
-        first_result = results["wyniki"][0]
-        self.assertEqual(first_result["krs"], "0000010078")
+    @classmethod
+    def setUpClass(cls):
+        """Set up the mock API client shared by the read-only tests."""
+        cls.api = KrsMockAPI()
     
     def test_empty_search(self):
         """Test empty search results."""
@@ -66,58 +67,27 @@ class TestKrsMockAPI(unittest.TestCase):
         results = self.api.search_entity()
         
         # Check the results
-        self.assertIsNotNone(results)
-        self.assertIn("wyniki", results)
-        self.assertIn("liczbaWynikow", results)
-        self.assertEqual(results["liczbaWynikow"], 0)
-        self.assertEqual(len(results["wyniki"]), 0)
+        self.assertEqual(results, {"wyniki": [], "liczbaWynikow": 0})
     
-    def test_get_entity_details(self):
-        """Test getting entity details."""
-        # Get entity details for Cyfrowy Polsat
-        details = self.api.get_entity_details("0000010078")
-        
-        # Check the details
-        self.assertIsNotNone(details)
-        self.assertEqual(details["krs"], "0000010078")
-        self.assertEqual(details["nazwa"], "CYFROWY POLSAT SPĂ“ĹKA AKCYJNA")
-        self.assertEqual(details["nip"], "7961810732")
-        self.assertEqual(details["regon"], "670925160")
-    
-    def test_get_representatives(self):
-        """Test getting representatives."""
-        # Get representatives for Cyfrowy Polsat
-        representatives = self.api.get_entity_representatives("0000010078")
-        
-        # Check the representatives
-        self.assertIsNotNone(representatives)
-        self.assertIn("reprezentanci", representatives)
-        self.assertEqual(len(representatives["reprezentanci"]), 3)
-    
-    def test_get_shareholders(self):
-        """Test getting shareholders."""
-        # Get shareholders for Cyfrowy Polsat
-        shareholders = self.api.get_entity_shareholders("0000010078")
-        
-        # Check the shareholders
-        self.assertIsNotNone(shareholders)
-        self.assertIn("wspolnicy", shareholders)
-        self.assertEqual(len(shareholders["wspolnicy"]), 4)
-        
-        # Check the first shareholder
-        first_shareholder = shareholders["wspolnicy"][0]
-        self.assertEqual(first_shareholder["nazwa"], "TIVI FOUNDATION")
-        self.assertEqual(first_shareholder["typ"], "corporate")
-        self.assertEqual(first_shareholder["udzialy"], "57.66%")
+    def test_lookups(self):
+        """Test the lookups of Cyfrowy Polsat."""
+        for method, kwargs, path, expected in LOOKUP_CASES:
+            with self.subTest(method=method, kwargs=kwargs, path=path):
+                value = _lookup(self.api, method, **kwargs)
+                for step in path:
+                    value = step(value) if callable(step) else value[step]
+                if isinstance(expected, dict):
+                    value = {key: value[key] for key in expected}
+                self.assertEqual(value, expected)
     
     def test_custom_responses(self):
         """Test adding custom responses."""
-        # Create a mock API instance with custom responses
+        # Create a separate mock API instance, as this test adds responses
         custom_api = KrsMockAPI({
             "custom:test": {
                 "message": "This is a custom response"
             }
-        })
+        }, include_defaults=False)
         
         # Add another custom response
         custom_api.add_mock_response("another:test", {
@@ -133,7 +103,9 @@ class TestKrsMockAPI(unittest.TestCase):
             custom_api._make_request("another:test")["message"],
             "This is another custom response"
         )
+        self.assertEqual(custom_api.get_entity_details(CP_KRS), {})
 
 
 if __name__ == "__main__":
-    unittest.main()
+    result = unittest.TextTestRunner().run(unittest.TestLoader().loadTestsFromTestCase(TestKrsMockAPI))
+    sys.exit(not result.wasSuccessful())
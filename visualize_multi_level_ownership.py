@@ -10,21 +10,41 @@ functionality to provide a comprehensive view of the ownership network.
 """
 
 import os
-import sys
+import gzip
 import json
+import base64
+import time
 import logging
 import argparse
+from string import Template
 from pathlib import Path
+from itertools import chain
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Add the src directory to the path
-sys.path.append(str(Path(__file__).resolve().parent / "src"))
-
 # Import required modules
-from graph.neo4j_connection import Neo4jConnection
-from graph.indirect_ownership import IndirectOwnershipDiscovery
-from graph.network_analyzer import CompanyNetworkAnalyzer
-from graph.ownership_analyzer import OwnershipAnalyzer
+try:
+    import networkx as nx
+except ImportError:  # pragma: no cover - optional dependency
+    nx = None
+
+from src.graph.neo4j_connection import get_neo4j_connection
+from src.graph.data_model import DatabaseSchema, GraphMeta, NodeLabels, NodeProperties
+from src.graph.indirect_ownership import IndirectOwnershipDiscovery, analyze_ownership
+from src.graph.network_analyzer import CompanyNetworkAnalyzer
+from src.graph.ownership_analyzer import OwnershipAnalyzer
+
+# Query results kept on disk between runs, per company and depth; a result is reused
+# while it is younger than CACHE_TTL and the ownership graph has not changed since
+CACHE_DIR = Path(__file__).resolve().parent / ".krs_cache"
+CACHE_TTL = 3600  # seconds
+
+# Time of the last change of the direct ownership relationships (see GraphMeta)
+_GRAPH_VERSION_QUERY = f"""
+MATCH (meta:{NodeLabels.GRAPH_META} {{{NodeProperties.ID}: '{GraphMeta.ID}'}})
+RETURN toString(meta.{GraphMeta.CHANGED_AT}) AS changed_at
+"""
 
 
 def setup_logging(level=logging.INFO):
@@ -41,6 +61,78 @@ def setup_logging(level=logging.INFO):
     )
 
 
+def ownership_graph_version(neo4j):
+    """
+    Get the version of the ownership graph the cached results are checked against.
+    
+    Imports of ownership data stamp GraphMeta in the same transaction, so the
+    version changes whenever the direct ownership relationships change.
+    
+    Args:
+        neo4j: The Neo4j connection
+        
+    Returns:
+        The time of the last ownership change as a string, or None if none is recorded
+    """
+    return neo4j.query_scalar(_GRAPH_VERSION_QUERY)
+
+
+def load_cached_result(kind, krs_number, max_depth, graph_version):
+    """
+    Load a query result stored by an earlier run, if it is younger than CACHE_TTL
+    and was stored for the current version of the ownership graph.
+    
+    Args:
+        kind: The kind of result, e.g. "analysis" or "network"
+        krs_number: The KRS number of the company
+        max_depth: Maximum depth the result was queried with
+        graph_version: The current graph version (see ownership_graph_version)
+        
+    Returns:
+        The stored result, or None if there is no fresh one
+    """
+    path = CACHE_DIR / f"{kind}_{krs_number}_depth{max_depth}.json"
+    try:
+        if time.time() - path.stat().st_mtime < CACHE_TTL:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry["graph_version"] == graph_version:
+                return entry["result"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def store_cached_result(kind, krs_number, max_depth, result, graph_version):
+    """
+    Store a query result for later runs.
+    
+    Args:
+        kind: The kind of result, e.g. "analysis" or "network"
+        krs_number: The KRS number of the company
+        max_depth: Maximum depth the result was queried with
+        result: The JSON-serializable result
+        graph_version: The graph version the result was queried at (see ownership_graph_version)
+    """
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        with open(CACHE_DIR / f"{kind}_{krs_number}_depth{max_depth}.json", "w", encoding="utf-8") as f:
+            json.dump({"graph_version": graph_version, "result": result}, f)
+    except (OSError, TypeError, ValueError) as e:
+        logging.getLogger(__name__).warning(f"Could not cache {kind} of KRS {krs_number}: {e}")
+
+
+def clear_cached_results(krs_number):
+    """
+    Remove the stored query results of a company, e.g. after its relationships changed.
+    
+    Args:
+        krs_number: The KRS number of the company
+    """
+    for path in CACHE_DIR.glob(f"*_{krs_number}_depth*.json"):
+        path.unlink(missing_ok=True)
+
+
 def print_header():
     """
     Print a header for the script.
@@ -62,318 +154,370 @@ def print_section(title):
     print("-" * 80)
 
 
-def discover_indirect_relationships(krs_number, max_depth):
+def print_discovery_stats(stats):
+    """
+    Print the statistics of an indirect relationship discovery.
+    
+    Args:
+        stats: Statistics about the discovered relationships
+    """
+    print("\nIndirect Relationship Discovery Results:")
+    print(f"  - Upstream relationships discovered: {stats['upstream_relationships']}")
+    print(f"  - Downstream relationships discovered: {stats['downstream_relationships']}")
+    print(f"  - Total indirect relationships: {stats['total_relationships']}")
+    print(f"  - Companies linked: {stats['companies_linked']}")
+    print(f"  - Shareholders linked: {stats['shareholders_linked']}")
+
+
+def print_ownership_analysis(analysis):
+    """
+    Print the direct owners, indirect owners and ownership chains of a company.
+    
+    Args:
+        analysis: The ownership analysis returned by analyze_ownership
+    """
+    company_name = analysis["company_name"]
+    lines = [f"\nCompany: {company_name}"]
+    
+    lines.append("\nDirect Shareholders:")
+    for owner in analysis["direct_owners"]:
+        lines.append(f"  - {owner['name']}: {owner['percentage']}%")
+    
+    if analysis["indirect_owners"]:
+        lines.append("\nIndirect Shareholders (Ultimate Beneficial Owners):")
+        for owner in analysis["indirect_owners"]:
+            lines.append(f"  - {owner['name']}: {owner['effective_percentage']:.2f}% (effective ownership)")
+    else:
+        lines.append("\nNo indirect shareholders found.")
+    
+    if analysis["chains"]:
+        lines.append("\nOwnership Chains:")
+        for i, chain in enumerate(analysis["chains"], 1):
+            owner = chain["ultimate_owner"]
+            path = chain["ownership_chain"]
+            percentages = chain["percentages"]
+            effective = chain["effective_percentage"]
+            
+            lines.append(f"\nChain {i}: {owner} -> {' -> '.join(path[1:-1])} -> {company_name}")
+            lines.append(f"  Percentages: {' -> '.join([f'{p}%' for p in percentages])}")
+            lines.append(f"  Effective Ownership: {effective:.2f}%")
+    
+    # Write the report at once instead of line by line
+    print("\n".join(lines))
+
+
+def discover_indirect_relationships(krs_number, max_depth, conn=None):
     """
     Discover and import indirect ownership relationships for visualization.
     
     Args:
         krs_number: The KRS number of the company
         max_depth: Maximum depth for relationship discovery
+        conn: Neo4j connection to use (default: the shared process-wide connection)
         
     Returns:
         Statistics about the discovered relationships
     """
     print_section(f"Discovering Indirect Relationships (Depth: {max_depth})")
-    neo4j = Neo4jConnection()
+    neo4j = conn or get_neo4j_connection()
     
     try:
         print(f"Analyzing indirect relationships for company with KRS: {krs_number}")
         discovery_service = IndirectOwnershipDiscovery(neo4j)
-        stats = discovery_service.discover_indirect_relationships(krs_number, max_depth=max_depth)
+        stats = discovery_service.discover_indirect_relationships(krs_number, max_depth=max_depth, use_cache=True)
+        clear_cached_results(krs_number)
         
-        print("\nIndirect Relationship Discovery Results:")
-        print(f"  - Upstream relationships discovered: {stats['upstream_relationships']}")
-        print(f"  - Downstream relationships discovered: {stats['downstream_relationships']}")
-        print(f"  - Total indirect relationships: {stats['total_relationships']}")
-        print(f"  - Companies linked: {stats['companies_linked']}")
-        print(f"  - Shareholders linked: {stats['shareholders_linked']}")
+        print_discovery_stats(stats)
         
         return stats
     except Exception as e:
         print(f"Error discovering indirect relationships: {e}")
         return None
     finally:
-        neo4j.close()
+        if conn is None:
+            neo4j.close()
 
 
-def analyze_ownership_structure(krs_number, max_depth):
+def analyze_ownership_structure(krs_number, max_depth, conn=None, use_cache=True):
     """
     Analyze the ownership structure and display effective ownership percentages.
     
     Args:
         krs_number: The KRS number of the company
         max_depth: Maximum depth for analysis
+        conn: Neo4j connection to use (default: the shared process-wide connection)
+        use_cache: Reuse the analysis of an earlier run that is still fresh (see load_cached_result) (default: True)
     """
     print_section(f"Analyzing Ownership Structure (Depth: {max_depth})")
-    neo4j = Neo4jConnection()
+    neo4j = conn or get_neo4j_connection()
     
     try:
         print(f"Analyzing ownership structure for company with KRS: {krs_number}")
         
-        # Get company name
-        query = "MATCH (c:Company {krs: $krs}) RETURN c.name AS name"
-        result = neo4j.query(query, {"krs": krs_number})
-        company_name = result[0]["name"] if result else krs_number
-        
-        print(f"\nCompany: {company_name}")
-        
-        # Query direct owners
-        direct_query = """
-        MATCH (shareholder)-[r:OWNS_SHARES_IN]->(c:Company {krs: $krs})
-        RETURN shareholder.name AS name, 
-               r.percentage AS percentage
-        ORDER BY percentage DESC
-        """
-        direct_owners = neo4j.query(direct_query, {"krs": krs_number})
-        
-        print("\nDirect Shareholders:")
-        for owner in direct_owners:
-            print(f"  - {owner['name']}: {owner['percentage']}%")
-        
-        # Query indirect owners using the INDIRECT_OWNER_OF relationship
-        indirect_query = """
-        MATCH (shareholder)-[r:INDIRECT_OWNER_OF]->(c:Company {krs: $krs})
-        RETURN shareholder.name AS name, 
-               r.percentage AS effective_percentage
-        ORDER BY effective_percentage DESC
-        """
-        indirect_owners = neo4j.query(indirect_query, {"krs": krs_number})
-        
-        if indirect_owners:
-            print("\nIndirect Shareholders (Ultimate Beneficial Owners):")
-            for owner in indirect_owners:
-                print(f"  - {owner['name']}: {owner['effective_percentage']:.2f}% (effective ownership)")
-        else:
-            print("\nNo indirect shareholders found.")
-        
-        # Find ownership chains
-        chain_query = f"""
-        MATCH path = (owner)-[r:OWNS_SHARES_IN*1..{max_depth}]->(c:Company {{krs: $krs}})
-        WHERE NOT (owner)<-[:OWNS_SHARES_IN]-()
-        WITH owner, path, relationships(path) AS rels,
-             reduce(s = 1.0, rel IN relationships(path) | 
-                s * CASE WHEN rel.percentage IS NOT NULL 
-                        THEN rel.percentage / 100 
-                        ELSE 1 
-                   END
-             ) * 100 AS effective_percentage
-        WHERE effective_percentage >= 0.1
-        RETURN owner.name AS ultimate_owner,
-               [node IN nodes(path) | node.name] AS ownership_chain,
-               [rel IN rels | rel.percentage] AS percentages,
-               effective_percentage
-        ORDER BY effective_percentage DESC
-        """
-        
-        chains = neo4j.query(chain_query, {"krs": krs_number})
-        
-        if chains:
-            print("\nOwnership Chains:")
-            for i, chain in enumerate(chains, 1):
-                owner = chain["ultimate_owner"]
-                path = chain["ownership_chain"]
-                percentages = chain["percentages"]
-                effective = chain["effective_percentage"]
-                
-                print(f"\nChain {i}: {owner} -> {' -> '.join(path[1:-1])} -> {company_name}")
-                print(f"  Percentages: {' -> '.join([f'{p}%' for p in percentages])}")
-                print(f"  Effective Ownership: {effective:.2f}%")
+        graph_version = ownership_graph_version(neo4j)
+        analysis = load_cached_result("analysis", krs_number, max_depth, graph_version) if use_cache else None
+        if analysis is None:
+            analysis = neo4j.execute_read_transaction(analyze_ownership, krs_number, max_depth)
+            store_cached_result("analysis", krs_number, max_depth, analysis, graph_version)
+        print_ownership_analysis(analysis)
         
         return True
     except Exception as e:
         print(f"Error analyzing ownership structure: {e}")
         return False
     finally:
-        neo4j.close()
+        if conn is None:
+            neo4j.close()
 
 
-def generate_ownership_network_visualization(krs_number, max_depth):
+def discover_and_analyze_ownership(krs_number, max_depth, conn=None):
     """
-    Generate a D3.js visualization of the ownership network.
+    Discover indirect relationships and analyze the ownership structure in one transaction.
     
     Args:
         krs_number: The KRS number of the company
-        max_depth: Maximum depth for the network
+        max_depth: Maximum depth for discovery and analysis
+        conn: Neo4j connection to use (default: the shared process-wide connection)
         
     Returns:
-        Path to the generated HTML file
+        Statistics about the discovered relationships
     """
-    print_section(f"Generating Ownership Network Visualization (Depth: {max_depth})")
-    neo4j = Neo4jConnection()
+    print_section(f"Discovering and Analyzing Ownership (Depth: {max_depth})")
+    neo4j = conn or get_neo4j_connection()
     
     try:
-        # Create output directory
-        output_dir = Path(__file__).resolve().parent / "output"
-        os.makedirs(output_dir, exist_ok=True)
+        print(f"Analyzing ownership for company with KRS: {krs_number}")
+        discovery_service = IndirectOwnershipDiscovery(neo4j)
+        stats, analysis = discovery_service.discover_and_analyze(krs_number, max_depth=max_depth)
+        clear_cached_results(krs_number)
+        store_cached_result("analysis", krs_number, max_depth, analysis, ownership_graph_version(neo4j))
         
-        # Create HTML file
-        html_file = output_dir / f"ownership_network_{krs_number}_depth{max_depth}.html"
-        print(f"Creating visualization at {html_file}...")
+        print_discovery_stats(stats)
+        print_ownership_analysis(analysis)
         
-        # Get company name
-        query = "MATCH (c:Company {krs: $krs}) RETURN c.name AS name"
-        result = neo4j.query(query, {"krs": krs_number})
-        company_name = result[0]["name"] if result else krs_number
-        
-        # First, get the central company
-        central_query = """
-        MATCH (c:Company {krs: $krs})
-        RETURN {
-            id: id(c),
-            name: c.name,
-            krs: c.krs,
-            type: 'central'
-        } AS central
-        """
-        central_result = neo4j.query(central_query, {"krs": krs_number})
-        if not central_result:
-            print(f"Company with KRS {krs_number} not found.")
-            return None
-        central = central_result[0]["central"]
-        
-        # Get direct shareholders
-        direct_query = """
-        MATCH (shareholder)-[r:OWNS_SHARES_IN]->(c:Company {krs: $krs})
-        RETURN {
-            id: id(shareholder),
-            name: shareholder.name,
-            krs: CASE WHEN shareholder:Company THEN shareholder.krs ELSE null END,
-            type: CASE
-                WHEN shareholder:Company THEN 'company'
-                WHEN shareholder:Shareholder AND shareholder.shareholder_type = 'individual' THEN 'individual'
-                WHEN shareholder:Shareholder THEN 'corporate'
-                ELSE 'unknown'
-            END
-        } AS node,
-        {
-            source: id(shareholder),
-            target: id(c),
-            type: 'OWNS_SHARES_IN',
+        return stats
+    except Exception as e:
+        print(f"Error discovering and analyzing ownership: {e}")
+        return None
+    finally:
+        if conn is None:
+            neo4j.close()
+
+
+# Checks whether the APOC subgraph expander is installed
+_APOC_SUBGRAPH_AVAILABLE = """
+SHOW PROCEDURES YIELD name
+WHERE name = 'apoc.path.subgraphNodes'
+RETURN count(*) > 0 AS available
+"""
+
+
+def has_apoc_subgraph(neo4j):
+    """
+    Check (once per connection) whether apoc.path.subgraphNodes is available.
+    
+    The result is kept on the connection, so it lives no longer than the connection.
+    
+    Args:
+        neo4j: The Neo4j connection
+        
+    Returns:
+        True if the APOC subgraph expander can be used, False otherwise
+    """
+    available = getattr(neo4j, "_apoc_subgraph_available", None)
+    if available is None:
+        try:
+            available = bool(neo4j.query_scalar(_APOC_SUBGRAPH_AVAILABLE))
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Could not check for APOC procedures: {e}")
+            available = False
+        neo4j._apoc_subgraph_available = available
+    
+    return available
+
+
+# Projection of a network node bound to the variable node, shared by every node list
+_NODE_PROJECTION = """{
+        id: elementId(node),
+        name: node.name,
+        krs: CASE WHEN node:Company THEN node.krs ELSE null END,
+        type: CASE
+            WHEN node:Company THEN 'company'
+            WHEN node:Shareholder AND node.shareholder_type = 'individual' THEN 'individual'
+            WHEN node:Shareholder THEN 'corporate'
+            ELSE 'unknown'
+        END
+    }"""
+
+
+@lru_cache(maxsize=16)
+def _network_query(max_depth, use_apoc=False):
+    """
+    Build the query collecting the ownership network around a company in one round trip.
+    
+    Cypher does not take parameters as variable-length bounds, so without APOC the
+    depth is part of the text; the text is built once per depth and stays identical
+    across runs, so Neo4j reuses the cached plan. With APOC the depth is the
+    $max_depth parameter and all depths share one plan.
+    
+    Args:
+        max_depth: Maximum depth for the network
+        use_apoc: Whether to expand the owned companies with apoc.path.subgraphNodes
+        
+    Returns:
+        The Cypher query string
+    """
+    if max_depth > 1:
+        if use_apoc:
+            # Each owned company is reached once, breadth-first, instead of once per path
+            related = """
+    CALL {
+        WITH c
+        CALL apoc.path.subgraphNodes(c, {
+            relationshipFilter: "OWNS_SHARES_IN>",
+            minLevel: 1,
+            maxLevel: $max_depth - 1,
+            bfs: true
+        }) YIELD node
+        RETURN collect(node) AS related_nodes
+    }"""
+        else:
+            related = f"""
+    CALL {{
+        WITH c
+        MATCH (c)-[:OWNS_SHARES_IN*1..{max_depth-1}]->(related)
+        WHERE related <> c
+        RETURN collect(DISTINCT related) AS related_nodes
+    }}"""
+        
+        # Companies owned by the central company and the ownership links among all network nodes
+        higher_depth = related + """
+    WITH c, direct_owners, direct_links, indirect_owners, indirect_links, related_nodes,
+         [c] + direct_owners + indirect_owners + related_nodes AS network_nodes
+    CALL {
+        WITH network_nodes
+        UNWIND network_nodes AS a
+        MATCH (a)-[r:OWNS_SHARES_IN]->(b)
+        WHERE b IN network_nodes
+        RETURN collect(DISTINCT {
+            source: elementId(a),
+            target: elementId(b),
             percentage: r.percentage,
             is_indirect: false
-        } AS link
-        """
-        direct_result = neo4j.query(direct_query, {"krs": krs_number})
-        
-        # Get indirect shareholders
-        indirect_query = """
-        MATCH (shareholder)-[r:INDIRECT_OWNER_OF]->(c:Company {krs: $krs})
-        RETURN {
-            id: id(shareholder),
-            name: shareholder.name,
-            krs: CASE WHEN shareholder:Company THEN shareholder.krs ELSE null END,
-            type: CASE
-                WHEN shareholder:Company THEN 'company'
-                WHEN shareholder:Shareholder AND shareholder.shareholder_type = 'individual' THEN 'individual'
-                WHEN shareholder:Shareholder THEN 'corporate'
-                ELSE 'unknown'
-            END
-        } AS node,
-        {
-            source: id(shareholder),
-            target: id(c),
-            type: 'INDIRECT_OWNER_OF',
+        }) AS higher_links
+    }"""
+    else:
+        higher_depth = """
+    WITH c, direct_owners, direct_links, indirect_owners, indirect_links, [] AS related_nodes, [] AS higher_links"""
+    
+    return """
+    MATCH (c:Company {krs: $krs})
+    CALL {
+        WITH c
+        MATCH (shareholder)-[r:OWNS_SHARES_IN]->(c)
+        RETURN collect(shareholder) AS direct_owners, collect({
+            source: elementId(shareholder),
+            target: elementId(c),
+            percentage: r.percentage,
+            is_indirect: false
+        }) AS direct_links
+    }
+    CALL {
+        WITH c
+        MATCH (shareholder)-[r:INDIRECT_OWNER_OF]->(c)
+        RETURN collect(shareholder) AS indirect_owners, collect({
+            source: elementId(shareholder),
+            target: elementId(c),
             percentage: r.percentage,
             is_indirect: true
-        } AS link
-        """
-        indirect_result = neo4j.query(indirect_query, {"krs": krs_number})
-        
-        # Combine results
-        nodes = [central]
-        links = []
-        node_ids = {central["id"]}
-        
-        for record in direct_result:
-            node = record["node"]
-            link = record["link"]
-            if node["id"] not in node_ids:
-                nodes.append(node)
-                node_ids.add(node["id"])
-            links.append(link)
-        
-        for record in indirect_result:
-            node = record["node"]
-            link = record["link"]
-            if node["id"] not in node_ids:
-                nodes.append(node)
-                node_ids.add(node["id"])
-            links.append(link)
-        
-        # Handle higher depth levels if needed
-        if max_depth > 1:
-            # Get additional nodes and links for higher depth
-            higher_depth_query = f"""
-            MATCH path = (c:Company {{krs: $krs}})-[:OWNS_SHARES_IN*1..{max_depth-1}]->(related)
-            WHERE related <> c
-            WITH c, related, [rel in relationships(path) | rel] as rels
-            RETURN {{
-                id: id(related),
-                name: related.name,
-                krs: CASE WHEN related:Company THEN related.krs ELSE null END,
-                type: CASE
-                    WHEN related:Company THEN 'company'
-                    WHEN related:Shareholder AND related.shareholder_type = 'individual' THEN 'individual'
-                    WHEN related:Shareholder THEN 'corporate'
-                    ELSE 'unknown'
-                END
-            }} AS node
-            """
-            higher_nodes_result = neo4j.query(higher_depth_query, {"krs": krs_number})
-            
-            for record in higher_nodes_result:
-                node = record["node"]
-                if node["id"] not in node_ids:
-                    nodes.append(node)
-                    node_ids.add(node["id"])
-            
-            # Get additional links
-            higher_links_query = f"""
-            MATCH (a)-[r:OWNS_SHARES_IN]->(b)
-            WHERE id(a) IN $node_ids AND id(b) IN $node_ids
-            RETURN {{
-                source: id(a),
-                target: id(b),
-                type: type(r),
-                percentage: r.percentage,
-                is_indirect: false
-            }} AS link
-            """
-            higher_links_result = neo4j.query(higher_links_query, {"node_ids": list(node_ids)})
-            
-            for record in higher_links_result:
-                link = record["link"]
-                # Check if link is not already added
-                if not any(l["source"] == link["source"] and l["target"] == link["target"] for l in links):
-                    links.append(link)
+        }) AS indirect_links
+    }""" + higher_depth + f"""
+    RETURN c.name AS company_name,
+           {{id: elementId(c), name: c.name, krs: c.krs, type: 'central'}} AS central,
+           [node IN direct_owners | {_NODE_PROJECTION}] AS direct_nodes,
+           direct_links,
+           [node IN indirect_owners | {_NODE_PROJECTION}] AS indirect_nodes,
+           indirect_links,
+           [node IN related_nodes | {_NODE_PROJECTION}] AS higher_nodes,
+           higher_links
+    """
+
+
+def fetch_ownership_network(tx, krs_number, max_depth, use_apoc=False):
+    """
+    Collect the nodes and links of the ownership network around a company.
+    
+    Args:
+        tx: The Neo4j transaction
+        krs_number: The KRS number of the company
+        max_depth: Maximum depth for the network
+        use_apoc: Whether to expand the owned companies with APOC (see has_apoc_subgraph)
         
-        # Create visualization data
-        visualization_data = {
-            "nodes": nodes,
-            "links": links
-        }
+    Returns:
+        The company name and the lists of nodes and links, or None if the company is not found
+    """
+    query = _network_query(max_depth, use_apoc)
+    network = tx.run(query, {"krs": krs_number, "max_depth": max_depth}).single()
+    if network is None:
+        return None
+    
+    # Combine results; the projected maps are kept as returned, keyed by node id in first-seen order
+    central = network["central"]
+    node_index = {central["id"]: central}
+    for node in chain(network["direct_nodes"], network["indirect_nodes"], network["higher_nodes"]):
+        node_index.setdefault(node["id"], node)
+    
+    # Higher level links only add the pairs not linked by a direct or indirect ownership yet
+    links = network["direct_links"] + network["indirect_links"]
+    link_index = dict.fromkeys((link["source"], link["target"]) for link in links)
+    for link in network["higher_links"]:
+        link_index.setdefault((link["source"], link["target"]), link)
+    links.extend(link for link in link_index.values() if link is not None)
+    
+    return network["company_name"], list(node_index.values()), links
+
+
+def _link_columns(nodes, links):
+    """
+    Lay out the links as parallel columns referring to nodes by their position.
+    
+    Args:
+        nodes: The network nodes
+        links: The network links between node IDs
         
-        # Create D3.js visualization
-        html_content = f"""<!DOCTYPE html>
+    Returns:
+        The source and target node indexes, percentages and indirect flags of the links
+    """
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    return {
+        "s": [index[link["source"]] for link in links],
+        "t": [index[link["target"]] for link in links],
+        "p": [link["percentage"] for link in links],
+        "i": [1 if link["is_indirect"] else 0 for link in links]
+    }
+
+
+# D3.js page of the ownership network; the compressed network data is written between the two parts
+_HTML_PREFIX = Template("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
-    <title>Ownership Network - {company_name}</title>
+    <title>Ownership Network - $company_name</title>
     <script src="https://d3js.org/d3.v7.min.js"></script>
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             margin: 0;
             overflow: hidden;
-        }}
+        }
         
-        #visualization {{
+        #visualization {
             width: 100vw;
             height: 100vh;
             position: relative;
-        }}
+        }
         
-        .controls {{
+        .controls {
             position: absolute;
             top: 20px;
             right: 20px;
@@ -383,44 +527,44 @@ def generate_ownership_network_visualization(krs_number, max_depth):
             border-radius: 5px;
             box-shadow: 0 2px 5px rgba(0,0,0,0.1);
             z-index: 100;
-        }}
+        }
         
-        .legend {{
+        .legend {
             margin-top: 10px;
-        }}
+        }
         
-        .legend-item {{
+        .legend-item {
             display: flex;
             align-items: center;
             margin-bottom: 5px;
-        }}
+        }
         
-        .legend-color {{
+        .legend-color {
             width: 12px;
             height: 12px;
             border-radius: 50%;
             margin-right: 8px;
-        }}
+        }
         
-        .toggle {{
+        .toggle {
             margin-bottom: 10px;
-        }}
+        }
         
-        .node {{
+        .node {
             stroke: #fff;
             stroke-width: 1.5px;
             cursor: pointer;
-        }}
+        }
         
-        .link {{
+        .link {
             stroke-opacity: 0.6;
-        }}
+        }
         
-        .indirect-link {{
+        .indirect-link {
             stroke-dasharray: 5, 5;
-        }}
+        }
         
-        .tooltip {{
+        .tooltip {
             position: absolute;
             background: white;
             border: 1px solid #ccc;
@@ -430,7 +574,7 @@ def generate_ownership_network_visualization(krs_number, max_depth):
             z-index: 101;
             pointer-events: none;
             font-size: 12px;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -438,9 +582,9 @@ def generate_ownership_network_visualization(krs_number, max_depth):
     
     <div class="controls">
         <h3>Ownership Network</h3>
-        <div>Company: {company_name}</div>
-        <div>KRS: {krs_number}</div>
-        <div>Depth: {max_depth}</div>
+        <div>Company: $company_name</div>
+        <div>KRS: $krs_number</div>
+        <div>Depth: $max_depth</div>
         
         <div class="toggle">
             <input type="checkbox" id="show-indirect" checked>
@@ -475,52 +619,52 @@ def generate_ownership_network_visualization(krs_number, max_depth):
         </div>
     </div>
     
-    <script>
-        // Network data
-        const networkData = {json.dumps(visualization_data)};
+    <!-- Network data, gzip-compressed and base64-encoded -->
+    <script id="network-data" type="application/octet-stream">""")
+
+_HTML_SUFFIX = """</script>
+    
+    <script type="module">
+        // Decompress the network data
+        const compressed = Uint8Array.from(atob(document.getElementById("network-data").textContent), c => c.charCodeAt(0));
+        const stream = new Blob([compressed]).stream().pipeThrough(new DecompressionStream("gzip"));
+        const networkData = JSON.parse(await new Response(stream).text());
         
-        // Prepare data for D3
+        // Prepare data for D3; links arrive as columns of node indexes and attributes
         const nodes = networkData.nodes;
-        const links = networkData.links;
-        
-        // Create a map for node lookup
-        const nodeMap = new Map();
-        nodes.forEach(node => nodeMap.set(node.id, node));
-        
-        // Process links to use node references
-        links.forEach(link => {{
-            link.source = nodeMap.get(link.source);
-            link.target = nodeMap.get(link.target);
-        }});
+        const linkColumns = networkData.links;
+        const links = Array.from(linkColumns.s, (source, i) => ({
+            source: nodes[source],
+            target: nodes[linkColumns.t[i]],
+            percentage: linkColumns.p[i],
+            is_indirect: linkColumns.i[i] === 1
+        }));
         
         // Set up the visualization
         const width = window.innerWidth;
         const height = window.innerHeight;
         
+        // Graphs with more nodes are drawn on a canvas, as SVG elements slow down every tick
+        const CANVAS_NODE_THRESHOLD = 200;
+        
         // Color scale
-        const nodeColors = {{
+        const nodeColors = {
             "central": "#1f77b4",
             "company": "#ff7f0e",
             "individual": "#2ca02c",
             "corporate": "#d62728",
             "unknown": "#9467bd"
-        }};
-        
-        // Create SVG
-        const svg = d3.select("#visualization")
-            .append("svg")
-            .attr("width", width)
-            .attr("height", height);
+        };
         
-        // Set up zoom behavior
-        const zoom = d3.zoom()
-            .scaleExtent([0.1, 5])
-            .on("zoom", zoomed);
+        const nodeRadius = d => d.type === "central" ? 12 : 8;
+        const nodeColor = d => nodeColors[d.type] || nodeColors.unknown;
+        const linkWidth = d => d.percentage ? Math.max(1, Math.sqrt(d.percentage) / 2) : 1;
         
-        svg.call(zoom);
-        
-        // Create a container for the zoom transform
-        const container = svg.append("g");
+        // Visibility, changed by the indirect relationships toggle
+        let showIndirect = true;
+        let connectedNodeIds = null;
+        const isLinkVisible = d => showIndirect || !d.is_indirect;
+        const isNodeVisible = d => d.type === "central" || connectedNodeIds === null || connectedNodeIds.has(d.id);
         
         // Create tooltip
         const tooltip = d3.select("#visualization")
@@ -528,186 +672,426 @@ def generate_ownership_network_visualization(krs_number, max_depth):
             .attr("class", "tooltip")
             .style("opacity", 0);
         
-        // Create links
-        const link = container.append("g")
-            .selectAll("line")
-            .data(links)
-            .enter().append("line")
-            .attr("class", d => `link ${{d.is_indirect ? "indirect-link" : ""}}`)
-            .attr("stroke", "#999")
-            .attr("stroke-width", d => {{
-                if (d.percentage) {{
-                    return Math.max(1, Math.sqrt(d.percentage) / 2);
-                }}
-                return 1;
-            }});
-        
-        // Create nodes
-        const node = container.append("g")
-            .selectAll("circle")
-            .data(nodes)
-            .enter().append("circle")
-            .attr("class", "node")
-            .attr("r", d => d.type === "central" ? 12 : 8)
-            .attr("fill", d => nodeColors[d.type] || nodeColors.unknown)
-            .call(d3.drag()
-                .on("start", dragStarted)
-                .on("drag", dragged)
-                .on("end", dragEnded));
-        
-        // Add labels
-        const label = container.append("g")
-            .selectAll("text")
-            .data(nodes)
-            .enter().append("text")
-            .attr("dx", 12)
-            .attr("dy", ".35em")
-            .text(d => d.name);
-        
-        // Node tooltips
-        node.on("mouseover", function(event, d) {{
+        function showTooltip(event, d) {
             tooltip.transition()
                 .duration(200)
                 .style("opacity", .9);
             
-            let tooltipContent = `<strong>${{d.name}}</strong>`;
-            if (d.krs) {{
-                tooltipContent += `<br>KRS: ${{d.krs}}`;
-            }}
-            tooltipContent += `<br>Type: ${{d.type.charAt(0).toUpperCase() + d.type.slice(1)}}`;
+            let tooltipContent = `<strong>${d.name}</strong>`;
+            if (d.krs) {
+                tooltipContent += `<br>KRS: ${d.krs}`;
+            }
+            tooltipContent += `<br>Type: ${d.type.charAt(0).toUpperCase() + d.type.slice(1)}`;
             
             // Find connected links
             const outgoingLinks = links.filter(l => l.source.id === d.id);
             const incomingLinks = links.filter(l => l.target.id === d.id);
             
-            if (outgoingLinks.length > 0) {{
+            if (outgoingLinks.length > 0) {
                 tooltipContent += `<br><br><strong>Owns:</strong>`;
-                outgoingLinks.forEach(l => {{
-                    tooltipContent += `<br>${{l.target.name}}`;
-                    if (l.percentage) {{
-                        tooltipContent += ` (${{l.percentage}}%)`;
-                    }}
-                    if (l.is_indirect) {{
+                outgoingLinks.forEach(l => {
+                    tooltipContent += `<br>${l.target.name}`;
+                    if (l.percentage) {
+                        tooltipContent += ` (${l.percentage}%)`;
+                    }
+                    if (l.is_indirect) {
                         tooltipContent += ` (indirect)`;
-                    }}
-                }});
-            }}
+                    }
+                });
+            }
             
-            if (incomingLinks.length > 0) {{
+            if (incomingLinks.length > 0) {
                 tooltipContent += `<br><br><strong>Owned by:</strong>`;
-                incomingLinks.forEach(l => {{
-                    tooltipContent += `<br>${{l.source.name}}`;
-                    if (l.percentage) {{
-                        tooltipContent += ` (${{l.percentage}}%)`;
-                    }}
-                    if (l.is_indirect) {{
+                incomingLinks.forEach(l => {
+                    tooltipContent += `<br>${l.source.name}`;
+                    if (l.percentage) {
+                        tooltipContent += ` (${l.percentage}%)`;
+                    }
+                    if (l.is_indirect) {
                         tooltipContent += ` (indirect)`;
-                    }}
-                }});
-            }}
+                    }
+                });
+            }
             
             tooltip.html(tooltipContent)
                 .style("left", (event.pageX + 10) + "px")
                 .style("top", (event.pageY - 28) + "px");
-        }})
-        .on("mouseout", function() {{
+        }
+        
+        function hideTooltip() {
             tooltip.transition()
                 .duration(500)
                 .style("opacity", 0);
-        }});
+        }
+        
+        // Draw the network as SVG elements
+        function svgRenderer() {
+            // Create SVG
+            const svg = d3.select("#visualization")
+                .append("svg")
+                .attr("width", width)
+                .attr("height", height);
+            
+            // Create a container for the zoom transform
+            const container = svg.append("g");
+            
+            // Set up zoom behavior
+            svg.call(d3.zoom()
+                .scaleExtent([0.1, 5])
+                .on("zoom", event => container.attr("transform", event.transform)));
+            
+            // Create links
+            const link = container.append("g")
+                .selectAll("line")
+                .data(links)
+                .enter().append("line")
+                .attr("class", d => `link ${d.is_indirect ? "indirect-link" : ""}`)
+                .attr("stroke", "#999")
+                .attr("stroke-width", linkWidth);
+            
+            // Create nodes
+            const node = container.append("g")
+                .selectAll("circle")
+                .data(nodes)
+                .enter().append("circle")
+                .attr("class", "node")
+                .attr("r", nodeRadius)
+                .attr("fill", nodeColor)
+                .call(d3.drag()
+                    .on("start", dragStarted)
+                    .on("drag", dragged)
+                    .on("end", dragEnded));
+            
+            // Add labels
+            const label = container.append("g")
+                .selectAll("text")
+                .data(nodes)
+                .enter().append("text")
+                .attr("dx", 12)
+                .attr("dy", ".35em")
+                .text(d => d.name);
+            
+            // Node tooltips
+            node.on("mouseover", showTooltip)
+                .on("mouseout", hideTooltip);
+            
+            return {
+                // Update positions on each tick
+                draw() {
+                    link
+                        .attr("x1", d => d.source.x)
+                        .attr("y1", d => d.source.y)
+                        .attr("x2", d => d.target.x)
+                        .attr("y2", d => d.target.y);
+                    
+                    node
+                        .attr("cx", d => d.x)
+                        .attr("cy", d => d.y);
+                    
+                    label
+                        .attr("x", d => d.x)
+                        .attr("y", d => d.y);
+                },
+                
+                updateVisibility() {
+                    link.style("visibility", d => isLinkVisible(d) ? "visible" : "hidden");
+                    node.style("visibility", d => isNodeVisible(d) ? "visible" : "hidden");
+                    label.style("visibility", d => isNodeVisible(d) ? "visible" : "hidden");
+                }
+            };
+        }
         
-        // Force simulation
+        // Draw the network on a canvas, finding the node under the pointer with a quadtree
+        function canvasRenderer() {
+            const ratio = window.devicePixelRatio || 1;
+            const canvas = d3.select("#visualization")
+                .append("canvas")
+                .attr("width", width * ratio)
+                .attr("height", height * ratio)
+                .style("width", `${width}px`)
+                .style("height", `${height}px`)
+                .style("display", "block");
+            const context = canvas.node().getContext("2d");
+            let transform = d3.zoomIdentity;
+            let quadtree = null;
+            let hovered = null;
+            
+            function draw() {
+                // Node positions changed, so the quadtree is rebuilt on the next lookup
+                quadtree = null;
+                
+                context.save();
+                context.clearRect(0, 0, width * ratio, height * ratio);
+                context.scale(ratio, ratio);
+                context.translate(transform.x, transform.y);
+                context.scale(transform.k, transform.k);
+                
+                context.globalAlpha = 0.6;
+                context.strokeStyle = "#999";
+                links.forEach(l => {
+                    if (!isLinkVisible(l)) return;
+                    context.beginPath();
+                    context.setLineDash(l.is_indirect ? [5, 5] : []);
+                    context.lineWidth = linkWidth(l);
+                    context.moveTo(l.source.x, l.source.y);
+                    context.lineTo(l.target.x, l.target.y);
+                    context.stroke();
+                });
+                
+                context.globalAlpha = 1;
+                context.setLineDash([]);
+                context.lineWidth = 1.5;
+                context.strokeStyle = "#fff";
+                nodes.forEach(n => {
+                    if (!isNodeVisible(n)) return;
+                    context.beginPath();
+                    context.arc(n.x, n.y, nodeRadius(n), 0, 2 * Math.PI);
+                    context.fillStyle = nodeColor(n);
+                    context.fill();
+                    context.stroke();
+                });
+                
+                // Labels are drawn last, so no node covers them
+                context.fillStyle = "#000";
+                context.font = "16px Arial, sans-serif";
+                context.textBaseline = "middle";
+                nodes.forEach(n => {
+                    if (isNodeVisible(n)) context.fillText(n.name, n.x + 12, n.y);
+                });
+                
+                context.restore();
+            }
+            
+            // Find the visible node under a point given in canvas coordinates
+            function findNode(x, y) {
+                if (quadtree === null) {
+                    quadtree = d3.quadtree(nodes.filter(isNodeVisible), d => d.x, d => d.y);
+                }
+                const [px, py] = transform.invert([x, y]);
+                const d = quadtree.find(px, py, 12);
+                return d && Math.hypot(d.x - px, d.y - py) <= nodeRadius(d) ? d : null;
+            }
+            
+            // Dragging a node takes precedence over panning, so the drag behavior is applied first
+            canvas
+                .call(d3.drag()
+                    .container(canvas.node())
+                    .subject(event => {
+                        const d = findNode(event.x, event.y);
+                        return d && {node: d, x: event.x, y: event.y};
+                    })
+                    .on("start", event => dragStarted(event, event.subject.node))
+                    .on("drag", event => {
+                        const [x, y] = transform.invert([event.x, event.y]);
+                        dragged({x, y}, event.subject.node);
+                    })
+                    .on("end", event => dragEnded(event, event.subject.node)))
+                .call(d3.zoom()
+                    .scaleExtent([0.1, 5])
+                    .on("zoom", event => {
+                        transform = event.transform;
+                        draw();
+                    }));
+            
+            // Node tooltips
+            canvas
+                .on("mousemove", event => {
+                    const d = findNode(...d3.pointer(event));
+                    if (d === hovered) return;
+                    hovered = d;
+                    canvas.style("cursor", d ? "pointer" : null);
+                    if (d) {
+                        showTooltip(event, d);
+                    } else {
+                        hideTooltip();
+                    }
+                })
+                .on("mouseout", () => {
+                    hovered = null;
+                    hideTooltip();
+                });
+            
+            return {
+                draw,
+                updateVisibility: draw
+            };
+        }
+        
+        const renderer = nodes.length > CANVAS_NODE_THRESHOLD ? canvasRenderer() : svgRenderer();
+        
+        // Nodes laid out in advance are centered on the origin
+        const laidOut = nodes.length > 0 && nodes[0].x !== undefined;
+        if (laidOut) {
+            nodes.forEach(n => {
+                n.x += width / 2;
+                n.y += height / 2;
+            });
+        }
+        
+        // Force simulation; large networks settle in fewer ticks than the default 300
         const simulation = d3.forceSimulation(nodes)
-            .force("link", d3.forceLink(links).id(d => d.id).distance(150))
+            .alphaDecay(nodes.length > CANVAS_NODE_THRESHOLD ? 0.05 : 0.0228)
+            .force("link", d3.forceLink(links).distance(150))
             .force("charge", d3.forceManyBody().strength(-500))
             .force("center", d3.forceCenter(width / 2, height / 2))
-            .on("tick", ticked);
-        
-        // Update positions on each tick
-        function ticked() {{
-            link
-                .attr("x1", d => d.source.x)
-                .attr("y1", d => d.source.y)
-                .attr("x2", d => d.target.x)
-                .attr("y2", d => d.target.y);
-            
-            node
-                .attr("cx", d => d.x)
-                .attr("cy", d => d.y);
-            
-            label
-                .attr("x", d => d.x)
-                .attr("y", d => d.y);
-        }}
+            .on("tick", renderer.draw);
         
-        // Zooming function
-        function zoomed(event) {{
-            container.attr("transform", event.transform);
-        }}
+        // A precomputed layout is drawn as is; the simulation only runs again on drag or toggle
+        if (laidOut) {
+            simulation.stop();
+            renderer.draw();
+        }
         
         // Drag functions
-        function dragStarted(event, d) {{
+        function dragStarted(event, d) {
             if (!event.active) simulation.alphaTarget(0.3).restart();
             d.fx = d.x;
             d.fy = d.y;
-        }}
+        }
         
-        function dragged(event, d) {{
+        function dragged(event, d) {
             d.fx = event.x;
             d.fy = event.y;
-        }}
+        }
         
-        function dragEnded(event, d) {{
+        function dragEnded(event, d) {
             if (!event.active) simulation.alphaTarget(0);
             //d.fx = null;
             //d.fy = null;
-        }}
+        }
         
         // Toggle indirect relationships
-        d3.select("#show-indirect").on("change", function() {{
-            const showIndirect = this.checked;
-            
-            link.filter(d => d.is_indirect)
-                .style("visibility", showIndirect ? "visible" : "hidden");
+        d3.select("#show-indirect").on("change", function() {
+            showIndirect = this.checked;
             
             // If hiding indirect links, also hide nodes that would be disconnected
-            if (!showIndirect) {{
+            if (!showIndirect) {
                 // Find nodes only connected by indirect links
-                const visibleLinks = links.filter(d => !d.is_indirect);
-                const connectedNodeIds = new Set();
-                
-                visibleLinks.forEach(l => {{
+                connectedNodeIds = new Set();
+                links.filter(d => !d.is_indirect).forEach(l => {
                     connectedNodeIds.add(l.source.id);
                     connectedNodeIds.add(l.target.id);
-                }});
-                
-                node.style("visibility", d => {{
-                    // Always show the central node
-                    if (d.type === "central") return "visible";
-                    return connectedNodeIds.has(d.id) ? "visible" : "hidden";
-                }});
-                
-                label.style("visibility", d => {{
-                    if (d.type === "central") return "visible";
-                    return connectedNodeIds.has(d.id) ? "visible" : "hidden";
-                }});
-            }} else {{
+                });
+            } else {
                 // Show all nodes
-                node.style("visibility", "visible");
-                label.style("visibility", "visible");
-            }}
+                connectedNodeIds = null;
+            }
+            renderer.updateVisibility();
             
             // Restart simulation
             simulation.alpha(0.1).restart();
-        }});
+        });
     </script>
 </body>
 </html>
-        """
+"""
+
+
+def _layout_positions(node_count, link_columns):
+    """
+    Precompute the positions of the network nodes with a spring layout.
+    
+    The positions are centered on the origin and spaced for the link distance of the
+    browser-side simulation, which then starts from a settled layout instead of running
+    until it converges.
+    
+    Args:
+        node_count: The number of network nodes
+        link_columns: The links as returned by _link_columns
         
-        # Write the HTML file
+    Returns:
+        The x and y position of each node, or None without networkx
+    """
+    if nx is None or not node_count:
+        return None
+    
+    graph = nx.Graph()
+    graph.add_nodes_from(range(node_count))
+    graph.add_edges_from(zip(link_columns["s"], link_columns["t"]))
+    positions = nx.spring_layout(graph, iterations=100, seed=0, scale=75 * node_count ** 0.5)
+    
+    return [(round(float(positions[i][0]), 1), round(float(positions[i][1]), 1)) for i in range(node_count)]
+
+
+def load_ownership_network(krs_number, max_depth, neo4j, use_cache=True):
+    """
+    Load the ownership network of a company from the cache or the database.
+    
+    Args:
+        krs_number: The KRS number of the company
+        max_depth: Maximum depth for the network
+        neo4j: The Neo4j connection
+        use_cache: Reuse the network of an earlier run that is still fresh (see load_cached_result) (default: True)
+        
+    Returns:
+        The company name and the lists of nodes and links, or None if the company is not found
+    """
+    graph_version = ownership_graph_version(neo4j)
+    network = load_cached_result("network", krs_number, max_depth, graph_version) if use_cache else None
+    if network is None:
+        network = neo4j.execute_read_transaction(
+            fetch_ownership_network, krs_number, max_depth, has_apoc_subgraph(neo4j)
+        )
+        if network is not None:
+            store_cached_result("network", krs_number, max_depth, network, graph_version)
+    return network
+
+
+def generate_ownership_network_visualization(krs_number, max_depth, conn=None, use_cache=True, network=None):
+    """
+    Generate a D3.js visualization of the ownership network.
+    
+    Args:
+        krs_number: The KRS number of the company
+        max_depth: Maximum depth for the network
+        conn: Neo4j connection to use (default: the shared process-wide connection)
+        use_cache: Reuse the network of an earlier run that is still fresh (see load_cached_result) (default: True)
+        network: The network returned by load_ownership_network, if already loaded
+        
+    Returns:
+        Path to the generated HTML file
+    """
+    print_section(f"Generating Ownership Network Visualization (Depth: {max_depth})")
+    neo4j = conn or get_neo4j_connection()
+    
+    try:
+        # Create output directory
+        output_dir = Path(__file__).resolve().parent / "output"
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Create HTML file
+        html_file = output_dir / f"ownership_network_{krs_number}_depth{max_depth}.html"
+        print(f"Creating visualization at {html_file}...")
+        
+        if network is None:
+            network = load_ownership_network(krs_number, max_depth, neo4j, use_cache)
+        if network is None:
+            print(f"Company with KRS {krs_number} not found.")
+            return None
+        company_name, nodes, links = network
+        
+        # Create visualization data; the page refers to nodes by position instead of
+        # their element IDs, which are long strings
+        link_columns = _link_columns(nodes, links)
+        page_nodes = [dict(node, id=i) for i, node in enumerate(nodes)]
+        positions = _layout_positions(len(nodes), link_columns)
+        if positions is not None:
+            for node, (x, y) in zip(page_nodes, positions):
+                node["x"], node["y"] = x, y
+        visualization_data = {
+            "nodes": page_nodes,
+            "links": link_columns
+        }
+        
+        # Compress the network data, which dominates the page size for large networks
+        data_json = json.dumps(visualization_data, separators=(",", ":")).encode("utf-8")
+        data_blob = base64.b64encode(gzip.compress(data_json, mtime=0)).decode("ascii")
+        
+        # Write the HTML file, with the network data between the template parts
         with open(html_file, "w", encoding="utf-8") as f:
-            f.write(html_content)
+            f.write(_HTML_PREFIX.substitute(company_name=company_name, krs_number=krs_number, max_depth=max_depth))
+            f.write(data_blob)
+            f.write(_HTML_SUFFIX)
         
         print(f"Visualization generated successfully: {html_file}")
         return str(html_file)
@@ -716,7 +1100,8 @@ def generate_ownership_network_visualization(krs_number, max_depth):
         print(f"Error generating ownership network visualization: {e}")
         return None
     finally:
-        neo4j.close()
+        if conn is None:
+            neo4j.close()
 
 
 def main():
@@ -731,6 +1116,7 @@ def main():
     parser.add_argument("--analyze", action="store_true", help="Analyze ownership structure")
     parser.add_argument("--visualize", action="store_true", help="Generate visualization")
     parser.add_argument("--all", action="store_true", help="Perform all operations")
+    parser.add_argument("--no-cache", action="store_true", help="Query Neo4j instead of reusing results of earlier runs")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     
     args = parser.parse_args()
@@ -750,17 +1136,38 @@ def main():
         parser.print_help()
         return
     
-    # Perform operations
-    if args.discover or args.all:
-        discover_indirect_relationships(args.krs, args.depth)
-    
-    if args.analyze or args.all:
-        analyze_ownership_structure(args.krs, args.depth)
-    
-    if args.visualize or args.all:
-        html_file = generate_ownership_network_visualization(args.krs, args.depth)
-        if html_file:
-            print(f"\nOpen {html_file} in your browser to view the visualization.")
+    # Perform operations on one shared connection
+    with get_neo4j_connection() as neo4j:
+        # Make sure the company lookups by KRS number are backed by an index
+        try:
+            DatabaseSchema.create_constraints_and_indexes(neo4j)
+        except Exception as e:
+            print(f"Error creating constraints and indexes: {e}")
+        
+        network = None
+        if args.all or (args.discover and args.analyze):
+            discover_and_analyze_ownership(args.krs, args.depth, neo4j)
+        elif args.discover:
+            discover_indirect_relationships(args.krs, args.depth, neo4j)
+        elif args.analyze and args.visualize:
+            # Without discovery both only read, so load the network while the analysis runs
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                network_future = executor.submit(load_ownership_network, args.krs, args.depth, neo4j, not args.no_cache)
+                analyze_ownership_structure(args.krs, args.depth, neo4j, use_cache=not args.no_cache)
+            try:
+                network = network_future.result()
+            except Exception:
+                # The visualization loads the network again and reports the error
+                network = None
+        elif args.analyze:
+            analyze_ownership_structure(args.krs, args.depth, neo4j, use_cache=not args.no_cache)
+        
+        if args.visualize or args.all:
+            html_file = generate_ownership_network_visualization(
+                args.krs, args.depth, neo4j, use_cache=not args.no_cache, network=network
+            )
+            if html_file:
+                print(f"\nOpen {html_file} in your browser to view the visualization.")
     
     print("\n" + "=" * 80)
     print(" Operation Completed ".center(80, "="))